@@ -0,0 +1,223 @@
+"""
+Seven Knights 매크로 감지 프로세스 풀
+여러 게임 인스턴스를 한 PC 에서 돌릴 때 템플릿 매칭을 코어 수만큼의 워커
+프로세스에 나눠 실행한다. 인스턴스 스레드는 매칭 요청을 넣고 결과(신뢰도, 위치)만
+받으므로, 인스턴스가 늘어도 매칭이 한 프로세스의 코어/GIL 에 묶이지 않는다.
+
+프레임과 템플릿은 워커에 피클로 보내지 않는다. 프레임은 multiprocessing.shared_memory
+슬롯 링에 프레임마다 한 번만 기록하고(스레드마다 슬롯 하나), 템플릿/마스크는 처음
+쓸 때 공유 메모리에 한 번 올린다. 워커에는 (블록 이름, 오프셋, 모양, 스트라이드) 만
+보내고, 워커는 그 위치의 뷰에서 바로 매칭한다 (ROI 부분 영역도 복사 없이 뷰로 전달).
+
+    pool = DetectionPool(frame_slots=8, frame_bytes=1280 * 720 * 3)
+    max_val, max_loc = pool.match(screen, template, mask)
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class ArrayHandle(NamedTuple):
+    """공유 메모리 안의 배열 위치 (워커에 보내는 작은 튜플)"""
+    name: str
+    offset: int
+    shape: Tuple[int, ...]
+    strides: Tuple[int, ...]
+    dtype: str
+
+
+@dataclass
+class FrameLease:
+    """스레드가 빌린 프레임 슬롯과 마지막으로 기록한 프레임"""
+    slot: int
+    root: Optional[np.ndarray] = None
+
+
+def match_template(screen: np.ndarray, template: np.ndarray,
+                   mask: Optional[np.ndarray] = None) -> Tuple[float, Tuple[int, int]]:
+    """템플릿 매칭 (마스크가 있으면 전경 픽셀만 비교) - 최고 신뢰도와 위치"""
+    if mask is None:
+        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+    else:
+        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED, mask=mask)
+        # 마스크 매칭은 분산이 0인 영역에서 inf/nan 이 나올 수 있음
+        result = np.nan_to_num(result, nan=0.0, posinf=0.0, neginf=0.0)
+
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_val, max_loc
+
+
+# 워커 프로세스가 연 공유 메모리 블록 (이름 → 블록, 워커가 끝날 때까지 유지)
+attached_blocks: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def init_worker():
+    """워커는 코어 하나씩 사용 (OpenCV 내부 스레드가 워커끼리 코어를 다투지 않도록)"""
+    cv2.setNumThreads(1)
+
+
+def array_view(handle: ArrayHandle) -> np.ndarray:
+    """공유 메모리 위치의 배열 뷰 (복사 없음)"""
+    block = attached_blocks.get(handle.name)
+    if block is None:
+        block = shared_memory.SharedMemory(name=handle.name)
+        attached_blocks[handle.name] = block
+    return np.ndarray(handle.shape, dtype=handle.dtype, buffer=block.buf,
+                      offset=handle.offset, strides=handle.strides)
+
+
+def match_shared(screen: ArrayHandle, template: ArrayHandle,
+                 mask: Optional[ArrayHandle] = None) -> Tuple[float, Tuple[int, int]]:
+    """워커에서 공유 메모리 뷰로 매칭"""
+    return match_template(array_view(screen), array_view(template),
+                          array_view(mask) if mask is not None else None)
+
+
+def root_array(array: np.ndarray) -> np.ndarray:
+    """뷰(ROI 등)가 가리키는 원래 배열"""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def data_address(array: np.ndarray) -> int:
+    return array.__array_interface__['data'][0]
+
+
+class DetectionPool:
+    """템플릿 매칭 워커 프로세스 풀
+
+    frame_slots 개의 프레임 슬롯(각 frame_bytes 바이트)을 공유 메모리에 한 번 할당한다.
+    매칭을 요청하는 스레드마다 슬롯 하나를 빌려 쓰며, 같은 프레임(또는 그 ROI)으로
+    여러 템플릿을 매칭하면 프레임은 처음 한 번만 기록된다. 슬롯보다 큰 프레임이나
+    빌릴 슬롯이 없을 때는 기존처럼 배열을 복사해서 보낸다.
+    """
+
+    def __init__(self, workers: int = 0, frame_slots: int = 8, frame_bytes: int = 1920 * 1080 * 3):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        # 프레임 슬롯 링
+        self.frame_bytes = frame_bytes
+        self.frames = shared_memory.SharedMemory(create=True, size=max(1, frame_slots) * frame_bytes)
+        self.free_slots: List[int] = list(range(max(1, frame_slots)))
+        self.leases: Dict[int, FrameLease] = {}  # 스레드 ident → 슬롯
+
+        # 공유한 템플릿/마스크 (id → (원본 배열, 블록, 위치)), 원본을 잡아 두어 id 재사용을 막음
+        self.templates: Dict[int, Tuple[np.ndarray, shared_memory.SharedMemory, ArrayHandle]] = {}
+
+        # 통계
+        self.tasks = 0
+        self.frames_written = 0
+        self.bytes_written = 0  # 공유 메모리에 기록한 바이트 (프레임 + 템플릿)
+        self.copied_tasks = 0  # 공유 슬롯을 못 써서 배열을 복사해 보낸 매칭
+        self.busy_seconds = 0.0  # 요청부터 결과까지 걸린 시간 합
+
+    def lease(self) -> Optional[FrameLease]:
+        """현재 스레드의 프레임 슬롯 (처음이면 빌림, 끝난 스레드의 슬롯은 회수)"""
+        ident = threading.get_ident()
+        with self.lock:
+            lease = self.leases.get(ident)
+            if lease is not None:
+                return lease
+            if not self.free_slots:
+                alive = {thread.ident for thread in threading.enumerate()}
+                for dead in [key for key in self.leases if key not in alive]:
+                    self.free_slots.append(self.leases.pop(dead).slot)
+            if not self.free_slots:
+                return None
+            lease = FrameLease(self.free_slots.pop())
+            self.leases[ident] = lease
+            return lease
+
+    def publish(self, screen: np.ndarray) -> Optional[ArrayHandle]:
+        """프레임을 현재 스레드 슬롯에 기록하고 screen(ROI 뷰 가능) 위치 반환"""
+        root = root_array(screen)
+        if root.dtype != np.uint8 or not root.flags.c_contiguous or root.nbytes > self.frame_bytes:
+            return None
+        lease = self.lease()
+        if lease is None:
+            return None
+
+        slot_offset = lease.slot * self.frame_bytes
+        if lease.root is not root:
+            slot = np.ndarray(root.shape, dtype=root.dtype, buffer=self.frames.buf, offset=slot_offset)
+            np.copyto(slot, root)
+            del slot
+            lease.root = root
+            with self.lock:
+                self.frames_written += 1
+                self.bytes_written += root.nbytes
+
+        offset = slot_offset + data_address(screen) - data_address(root)
+        return ArrayHandle(self.frames.name, offset, screen.shape, screen.strides, screen.dtype.str)
+
+    def share(self, array: np.ndarray) -> ArrayHandle:
+        """템플릿/마스크를 공유 메모리에 올림 (같은 배열은 한 번만)"""
+        with self.lock:
+            entry = self.templates.get(id(array))
+            if entry is not None and entry[0] is array:
+                return entry[2]
+
+        contiguous = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(1, contiguous.nbytes))
+        view = np.ndarray(contiguous.shape, dtype=contiguous.dtype, buffer=block.buf)
+        np.copyto(view, contiguous)
+        del view
+        handle = ArrayHandle(block.name, 0, contiguous.shape, contiguous.strides, contiguous.dtype.str)
+        with self.lock:
+            self.templates[id(array)] = (array, block, handle)
+            self.bytes_written += contiguous.nbytes
+        return handle
+
+    def match(self, screen: np.ndarray, template: np.ndarray,
+              mask: Optional[np.ndarray] = None) -> Tuple[float, Tuple[int, int]]:
+        """워커 프로세스에서 매칭 (호출한 스레드는 결과가 올 때까지 대기)"""
+        started = time.perf_counter()
+        screen_handle = self.publish(screen)
+        if screen_handle is not None:
+            future = self.executor.submit(match_shared, screen_handle, self.share(template),
+                                          self.share(mask) if mask is not None else None)
+        else:
+            future = self.executor.submit(match_template, screen, template, mask)
+        result = future.result()
+        with self.lock:
+            self.tasks += 1
+            if screen_handle is None:
+                self.copied_tasks += 1
+            self.busy_seconds += time.perf_counter() - started
+        return result
+
+    def release_templates(self):
+        """공유한 템플릿/마스크 해제 (종료 시)"""
+        with self.lock:
+            entries = list(self.templates.values())
+            self.templates.clear()
+        for _, block, _ in entries:
+            block.close()
+            block.unlink()
+
+    def report_line(self) -> str:
+        average = self.busy_seconds / self.tasks * 1000 if self.tasks else 0.0
+        return (f"🧮 감지 워커 {self.workers}개: 매칭 {self.tasks}회, 평균 {average:.1f}ms, "
+                f"공유 프레임 {self.frames_written}장 ({self.bytes_written / 1024 / 1024:.0f}MB), "
+                f"복사 전송 {self.copied_tasks}회")
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.release_templates()
+        with self.lock:
+            self.leases.clear()
+        self.frames.close()
+        self.frames.unlink()
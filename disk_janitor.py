@@ -0,0 +1,105 @@
+"""
+Seven Knights 매크로 디스크 정리 모듈
+logs/ 와 screenshots/ 에 디렉토리별 바이트 예산을 두고, 백그라운드 스레드가
+주기적으로 전체 크기를 확인해 예산을 넘으면 가장 오래된 파일부터 삭제한다.
+최근에 수정된 파일과 지정한 경로(기록 중인 로그, 녹화 중인 세션 디렉토리)
+아래의 파일은 지우지 않는다.
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Set, Tuple
+
+
+class DiskJanitor(threading.Thread):
+    """디렉토리별 바이트 예산 관리 스레드"""
+
+    def __init__(self, budgets: Dict[Path, int], interval: float = 300.0, protect_seconds: float = 300.0,
+                 protected: Callable[[], Set[Path]] = lambda: set()):
+        super().__init__(name="DiskJanitor", daemon=True)
+        self.budgets = {Path(root): max_bytes for root, max_bytes in budgets.items()}
+        self.interval = interval
+        self.protect_seconds = protect_seconds
+        self.protected = protected  # 지우면 안 되는 파일/디렉토리 목록 (호출 시점 기준)
+        self.stop_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+        # 통계
+        self.files_deleted = 0
+        self.bytes_deleted = 0
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                self.logger.error(f"디스크 정리 오류: {e}")
+            self.stop_event.wait(self.interval)
+
+    def sweep(self) -> int:
+        """모든 디렉토리 예산 확인 (삭제한 바이트 수 반환)"""
+        deleted = 0
+        for root, max_bytes in self.budgets.items():
+            if root.exists():
+                deleted += self.enforce(root, max_bytes)
+        return deleted
+
+    def enforce(self, root: Path, max_bytes: int) -> int:
+        """root 아래 전체 크기가 max_bytes 이하가 될 때까지 오래된 파일 삭제"""
+        files: List[Tuple[float, int, Path]] = []
+        total = 0
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = Path(directory) / name
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= max_bytes:
+            return 0
+
+        protected = {path.resolve() for path in self.protected()}
+        cutoff = time.time() - self.protect_seconds
+        deleted = 0
+        removed_dirs = set()
+        for mtime, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            if mtime >= cutoff or self.is_protected(path, protected):
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            deleted += size
+            self.files_deleted += 1
+            removed_dirs.add(path.parent)
+
+        # 파일을 모두 지운 하위 디렉토리 정리 (root 자체와 미리 만든 디렉토리 구조는 유지)
+        for directory in sorted(removed_dirs, key=lambda p: len(p.parts), reverse=True):
+            if directory != root and directory.parent != root:
+                try:
+                    directory.rmdir()
+                except OSError:
+                    pass
+
+        if deleted:
+            self.bytes_deleted += deleted
+            self.logger.info(f"🧹 {root.name}/ 정리: {deleted / 1024 / 1024:.1f}MB 삭제 "
+                             f"(예산 {max_bytes / 1024 / 1024:.0f}MB, 현재 {total / 1024 / 1024:.1f}MB)")
+        return deleted
+
+    @staticmethod
+    def is_protected(path: Path, protected: Set[Path]) -> bool:
+        resolved = path.resolve()
+        return resolved in protected or any(parent in protected for parent in resolved.parents)
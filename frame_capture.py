@@ -0,0 +1,220 @@
+"""
+Seven Knights 매크로 화면 캡처 모듈
+전용 캡처 스레드가 최신 프레임을 링 버퍼에 계속 채워 두고,
+상태 감지/클릭 확인/OCR/스크린샷은 버퍼에서 최신 프레임을 바로 가져간다.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import mss
+import numpy as np
+
+
+class FrameRing:
+    """미리 할당된 고정 크기 프레임 링 버퍼
+
+    capacity 개의 프레임 슬롯만 사용하므로 메모리 사용량이 일정하다.
+    해상도가 바뀌면 슬롯을 한 번 다시 할당한다.
+    """
+
+    def __init__(self, capacity: int = 4):
+        self.capacity = max(2, capacity)
+        self.buffers: Optional[np.ndarray] = None
+        self.timestamps = [0.0] * self.capacity
+        self.sequence = 0  # 지금까지 기록된 프레임 수
+        self.valid_from = 0  # 현재 버퍼에 처음 기록된 프레임 순번
+        self.condition = threading.Condition()
+
+    def next_slot(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """다음에 기록할 슬롯 (해상도가 바뀌면 재할당)"""
+        if self.buffers is None or self.buffers.shape[1:] != shape:
+            with self.condition:
+                self.buffers = np.empty((self.capacity,) + shape, dtype=np.uint8)
+                self.valid_from = self.sequence
+        return self.buffers[self.sequence % self.capacity]
+
+    def commit(self, timestamp: float):
+        """next_slot 에 기록한 프레임을 최신 프레임으로 공개"""
+        with self.condition:
+            self.timestamps[self.sequence % self.capacity] = timestamp
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def latest(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[np.ndarray, float, int]]:
+        """최신 프레임 복사본, 캡처 시각, 순번 반환 (없으면 None)
+
+        region (x, y, 너비, 높이) 을 주면 그 부분만 복사한다 (데스크톱 프레임에서 창 하나).
+        """
+        with self.condition:
+            if self.sequence <= self.valid_from:
+                return None
+            index = (self.sequence - 1) % self.capacity
+            frame = self.buffers[index]
+            if region is not None:
+                x, y, width, height = region
+                frame = frame[y:y + height, x:x + width]
+            return frame.copy(), self.timestamps[index], self.sequence
+
+    def wait_for_frame(self, after_sequence: int, timeout: float,
+                       region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Tuple[np.ndarray, float, int]]:
+        """after_sequence 보다 새로운 프레임이 올 때까지 대기"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.sequence > after_sequence, timeout):
+                return None
+        return self.latest(region)
+
+
+class CaptureThread(threading.Thread):
+    """화면 캡처 전용 스레드
+
+    목표 FPS 로 screen_region 을 캡처해 FrameRing 에 기록한다. 전투 중에는
+    낮은 FPS, 클릭 직후에는 잠시 높은 FPS 로 캡처하도록 조절할 수 있다.
+    grab_fn 을 주면 mss 대신 해당 함수가 돌려주는 BGR 프레임을 사용한다.
+    phase_timer 를 주면 프레임마다 캡처 소요 시간을 "capture_thread" 구간으로 기록한다.
+    """
+
+    def __init__(self, region: Dict[str, int], fps: float = 10.0, ring_size: int = 4,
+                 grab_fn: Optional[Callable[[], np.ndarray]] = None, phase_timer=None):
+        super().__init__(name="CaptureThread", daemon=True)
+        self.region = dict(region)
+        self.ring = FrameRing(ring_size)
+        self.base_fps = fps
+        self.boost_fps = fps
+        self.boost_until = 0.0
+        self.running = False
+        self.grab_fn = grab_fn
+        self.phase_timer = phase_timer
+        self.wake_event = threading.Event()
+        self.frame_listeners: List[Callable[[float], None]] = []
+        self.logger = logging.getLogger(__name__)
+
+        # 캡처 통계
+        self.frames_captured = 0
+        self.capture_errors = 0
+        self.measured_fps = 0.0
+
+    def add_frame_listener(self, listener: Callable[[float], None]):
+        """새 프레임이 기록될 때마다 캡처 시각으로 호출할 함수 등록 (캡처 스레드에서 호출됨)"""
+        self.frame_listeners.append(listener)
+
+    def remove_frame_listener(self, listener: Callable[[float], None]):
+        """프레임 알림 함수 해제"""
+        if listener in self.frame_listeners:
+            self.frame_listeners.remove(listener)
+
+    def set_region(self, region: Dict[str, int]):
+        """캡처 영역 변경"""
+        self.region = dict(region)
+        self.wake_event.set()
+
+    def set_base_fps(self, fps: float):
+        """기본 캡처 FPS 변경 (예: 전투 중 낮춤)"""
+        self.base_fps = fps
+        self.wake_event.set()
+
+    def boost(self, fps: float, duration: float):
+        """일정 시간 동안 캡처 FPS 를 높임 (예: 클릭 직후)"""
+        self.boost_fps = fps
+        self.boost_until = time.time() + duration
+        self.wake_event.set()
+
+    def current_fps(self) -> float:
+        """현재 적용 중인 목표 FPS"""
+        if time.time() < self.boost_until:
+            return max(self.base_fps, self.boost_fps)
+        return self.base_fps
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[Tuple[np.ndarray, float]]:
+        """최신 프레임과 캡처 시각 (max_age 초보다 오래됐으면 None)"""
+        result = self.ring.latest()
+        if result is None:
+            return None
+
+        frame, timestamp, _ = result
+        if max_age is not None and time.time() - timestamp > max_age:
+            return None
+        return frame, timestamp
+
+    def wait_for_frame(self, newer_than: float, timeout: float) -> Optional[Tuple[np.ndarray, float]]:
+        """newer_than 시각 이후에 캡처된 프레임을 기다려서 반환"""
+        deadline = time.time() + timeout
+        sequence = self.ring.sequence
+
+        latest = self.ring.latest()
+        if latest is not None and latest[1] > newer_than:
+            return latest[0], latest[1]
+
+        # 기다리는 동안 캡처 주기를 앞당김
+        self.wake_event.set()
+        while time.time() < deadline:
+            result = self.ring.wait_for_frame(sequence, deadline - time.time())
+            if result is None:
+                return None
+            frame, timestamp, sequence = result
+            if timestamp > newer_than:
+                return frame, timestamp
+        return None
+
+    def stop(self):
+        """캡처 스레드 종료"""
+        self.running = False
+        self.wake_event.set()
+
+    def run(self):
+        """캡처 루프"""
+        self.running = True
+        fps_window_start = time.time()
+        fps_window_frames = 0
+
+        # mss 인스턴스는 스레드별로 생성해야 함
+        sct = mss.mss() if self.grab_fn is None else None
+        try:
+            while self.running:
+                cycle_start = time.time()
+
+                try:
+                    self.grab_into_ring(sct, cycle_start)
+                    if self.phase_timer is not None:
+                        self.phase_timer.record("capture_thread", time.time() - cycle_start)
+                    self.frames_captured += 1
+                    fps_window_frames += 1
+                    for listener in list(self.frame_listeners):
+                        listener(cycle_start)
+                except Exception as e:
+                    self.capture_errors += 1
+                    self.logger.error(f"캡처 스레드 오류: {e}")
+
+                # 1초마다 실제 FPS 갱신
+                elapsed = time.time() - fps_window_start
+                if elapsed >= 1.0:
+                    self.measured_fps = fps_window_frames / elapsed
+                    fps_window_start = time.time()
+                    fps_window_frames = 0
+
+                # 다음 캡처까지 대기 (FPS 변경/종료 시 바로 깨어남)
+                interval = 1.0 / max(0.1, self.current_fps())
+                remaining = interval - (time.time() - cycle_start)
+                if remaining > 0:
+                    self.wake_event.wait(remaining)
+                self.wake_event.clear()
+        finally:
+            if sct is not None:
+                sct.close()
+
+    def grab_into_ring(self, sct, timestamp: float):
+        """프레임 한 장을 캡처해서 링 버퍼 슬롯에 바로 기록"""
+        if self.grab_fn is not None:
+            frame = self.grab_fn()
+            if frame is None:
+                raise RuntimeError("프레임 공급 함수가 프레임을 반환하지 않음")
+            slot = self.ring.next_slot(frame.shape)
+            np.copyto(slot, frame)
+        else:
+            bgra = np.asarray(sct.grab(self.region))
+            slot = self.ring.next_slot((bgra.shape[0], bgra.shape[1], 3))
+            cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=slot)
+        self.ring.commit(timestamp)
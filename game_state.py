@@ -0,0 +1,16 @@
+"""
+Seven Knights 매크로 게임 상태 정의
+메인 매크로와 파이프라인/런타임 모듈이 함께 사용한다.
+"""
+
+from enum import Enum
+
+
+class GameState(Enum):
+    """게임 상태 열거형"""
+    WAITING = "waiting"           # 무한의 탑 대기 화면
+    TEAM_FORMATION = "formation"  # 팀 편성 화면
+    BATTLE = "battle"            # 전투 중
+    VICTORY = "victory"          # 승리 화면
+    DEFEAT = "defeat"            # 패배 화면
+    UNKNOWN = "unknown"          # 알 수 없는 상태
@@ -0,0 +1,161 @@
+"""
+Seven Knights 매크로 입력 중재기
+OS 커서는 하나뿐이므로 여러 게임 인스턴스가 각자 스레드에서 pyautogui.click 을
+부르면 이동/클릭이 서로 끼어든다. 모든 인스턴스의 클릭 요청을 우선순위 큐에 넣고
+전용 스레드 하나가 최소 간격을 두고 순서대로 실행하며, 인스턴스별 큐 대기 시간을 기록한다.
+
+    arbiter = InputArbiter(spacing=0.03)
+    arbiter.start()
+    arbiter.click("game1", 640, 360)   # 실행될 때까지 대기
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+# 숫자가 작을수록 먼저 실행 (같으면 요청 순서대로)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+def default_click(x: int, y: int):
+    """pyautogui 클릭 (간격은 중재기가 관리하므로 pyautogui.PAUSE 는 건너뜀)"""
+    from seven_knights_macro_improved import pyautogui
+    pyautogui.click(x, y, _pause=False)
+
+
+@dataclass(order=True)
+class ClickRequest:
+    """큐에 들어가는 클릭 요청 (priority, sequence 순으로 정렬)"""
+    priority: int
+    sequence: int
+    instance: str = field(compare=False)
+    x: int = field(compare=False)
+    y: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    done: threading.Event = field(compare=False, default_factory=threading.Event)
+    error: Optional[BaseException] = field(compare=False, default=None)
+    started: bool = field(compare=False, default=False)  # 중재기가 실행을 시작함
+    cancelled: bool = field(compare=False, default=False)  # 호출자가 기다리다 포기함 (실행하지 않음)
+
+
+@dataclass
+class QueueWaitStats:
+    """인스턴스별 클릭 큐 대기 시간"""
+    clicks: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.clicks if self.clicks else 0.0
+
+
+class InputArbiter(threading.Thread):
+    """모든 인스턴스의 클릭을 직렬로 실행하는 스레드"""
+
+    def __init__(self, spacing: float = 0.03, click_fn: Optional[Callable[[int, int], None]] = None):
+        super().__init__(name="InputArbiter", daemon=True)
+        self.spacing = spacing  # 연속 클릭 사이 최소 간격 (초)
+        self.click_fn = click_fn or default_click
+        self.requests: "queue.PriorityQueue[ClickRequest]" = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.running = False
+        self.last_click_at = 0.0
+        self.lock = threading.Lock()
+        self.wait_stats: Dict[str, QueueWaitStats] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def submit(self, instance: str, x: int, y: int, priority: int = PRIORITY_NORMAL) -> ClickRequest:
+        """클릭 요청을 큐에 넣고 바로 반환 (request.done 으로 완료 확인)"""
+        request = ClickRequest(priority, next(self.sequence), instance, x, y, time.perf_counter())
+        self.requests.put(request)
+        return request
+
+    def click(self, instance: str, x: int, y: int, priority: int = PRIORITY_NORMAL, timeout: float = 10.0):
+        """클릭 요청 후 실행될 때까지 대기 (클릭 중 발생한 예외는 호출한 스레드에서 다시 발생)
+
+        timeout 안에 실행되지 않으면 요청을 취소하고 TimeoutError 를 발생시킨다. 취소된
+        요청은 나중에 차례가 와도 실행하지 않는다 (이미 실행 중이면 끝날 때까지 기다림).
+        """
+        request = self.submit(instance, x, y, priority)
+        if not request.done.wait(timeout):
+            with self.lock:
+                if not request.started:
+                    request.cancelled = True
+            if request.cancelled:
+                raise TimeoutError(f"클릭 대기 시간 초과: {instance} ({x}, {y})")
+            request.done.wait()
+        if request.error is not None:
+            raise request.error
+
+    def stop(self):
+        """남은 요청은 실행하지 않고 종료 (대기 중인 호출자는 취소 예외를 받음)"""
+        self.running = False
+        self.requests.put(ClickRequest(-1, -1, "", 0, 0, 0.0))  # 대기 중인 get() 깨우기
+
+    def run(self):
+        self.running = True
+        while self.running:
+            request = self.requests.get()
+            if not self.running:
+                self.requests.put(request)
+                break
+            with self.lock:
+                if not request.cancelled:
+                    request.started = True
+            if request.cancelled:
+                request.done.set()
+                continue
+
+            # 최소 간격 유지
+            remaining = self.last_click_at + self.spacing - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+
+            started = time.perf_counter()
+            self.record_wait(request.instance, started - request.enqueued_at)
+            try:
+                self.click_fn(request.x, request.y)
+            except Exception as e:
+                request.error = e
+                self.logger.error(f"클릭 실행 실패 ({request.instance}): {e}")
+            self.last_click_at = time.perf_counter()
+            request.done.set()
+
+        self.cancel_pending()
+
+    def cancel_pending(self):
+        """종료 시 큐에 남은 요청의 호출자를 깨움"""
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                return
+            if request.instance:
+                request.error = RuntimeError("입력 중재기가 종료되어 클릭이 취소됨")
+                request.done.set()
+
+    def record_wait(self, instance: str, wait: float):
+        with self.lock:
+            stats = self.wait_stats.setdefault(instance, QueueWaitStats())
+            stats.clicks += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+
+    def snapshot(self) -> Dict[str, QueueWaitStats]:
+        """인스턴스별 대기 통계 복사본"""
+        with self.lock:
+            return {name: QueueWaitStats(s.clicks, s.total_wait, s.max_wait) for name, s in self.wait_stats.items()}
+
+    def report_lines(self) -> List[str]:
+        lines = [f"🖱️  입력 중재기: 대기 중 {self.requests.qsize()}건, 최소 간격 {self.spacing * 1000:.0f}ms"]
+        for name, stats in sorted(self.snapshot().items()):
+            lines.append(f"   {name}: 클릭 {stats.clicks}회, 큐 대기 평균 {stats.average_wait * 1000:.1f}ms, "
+                         f"최대 {stats.max_wait * 1000:.1f}ms")
+        return lines
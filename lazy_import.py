@@ -0,0 +1,65 @@
+"""
+Seven Knights 매크로 지연 임포트
+pyautogui / keyboard / pytesseract 처럼 임포트가 느리고 없을 수도 있는 모듈을
+처음 속성을 읽을 때 임포트한다. preload() 로 백그라운드에서 미리 임포트해 두면
+시작은 기다리지 않고, 첫 클릭/OCR 도 임포트 시간만큼 늦어지지 않는다.
+
+    pyautogui = LazyModule("pyautogui")
+    if pyautogui.available:
+        pyautogui.click(x, y)
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Callable, Optional
+
+
+class LazyModule:
+    """처음 사용할 때 임포트하는 모듈 대리 객체"""
+
+    def __init__(self, name: str, on_import: Optional[Callable[[ModuleType], None]] = None):
+        self.name = name
+        self.on_import = on_import  # 임포트 직후 한 번 호출 (안전 설정 등)
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.module: Optional[ModuleType] = None
+        self.error: Optional[Exception] = None
+
+    def load(self) -> Optional[ModuleType]:
+        """모듈 임포트 (실패하면 None, 여러 스레드에서 불러도 한 번만 임포트)"""
+        if self.loaded:
+            return self.module
+        with self.lock:
+            if not self.loaded:
+                try:
+                    module = importlib.import_module(self.name)
+                    if self.on_import is not None:
+                        self.on_import(module)
+                    self.module = module
+                except Exception as e:
+                    # 디스플레이가 없는 환경 등에서는 ImportError 외의 예외도 발생
+                    self.error = e
+                self.loaded = True
+        return self.module
+
+    @property
+    def available(self) -> bool:
+        return self.load() is not None
+
+    def __getattr__(self, attr: str):
+        module = self.load()
+        if module is None:
+            raise ImportError(f"{self.name} 를 사용할 수 없습니다: {self.error}")
+        return getattr(module, attr)
+
+
+def preload(*modules: LazyModule) -> threading.Thread:
+    """백그라운드 스레드에서 모듈들을 미리 임포트"""
+    def load_all():
+        for module in modules:
+            module.load()
+
+    thread = threading.Thread(target=load_all, name="LazyImport", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,359 @@
+"""
+Seven Knights 매크로 비동기 런타임
+상태별 처리를 코루틴으로 실행하고, 모든 대기를 취소 가능한 asyncio 대기로 바꾼다.
+템플릿 매칭/OCR 같은 CPU 작업과 클릭/상태 변경은 전용 실행기 스레드에서 처리하고,
+단축키는 이벤트 큐로 들어와 진행 중인 대기/매칭을 즉시 취소한다.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+from game_state import GameState
+from macro_logging import log_extra
+
+
+class AsyncMacroRuntime:
+    """asyncio 기반 매크로 런타임
+
+    - 제어 루프: 단축키 이벤트 큐를 처리하고 running/paused 플래그를 감시한다.
+    - 매크로 루프: 사이클 하나를 태스크로 실행하며, 정지/일시정지 시 태스크를
+      취소하므로 sleep 이나 프레임 대기 도중이라도 바로 멈춘다.
+    - 프레임 대기: 캡처 스레드의 새 프레임 알림을 asyncio.Event 로 받아
+      asyncio.wait_for 로 기다린다.
+    """
+
+    def __init__(self, macro):
+        self.macro = macro
+        # 감지 상태(투표기 등)를 공유하므로 CPU 작업은 한 스레드에서 순서대로 실행
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MacroMatcher")
+        self.control_poll_interval = macro.config.get("async_control_poll_interval", 0.02)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.events: Optional[asyncio.Queue] = None
+        self.frame_ready: Optional[asyncio.Event] = None
+        self.resume_event: Optional[asyncio.Event] = None
+        self.stop_event: Optional[asyncio.Event] = None
+        self.cycle_task: Optional[asyncio.Task] = None
+        self.stop_latencies = []  # 정지/일시정지 요청 → 반영까지 걸린 시간 (초)
+
+    def run(self):
+        """런타임 실행 (macro.running 이 False 가 될 때까지)"""
+        asyncio.run(self.main())
+
+    async def main(self):
+        macro = self.macro
+        self.loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue()
+        self.frame_ready = asyncio.Event()
+        self.resume_event = asyncio.Event()
+        self.stop_event = asyncio.Event()
+        if not macro.paused:
+            self.resume_event.set()
+
+        capture_thread = macro.capture_thread
+        if capture_thread is not None:
+            capture_thread.add_frame_listener(self.on_frame)
+        macro.async_runtime = self
+        macro.logger.info("⚡ 비동기 엔진 시작")
+
+        control = asyncio.create_task(self.control_loop())
+        worker = asyncio.create_task(self.macro_loop())
+        try:
+            await self.stop_event.wait()
+        finally:
+            macro.async_runtime = None
+            for task in (worker, control):
+                task.cancel()
+            await asyncio.gather(worker, control, return_exceptions=True)
+            if capture_thread is not None:
+                capture_thread.remove_frame_listener(self.on_frame)
+            # 취소된 매칭은 결과만 버리고 스레드가 끝날 때까지 기다리지 않음
+            self.executor.shutdown(wait=False)
+            macro.logger.info("⚡ 비동기 엔진 종료")
+
+    # ------------------------------------------------------------------
+    # 이벤트 / 제어
+    # ------------------------------------------------------------------
+    def post_event(self, event: str) -> bool:
+        """다른 스레드(키보드 등)에서 이벤트 전달"""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            loop.call_soon_threadsafe(self.events.put_nowait, (event, time.perf_counter()))
+        except RuntimeError:
+            # 이벤트 루프가 이미 종료됨
+            return False
+        return True
+
+    def on_frame(self, timestamp: float):
+        """캡처 스레드의 새 프레임 알림"""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self.frame_ready.set)
+            except RuntimeError:
+                pass
+
+    async def control_loop(self):
+        """단축키 이벤트 처리 + 외부에서 바뀐 running/paused 반영"""
+        macro = self.macro
+        while True:
+            try:
+                event, posted_at = await asyncio.wait_for(self.events.get(), self.control_poll_interval)
+            except asyncio.TimeoutError:
+                event, posted_at = None, None
+
+            if event in ('toggle', 'exit'):
+                macro.logger.info("⏹️  매크로 정지 요청")
+                macro.running = False
+            elif event == 'pause':
+                macro.toggle_pause()
+            elif event == 'stats':
+                macro.show_stats()
+            elif event == 'screenshot':
+                await self.loop.run_in_executor(None, macro.take_screenshot)
+
+            self.apply_flags(posted_at)
+
+    def apply_flags(self, posted_at: Optional[float] = None):
+        """running/paused 플래그를 태스크 상태에 반영"""
+        macro = self.macro
+        if not macro.running:
+            if not self.stop_event.is_set():
+                self.cancel_cycle()
+                self.stop_event.set()
+                self.report_latency("정지", posted_at)
+        elif macro.paused:
+            if self.resume_event.is_set():
+                self.resume_event.clear()
+                self.cancel_cycle()
+                self.report_latency("일시정지", posted_at)
+        elif not self.resume_event.is_set():
+            self.resume_event.set()
+
+    def cancel_cycle(self):
+        """진행 중인 사이클 취소"""
+        if self.cycle_task is not None and not self.cycle_task.done():
+            self.cycle_task.cancel()
+
+    def report_latency(self, action: str, posted_at: Optional[float]):
+        """단축키 → 반영 지연 기록"""
+        if posted_at is None:
+            return
+        latency = time.perf_counter() - posted_at
+        self.stop_latencies.append(latency)
+        self.macro.logger.info(f"⏱️  {action} 반영: {latency * 1000:.1f}ms")
+
+    # ------------------------------------------------------------------
+    # 대기 / 실행기
+    # ------------------------------------------------------------------
+    async def sleep(self, seconds: float, phase: str = "sleep"):
+        """취소 가능한 대기 (sleep_scale 배율 적용, 구간별 소요 시간에 phase 이름으로 기록)
+
+        리플레이처럼 sleep_scale 이 0 이면 기다리지 않고 이벤트 루프에 차례만 넘긴다.
+        """
+        if self.macro.sleep_scale <= 0:
+            await asyncio.sleep(0)
+            return
+        with self.macro.phase_timer.measure(phase):
+            await asyncio.sleep(seconds * self.macro.sleep_scale)
+
+    async def run_cpu(self, func, *args):
+        """CPU 작업(매칭/OCR)과 클릭/상태 변경을 실행기에서 실행
+
+        상태 변경도 투표기를 갱신하는 감지와 같은 스레드에서 순서대로 실행한다.
+        """
+        return await self.loop.run_in_executor(self.executor, func, *args)
+
+    async def next_frame(self, newer_than: float = 0.0,
+                         timeout: float = 1.0) -> Optional[Tuple[np.ndarray, float]]:
+        """newer_than 이후에 캡처된 프레임 (취소 가능한 대기)"""
+        macro = self.macro
+        capture_thread = macro.capture_thread
+        if capture_thread is None or not capture_thread.is_alive():
+            frame_time = time.time()
+            frame = await self.run_cpu(macro.grab_screen_direct)
+            return (frame, frame_time) if frame is not None else None
+
+        deadline = time.time() + timeout
+        while True:
+            # 확인 전에 비워야 확인과 대기 사이에 들어온 알림을 놓치지 않음
+            self.frame_ready.clear()
+            latest = capture_thread.latest()
+            if latest is not None and latest[1] > newer_than:
+                if time.time() - latest[1] <= macro.frame_max_age() or newer_than > 0:
+                    return latest
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            capture_thread.wake_event.set()
+            try:
+                await asyncio.wait_for(self.frame_ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    # ------------------------------------------------------------------
+    # 매크로 루프 / 상태 처리 코루틴
+    # ------------------------------------------------------------------
+    async def macro_loop(self):
+        """사이클 반복 (사이클 단위로 취소됨)"""
+        macro = self.macro
+
+        macro.logger.info("🔍 초기 상태 감지 중...")
+        latest = await self.next_frame()
+        initial_state = await self.run_cpu(macro.detect_game_state, latest[0]) if latest else GameState.UNKNOWN
+        if initial_state != GameState.UNKNOWN:
+            await self.run_cpu(macro.change_state, initial_state)
+        else:
+            macro.logger.warning("⚠️  초기 상태 감지 실패 - 알 수 없는 상태에서 시작")
+
+        while macro.running:
+            await self.resume_event.wait()
+            self.cycle_task = asyncio.create_task(self.run_cycle())
+            try:
+                with macro.phase_timer.measure("cycle"):
+                    ok = await self.cycle_task
+            except asyncio.CancelledError:
+                if not macro.running:
+                    raise
+                # 일시정지로 취소된 사이클 → 재개를 기다린 뒤 다시 감지
+                continue
+
+            macro.count_cycle()
+            if not macro.running:
+                break
+            if not ok:
+                macro.logger.error("매크로 사이클 실패 - 2초 후 재시도")
+                await self.sleep(2, "sleep.retry")
+            await self.sleep(macro.state_check_interval, "sleep.state_check")
+
+    async def run_cycle(self) -> bool:
+        """매크로 사이클 한 번 (run_macro_cycle 의 코루틴 버전)"""
+        macro = self.macro
+        try:
+            latest = await self.next_frame()
+            if latest is not None:
+                detected_state = await self.run_cpu(macro.detect_game_state, latest[0])
+                if detected_state != GameState.UNKNOWN and detected_state != macro.current_state:
+                    await self.run_cpu(macro.change_state, detected_state)
+
+            state = macro.current_state
+            if state == GameState.BATTLE:
+                return await self.handle_battle()
+            if state in macro.state_actions:
+                return await self.handle_action_state(state)
+            return await self.handle_unknown()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            macro.logger.error(f"매크로 사이클 오류: {e}")
+            await self.loop.run_in_executor(None, macro.take_screenshot, "cycle_error")
+            return False
+
+    async def handle_action_state(self, state: GameState) -> bool:
+        """버튼 하나를 누르는 상태 처리 (대기/팀 편성/승리/패배)"""
+        macro = self.macro
+        image_key, stat_name, next_state = macro.state_actions[state]
+
+        if state in (GameState.VICTORY, GameState.DEFEAT):
+            # 스크린샷 촬영 및 층수 인식
+            latest = await self.next_frame()
+            await self.run_cpu(macro.record_battle_result, latest[0] if latest else None,
+                               state == GameState.VICTORY)
+
+        if await self.smart_click(image_key):
+            setattr(macro.stats, stat_name, getattr(macro.stats, stat_name) + 1)
+            await self.run_cpu(macro.change_state, next_state)
+            return True
+        return False
+
+    async def smart_click(self, image_key: str, timeout: float = 15.0) -> bool:
+        """smart_click_image 의 코루틴 버전 (모든 대기가 취소 가능)"""
+        macro = self.macro
+        macro.logger.info(f"🖱️  {image_key} 클릭 시도 중... (최대 {macro.max_click_attempts}회)")
+
+        start_time = time.time()
+        click_attempts = 0
+
+        while time.time() - start_time < timeout and click_attempts < macro.max_click_attempts:
+            latest = await self.next_frame()
+            result = await self.run_cpu(macro.find_image_on_screen, image_key, None, latest[0]) if latest else None
+            if result:
+                x, y, _ = result
+                try:
+                    # 클릭(pyautogui PAUSE + 커서 이동)이 이벤트 루프를 막지 않도록 실행기에서
+                    await self.run_cpu(macro.click, x, y)
+                    clicked_at = time.time()
+                    macro.record_click_latency(clicked_at - latest[1])
+                    macro.logger.info(f"✅ {image_key} 클릭 성공 (시도: {click_attempts + 1}/{macro.max_click_attempts})")
+
+                    # 클릭 반영 대기 후 그 이후에 캡처된 프레임 하나로 판정
+                    await self.sleep(macro.click_delay, "sleep.click_delay")
+                    after = await self.next_frame(newer_than=clicked_at + macro.click_delay)
+                    if after is not None and await self.run_cpu(macro.confirm_click_effect, image_key, after[0]):
+                        return True
+
+                    click_attempts += 1
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    macro.logger.error(f"클릭 실패: {e}")
+                    click_attempts += 1
+
+            await self.sleep(0.5, "sleep.click_retry")
+
+        macro.logger.warning(f"⏰ {image_key} 클릭 실패 (시도: {click_attempts}/{macro.max_click_attempts}, 시간: {timeout}초)")
+        return False
+
+    async def handle_battle(self) -> bool:
+        """handle_battle_state 의 코루틴 버전"""
+        macro = self.macro
+        macro.logger.info("⚔️  전투 진행 중...")
+
+        battle_start = time.time()
+        proposed = False
+        macro.battle_detector.discard()  # 이전 전투(중단된 전투 포함)의 후보는 쓰지 않음
+
+        while time.time() - battle_start < macro.battle_timeout:
+            latest = await self.next_frame()
+            if latest is not None:
+                screen = latest[0]
+                current_state = await self.run_cpu(macro.detect_game_state, screen)
+                if current_state in (GameState.VICTORY, GameState.DEFEAT):
+                    # 승패가 나온 전투에서 잡은 후보만 전투 시그니처로 저장
+                    await self.run_cpu(macro.battle_detector.confirm)
+                    await self.run_cpu(macro.change_state, current_state)
+                    return True
+
+                # 어떤 화면과도 맞지 않는 전투 화면은 시그니처 후보로 기록
+                if (not proposed and current_state == GameState.UNKNOWN and
+                        time.time() - battle_start >= macro.battle_learn_delay and
+                        macro.is_unrecognized_screen(macro.last_state_confidences)):
+                    proposed = await self.run_cpu(macro.battle_detector.propose, screen)
+
+            await self.sleep(macro.battle_poll_interval, "sleep.battle_poll")
+
+        macro.battle_detector.discard()
+        macro.logger.warning("⏰ 전투 시간이 너무 오래 걸림 - 상태 재확인")
+        return True
+
+    async def handle_unknown(self) -> bool:
+        """handle_unknown_state 의 코루틴 버전"""
+        macro = self.macro
+        macro.logger.warning("❓ 알 수 없는 상태 - 포괄적 상태 분석 중...", extra=log_extra("handle.unknown"))
+
+        latest = await self.next_frame()
+        if latest is not None:
+            state_confidences = await self.run_cpu(macro.comprehensive_state_detection, latest[0])
+            if await self.run_cpu(macro.resolve_unknown_state, state_confidences):
+                return True
+
+        await self.sleep(1, "sleep.unknown")
+        return True
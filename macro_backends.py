@@ -0,0 +1,178 @@
+"""
+Seven Knights 매크로 입출력 백엔드
+게임 없이 매크로를 돌리기 위한 프레임 공급원과 입력 백엔드.
+
+- RecordingFrameSource: session_recorder 가 남긴 세션 녹화에서 프레임 공급
+- ImageDirectoryFrameSource: PNG 스크린샷 디렉토리에서 프레임 공급
+- StubInput: 클릭을 실제로 보내지 않고 기록만 하는 입력 백엔드
+
+프레임 공급원은 호출할 때마다 다음 프레임을 하나씩 돌려주므로 (실시간이 아님)
+SevenKnightsTowerMacro(frame_source=..., input_backend=..., headless=True) 로
+상태 머신 전체를 CPU 가 허용하는 속도로 실행할 수 있다.
+"""
+
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class ReplayFrame:
+    """재생 프레임 하나와 녹화 당시 정보"""
+    timestamp: float
+    recorded_state: Optional[str] = None
+    confidences: Optional[Dict[str, float]] = None
+    keyframe: bool = False
+    source: str = ""
+
+
+class ReplayFrameSource(ABC):
+    """재생 프레임 공급원 공통 부분
+
+    호출할 때마다 다음 프레임(BGR)을 반환하고, 끝에 도달하면 on_exhausted 를 한 번
+    호출한 뒤 None 을 반환한다 (loop=True 면 처음부터 다시).
+    """
+
+    def __init__(self, loop: bool = False):
+        self.loop = loop
+        self.position = 0
+        self.exhausted = False
+        self.current: Optional[ReplayFrame] = None
+        self.on_exhausted: Optional[Callable[[], None]] = None
+        self.logger = logging.getLogger(__name__)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """전체 프레임 수"""
+
+    @abstractmethod
+    def load_frame(self, position: int) -> Tuple[np.ndarray, ReplayFrame]:
+        """position 번째 프레임(BGR)과 녹화 당시 정보"""
+
+    def frame_size(self) -> Tuple[int, int]:
+        """(너비, 높이)"""
+        frame, _ = self.load_frame(0)
+        return frame.shape[1], frame.shape[0]
+
+    def __call__(self) -> Optional[np.ndarray]:
+        if self.position >= len(self):
+            if self.loop and len(self) > 0:
+                self.position = 0
+            else:
+                if not self.exhausted:
+                    self.exhausted = True
+                    if self.on_exhausted is not None:
+                        self.on_exhausted()
+                return None
+
+        frame, self.current = self.load_frame(self.position)
+        self.position += 1
+        return frame
+
+
+class RecordingFrameSource(ReplayFrameSource):
+    """세션 녹화 재생
+
+    키프레임이 있는 프레임은 원본 해상도 그대로, 나머지는 축소 프레임을 녹화
+    당시 해상도로 다시 확대해서 공급한다. keyframes_only=True 면 키프레임만 재생한다.
+    """
+
+    def __init__(self, session_dir: Path, keyframes_only: bool = False, loop: bool = False):
+        super().__init__(loop)
+        self.session_dir = Path(session_dir)
+        with open(self.session_dir / "meta.json", 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.scale = self.meta.get("scale", 0.25)
+
+        # (청크 이름, 인덱스 항목) 목록
+        self.entries: List[Tuple[str, Dict]] = []
+        self.arrays: Dict[str, Tuple[np.ndarray, Optional[np.ndarray]]] = {}
+        for index_path in sorted(self.session_dir.glob("chunk_*.jsonl")):
+            chunk = index_path.stem
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = json.loads(line)
+                    if "frame" not in entry:
+                        continue  # 클릭 이벤트
+                    if keyframes_only and "key" not in entry:
+                        continue
+                    self.entries.append((chunk, entry))
+
+        self.logger.info(f"🎞️  녹화 로드: {self.session_dir.name} ({len(self.entries)}프레임)")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def chunk_arrays(self, chunk: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """청크 배열을 메모리 맵으로 열기 (한 번만)"""
+        if chunk not in self.arrays:
+            frames = np.load(self.session_dir / f"{chunk}_frames.npy", mmap_mode='r')
+            keys_path = self.session_dir / f"{chunk}_keys.npy"
+            keys = np.load(keys_path, mmap_mode='r') if keys_path.exists() else None
+            self.arrays[chunk] = (frames, keys)
+        return self.arrays[chunk]
+
+    def load_frame(self, position: int) -> Tuple[np.ndarray, ReplayFrame]:
+        chunk, entry = self.entries[position]
+        frames, keys = self.chunk_arrays(chunk)
+        info = ReplayFrame(entry["t"], entry.get("state"), entry.get("conf"),
+                           keyframe="key" in entry, source=f"{chunk}#{entry['frame']}")
+
+        if info.keyframe and keys is not None:
+            return np.array(keys[entry["key"]]), info
+
+        thumb = frames[entry["frame"]]
+        if keys is not None:
+            size = (keys.shape[2], keys.shape[1])
+        else:
+            size = (int(round(thumb.shape[1] / self.scale)), int(round(thumb.shape[0] / self.scale)))
+        return cv2.resize(np.asarray(thumb), size, interpolation=cv2.INTER_LINEAR), info
+
+
+class ImageDirectoryFrameSource(ReplayFrameSource):
+    """스크린샷 디렉토리 재생 (파일 이름 순)"""
+
+    def __init__(self, directory: Path, pattern: str = "*.png", loop: bool = False):
+        super().__init__(loop)
+        self.directory = Path(directory)
+        self.paths = sorted(self.directory.glob(pattern))
+        self.logger.info(f"🖼️  이미지 로드: {self.directory} ({len(self.paths)}장)")
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def load_frame(self, position: int) -> Tuple[np.ndarray, ReplayFrame]:
+        path = self.paths[position]
+        frame = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise RuntimeError(f"이미지를 읽을 수 없음: {path}")
+        return frame, ReplayFrame(path.stat().st_mtime, source=path.name)
+
+
+class StubInput:
+    """클릭을 보내지 않고 기록만 하는 입력 백엔드"""
+
+    def __init__(self, frame_source: Optional[ReplayFrameSource] = None):
+        self.frame_source = frame_source
+        self.clicks: List[Dict] = []
+        self.logger = logging.getLogger(__name__)
+
+    def click(self, x: int, y: int):
+        frame = self.frame_source.current if self.frame_source is not None else None
+        self.clicks.append({
+            "t": time.time(),
+            "x": int(x),
+            "y": int(y),
+            "frame": frame.source if frame is not None else None
+        })
+        self.logger.info(f"🖱️  (스텁) 클릭 ({x}, {y})")
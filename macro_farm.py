@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seven Knights 매크로 팜 (한 PC 에서 여러 에뮬레이터 창 동시 실행)
+데스크톱 캡처 스레드 하나가 모든 게임 창을 덮는 영역을 틱마다 한 번 캡처하고,
+인스턴스마다 자기 창(viewport) 부분만 잘라 받는다. 인스턴스는 각자 상태 머신,
+통계, 진행 파일을 가지며, 템플릿 매칭은 코어 수만큼의 워커 프로세스에 나눠 실행한다.
+
+    python macro_farm.py            # config/tower_config.json 의 farm_instances 사용
+    python macro_farm.py --detect   # 화면에서 게임 창을 다시 찾아 farm_instances 로 저장
+
+farm_instances 형식 (데스크톱 좌표):
+    "farm_instances": [
+        {"name": "game1", "viewport": [0, 0, 1280, 720]},
+        {"name": "game2", "viewport": [1280, 0, 1280, 720], "priority": 0}
+    ]
+priority 는 클릭이 몰릴 때 먼저 처리할 순서 (작을수록 먼저, 기본 10).
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import cv2
+import mss
+import numpy as np
+
+from detection_pool import DetectionPool
+from disk_janitor import DiskJanitor
+from frame_capture import CaptureThread
+from input_arbiter import PRIORITY_NORMAL, InputArbiter
+from monitor_detection import STATE_TEMPLATE_FILES
+from screenshot_store import ScreenshotStore
+from seven_knights_macro_improved import SevenKnightsTowerMacro, keyboard
+from window_locator import GameWindowLocator
+
+Rect = Tuple[int, int, int, int]  # (left, top, width, height)
+
+BASE_DIR = Path(__file__).parent
+CONFIG_PATH = BASE_DIR / "config" / "tower_config.json"
+
+FARM_DEFAULTS = {
+    "farm_instances": [],
+    "farm_capture_fps": 10,
+    "farm_detection_workers": 0,  # 0 이면 코어 수
+    "farm_max_instances": 8,
+    "farm_click_spacing": 0.03  # 인스턴스 간 연속 클릭 최소 간격 (초)
+}
+
+
+def load_farm_settings(config_path: Path = CONFIG_PATH) -> Dict:
+    """팜 설정 (설정 파일에 없는 항목은 기본값)"""
+    settings = dict(FARM_DEFAULTS)
+    if config_path.exists():
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        settings.update({key: config[key] for key in FARM_DEFAULTS if key in config})
+    return settings
+
+
+def save_farm_instances(viewports: Dict[str, Rect], config_path: Path = CONFIG_PATH):
+    """찾은 게임 창을 설정 파일의 farm_instances 로 저장 (다른 설정은 유지)"""
+    config = {}
+    if config_path.exists():
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    config["farm_instances"] = [{"name": name, "viewport": list(rect)} for name, rect in viewports.items()]
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+def union_rect(rects: Iterable[Rect]) -> Rect:
+    """모든 사각형을 덮는 가장 작은 사각형"""
+    rects = list(rects)
+    left = min(r[0] for r in rects)
+    top = min(r[1] for r in rects)
+    right = max(r[0] + r[2] for r in rects)
+    bottom = max(r[1] + r[3] for r in rects)
+    return left, top, right - left, bottom - top
+
+
+def detect_viewports(locator: GameWindowLocator, frame: np.ndarray, limit: int) -> List[Rect]:
+    """프레임에서 게임 화면을 하나씩 찾아 지워 가며 limit 개까지 찾음 (프레임 좌표)"""
+    frame = frame.copy()
+    found = []
+    while len(found) < limit:
+        result = locator.locate(frame)
+        if result is None:
+            break
+        x, y, width, height = result[0]
+        if any(abs(x - r[0]) < 8 and abs(y - r[1]) < 8 for r in found):
+            break  # 같은 창을 다시 찾음
+        found.append((x, y, width, height))
+        frame[y:y + height, x:x + width] = 0
+    return sorted(found, key=lambda r: (r[1], r[0]))
+
+
+def detect_from_screen(settings: Dict) -> Dict[str, Rect]:
+    """전체 데스크톱에서 게임 창 자동 감지 (인스턴스 이름 → 데스크톱 좌표)"""
+    templates = {}
+    for key, filename in STATE_TEMPLATE_FILES.items():
+        image = cv2.imread(str(BASE_DIR / "images" / filename))
+        if image is not None:
+            templates[key] = image
+    if not templates:
+        print("❌ 상태 템플릿이 없습니다: python tools/image_extraction/extract_from_current_screen.py")
+        return {}
+
+    with mss.mss() as sct:
+        desktop = sct.monitors[0]
+        frame = np.asarray(sct.grab(desktop))
+    config = {}
+    if CONFIG_PATH.exists():
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    locator = GameWindowLocator(templates, game_size=tuple(config.get("game_resolution", [1920, 1080])),
+                                thumb_width=1920)
+
+    print("🔍 게임 창 찾는 중...")
+    started = time.perf_counter()
+    rects = detect_viewports(locator, frame, settings["farm_max_instances"])
+    viewports = {}
+    for index, (x, y, width, height) in enumerate(rects, 1):
+        viewports[f"game{index}"] = (desktop['left'] + x, desktop['top'] + y, width, height)
+    for name, rect in viewports.items():
+        print(f"   🪟 {name}: ({rect[0]}, {rect[1]}) {rect[2]}x{rect[3]}")
+    print(f"   {len(viewports)}개 ({(time.perf_counter() - started) * 1000:.0f}ms)")
+    return viewports
+
+
+class ViewportFrameSource:
+    """데스크톱 캡처에서 인스턴스 창 부분만 잘라 공급 (frame_source)
+
+    호출할 때마다 호출 이후에 캡처된 데스크톱 프레임을 기다리므로, 클릭 직후에
+    호출해도 클릭 전 화면을 받지 않는다.
+    """
+
+    def __init__(self, capture: CaptureThread, region: Rect, timeout: float = 1.0):
+        self.capture = capture
+        self.region = region  # 데스크톱 캡처 프레임 안의 위치
+        self.timeout = timeout
+
+    def frame_size(self) -> Tuple[int, int]:
+        return self.region[2], self.region[3]
+
+    def __call__(self) -> Optional[np.ndarray]:
+        ring = self.capture.ring
+        result = ring.wait_for_frame(ring.sequence, self.timeout, self.region)
+        if result is None:
+            result = ring.latest(self.region)
+        return result[0] if result is not None else None
+
+
+class ViewportInput:
+    """인스턴스 프레임 좌표 클릭을 데스크톱 좌표로 바꿔 입력 중재기에 보냄 (input_backend)
+
+    커서는 하나뿐이므로 모든 인스턴스의 클릭은 중재기 스레드에서 차례로 실행된다.
+    """
+
+    def __init__(self, arbiter: InputArbiter, name: str, origin: Tuple[int, int],
+                 priority: int = PRIORITY_NORMAL):
+        self.arbiter = arbiter
+        self.name = name
+        self.origin = origin
+        self.priority = priority
+
+    def click(self, x: int, y: int):
+        self.arbiter.click(self.name, self.origin[0] + x, self.origin[1] + y, self.priority)
+
+
+class FarmMacro(SevenKnightsTowerMacro):
+    """팜 인스턴스 하나 (자기 창의 상태 머신, 통계, 진행 파일)"""
+
+    def __init__(self, name: str, frame_source: ViewportFrameSource, input_backend: ViewportInput,
+                 detection_pool: DetectionPool):
+        self.instance_name = name
+        self.detection_pool = detection_pool
+        super().__init__(frame_source=frame_source, input_backend=input_backend)
+
+    def setup_directories(self):
+        """설정/템플릿/캐시는 공유하고 진행 파일, 스크린샷, 녹화, 학습 결과는 인스턴스별로"""
+        super().setup_directories()
+        name = self.instance_name
+        self.progress_dir = self.progress_dir / name
+        self.screenshots_dir = self.screenshots_dir / name
+        self.recordings_dir = self.recordings_dir / name
+        self.learned_dir = self.config_dir / "instances" / name
+        self.victory_screenshots_dir = self.screenshots_dir / "victory"
+        self.defeat_screenshots_dir = self.screenshots_dir / "defeat"
+        for directory in [self.progress_dir, self.learned_dir,
+                          self.victory_screenshots_dir, self.defeat_screenshots_dir]:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def load_config(self):
+        super().load_config()
+        # 캡처는 팜의 데스크톱 캡처 스레드가 담당
+        self.config["use_capture_thread"] = False
+        self.use_capture_thread = False
+
+    def setup_screenshot_store(self):
+        self.screenshot_store = ScreenshotStore(
+            self.logs_dir / "screenshots" / self.instance_name,
+            window=self.config.get("screenshot_dedup_window", 600),
+            max_distance=self.config.get("screenshot_dedup_distance", 10)
+        )
+
+    def setup_keyboard_shortcuts(self):
+        pass  # 단축키는 팜에서 한 번만 등록
+
+    def setup_metrics_server(self):
+        self.metrics_server = None
+
+    def setup_disk_janitor(self):
+        self.disk_janitor = None  # 팜에서 하나만 실행
+
+    def dump_phase_timings(self):
+        """구간별 소요 시간 통계를 logs/ 에 인스턴스 이름을 붙여 저장"""
+        if not self.phase_timer.histograms:
+            return
+        try:
+            path = self.logs_dir / f"phase_timings_{self.instance_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            self.phase_timer.dump(path)
+            self.logger.info(f"⏱️  구간별 소요 시간 저장: {path.name}")
+        except Exception as e:
+            self.logger.error(f"구간별 소요 시간 저장 실패: {e}")
+
+    def match_template(self, screen: np.ndarray, template: np.ndarray,
+                       mask: Optional[np.ndarray] = None) -> Tuple[float, Tuple[int, int]]:
+        """매칭은 감지 워커 프로세스에서"""
+        with self.phase_timer.measure("match_template"):
+            return self.detection_pool.match(screen, template, mask)
+
+
+class MacroFarm:
+    """여러 게임 창 매크로 실행기"""
+
+    def __init__(self, viewports: Dict[str, Rect], capture_fps: float = 10, workers: int = 0,
+                 click_spacing: float = 0.03, priorities: Optional[Dict[str, int]] = None):
+        left, top, width, height = union_rect(viewports.values())
+        self.capture = CaptureThread({'left': left, 'top': top, 'width': width, 'height': height},
+                                     fps=capture_fps)
+        # 인스턴스 스레드마다 공유 프레임 슬롯 하나 (파이프라인 엔진 작업 스레드 몫까지 두 배)
+        self.detection_pool = DetectionPool(workers, frame_slots=2 * len(viewports),
+                                            frame_bytes=max(w * h * 3 for _, _, w, h in viewports.values()))
+        self.input_arbiter = InputArbiter(spacing=click_spacing)
+        priorities = priorities or {}
+        self.logger = logging.getLogger(__name__)
+
+        self.instances: Dict[str, FarmMacro] = {}
+        for name, (x, y, w, h) in viewports.items():
+            source = ViewportFrameSource(self.capture, (x - left, y - top, w, h))
+            input_backend = ViewportInput(self.input_arbiter, name, (x, y),
+                                          priorities.get(name, PRIORITY_NORMAL))
+            self.instances[name] = FarmMacro(name, source, input_backend, self.detection_pool)
+        self.threads: Dict[str, threading.Thread] = {}
+        self.exit_event = threading.Event()
+
+        first = next(iter(self.instances.values()))
+        self.disk_janitor = DiskJanitor(
+            {
+                first.logs_dir: int(first.config.get("logs_max_mb", 4096) * 1024 * 1024),
+                first.base_dir / "screenshots": int(first.config.get("screenshots_max_mb", 2048) * 1024 * 1024)
+            },
+            interval=first.config.get("janitor_interval", 300),
+            protected=self.get_active_paths
+        )
+        print(f"🏭 팜 준비: 인스턴스 {len(self.instances)}개, 캡처 영역 ({left}, {top}) {width}x{height}, "
+              f"감지 워커 {self.detection_pool.workers}개")
+
+    def get_active_paths(self) -> Set[Path]:
+        paths = set()
+        for macro in self.instances.values():
+            paths |= macro.get_active_paths()
+        return paths
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self.threads.values())
+
+    def start(self):
+        """모든 인스턴스 시작"""
+        if not self.capture.is_alive():
+            self.capture.start()
+        if not self.input_arbiter.is_alive():
+            self.input_arbiter.start()
+        if not self.disk_janitor.is_alive():
+            self.disk_janitor.start()
+        for name, macro in self.instances.items():
+            thread = self.threads.get(name)
+            if thread is not None and thread.is_alive():
+                continue
+            thread = threading.Thread(target=macro.run_macro, name=f"Farm-{name}", daemon=True)
+            self.threads[name] = thread
+            thread.start()
+        self.logger.info(f"▶️  팜 시작 ({len(self.instances)}개)")
+
+    def stop(self):
+        """모든 인스턴스 정지 (현재 사이클이 끝날 때까지 대기)"""
+        for macro in self.instances.values():
+            macro.running = False
+        for thread in self.threads.values():
+            thread.join(timeout=30)
+        self.logger.info("⏸️  팜 정지")
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def toggle_pause(self):
+        paused = not all(macro.paused for macro in self.instances.values())
+        for macro in self.instances.values():
+            macro.paused = paused
+        self.logger.info("⏸️  팜 일시정지" if paused else "▶️  팜 재개")
+
+    def show_stats(self):
+        """인스턴스별 한 줄 요약"""
+        print("\n" + "="*78)
+        print("📊 팜 통계")
+        print("="*78)
+        print(f"{'인스턴스':<10}{'상태':<16}{'실행':>6}{'승리':>6}{'패배':>6}{'현재 층':>8}{'최대 층':>8}{'사이클':>8}")
+        for name, macro in self.instances.items():
+            stats = macro.stats
+            print(f"{name:<10}{macro.current_state.value:<16}{stats.total_runs:>6}{stats.victories:>6}"
+                  f"{stats.defeats:>6}{stats.current_floor:>8}{stats.max_floor_reached:>8}"
+                  f"{macro.cycles_completed:>8}")
+        print(f"📷 데스크톱 캡처: {self.capture.measured_fps:.1f} FPS, 오류 {self.capture.capture_errors}회")
+        print(self.detection_pool.report_line())
+        for line in self.input_arbiter.report_lines():
+            print(line)
+        print("="*78)
+
+    def shutdown(self):
+        self.stop()
+        self.capture.stop()
+        self.input_arbiter.stop()
+        self.disk_janitor.stop()
+        self.detection_pool.shutdown()
+
+    def run(self):
+        """단축키로 전체 제어 (keyboard 가 없으면 바로 시작하고 Ctrl+C 로 종료)"""
+        if keyboard.available:
+            keyboard.add_hotkey('f8', self.toggle_pause)
+            keyboard.add_hotkey('f9', self.toggle)
+            keyboard.add_hotkey('f10', self.exit_event.set)
+            keyboard.add_hotkey('f11', self.show_stats)
+            print("\n⌨️  F8: 전체 일시정지/재개  F9: 전체 시작/정지  F10: 종료  F11: 인스턴스별 통계")
+        else:
+            print("⚠️  keyboard 를 사용할 수 없어 바로 시작합니다 (Ctrl+C 로 종료)")
+            self.start()
+
+        try:
+            while not self.exit_event.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+        print("\n👋 팜 종료")
+        self.show_stats()
+        self.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seven Knights 무한의 탑 매크로 팜 (여러 게임 창 동시 실행)")
+    parser.add_argument('--detect', action='store_true', help="화면에서 게임 창을 다시 찾아 farm_instances 로 저장")
+    args = parser.parse_args()
+
+    settings = load_farm_settings()
+    viewports = {entry["name"]: tuple(entry["viewport"]) for entry in settings["farm_instances"]}
+    priorities = {entry["name"]: entry.get("priority", PRIORITY_NORMAL) for entry in settings["farm_instances"]}
+    if args.detect or not viewports:
+        viewports = detect_from_screen(settings)
+        if not viewports:
+            print("❌ 게임 창을 찾지 못했습니다. farm_instances 를 직접 설정하세요.")
+            return
+        save_farm_instances(viewports)
+        print(f"💾 farm_instances 저장: {CONFIG_PATH}")
+
+    farm = MacroFarm(viewports, capture_fps=settings["farm_capture_fps"],
+                     workers=settings["farm_detection_workers"],
+                     click_spacing=settings["farm_click_spacing"], priorities=priorities)
+    farm.run()
+
+
+if __name__ == "__main__":
+    main()
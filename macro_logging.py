@@ -0,0 +1,298 @@
+"""
+Seven Knights 매크로 로깅 설정
+매크로 스레드는 QueueHandler 로 기록을 큐에 넣기만 하고, 파일/콘솔 출력은
+QueueListener 스레드가 처리한다. 파일은 JSON Lines (시각, 레벨, 스레드, key,
+필드), 콘솔은 사람이 읽는 한 줄 형식이다. 로그 파일은 크기/시간 기준으로 회전하고
+지난 조각은 gzip 으로 압축한다 (logs/tower_macro_YYYYmmdd_HHMMSS.jsonl.gz).
+로그 파일은 잠금 파일(<이름>.lock)을 잡은 프로세스만 쓰고 회전하며, 이미 다른
+프로세스가 쓰고 있으면 tower_macro_2.jsonl 처럼 번호를 붙인 파일을 사용한다.
+
+매 프레임 반복되는 기록은 key 를 붙여 남긴다. 같은 key 는 rate_limit 초에 한 번만
+내보내고, 그 사이 생략한 횟수는 다음 기록이나 주기적인 요약 기록의 repeated 필드로
+남기므로 같은 줄이 시간당 수천 번 쌓이지 않는다.
+
+    self.logger.info("🎯 템플릿 발견", extra=log_extra("match.enter_button", confidence=0.91))
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def log_extra(key: str, **fields: Any) -> Dict[str, Any]:
+    """logger 호출의 extra 인자 (반복 기록 key + 구조화 필드)"""
+    return {"key": key, "fields": fields}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """한 줄에 JSON 객체 하나"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "t": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage()
+        }
+        key = getattr(record, "key", None)
+        if key is not None:
+            entry["key"] = key
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry["fields"] = fields
+        repeated = getattr(record, "repeated", 0)
+        if repeated:
+            entry["repeated"] = repeated
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """기존 콘솔 형식 + 필드 (key=value) + 생략 횟수"""
+
+    def __init__(self):
+        super().__init__(CONSOLE_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(
+                f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+                for name, value in fields.items())
+        repeated = getattr(record, "repeated", 0)
+        if repeated:
+            text += f" (같은 기록 {repeated}회 생략)"
+        return text
+
+
+def try_lock(lock_path: Path) -> Optional[IO]:
+    """잠금 파일을 배타적으로 잡음 (다른 프로세스가 잡고 있으면 None)
+
+    OS 잠금이므로 프로세스가 비정상 종료해도 자동으로 풀린다.
+    """
+    handle = open(lock_path, 'a+')
+    try:
+        if os.name == 'nt':
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+class CompressingRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """크기(max_bytes) 또는 시간(max_age 초) 기준 회전 + 지난 조각 gzip 압축
+
+    현재 조각은 항상 같은 이름(path)에 쓰고, 회전할 때 조각을 연 시각을 붙인
+    .gz 파일로 압축한다. 시작할 때 이전 실행의 로그가 남아 있으면 먼저 회전한다.
+    압축은 QueueListener 스레드에서 실행되므로 매크로 스레드를 막지 않는다.
+
+    다른 프로세스가 쓰는 파일을 압축/삭제하지 않도록 path 의 잠금 파일을 잡은 경우에만
+    그 파일을 쓰고, 잡지 못하면 <이름>_2, <이름>_3 ... 중 잠금이 비어 있는 파일을 쓴다.
+    시작할 때의 회전이 실패해도 (다른 프로그램이 파일을 연 경우 등) 기존 파일에 이어 쓴다.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 20 * 1024 * 1024, max_age: float = 24 * 3600):
+        path = Path(path)
+        number = 1
+        self.path = path
+        self.lock_file = try_lock(self.lock_path)
+        while self.lock_file is None:
+            number += 1
+            self.path = path.with_name(f"{path.stem}_{number}{path.suffix}")
+            self.lock_file = try_lock(self.lock_path)
+
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        try:
+            if self.path.exists() and self.path.stat().st_size > 0:
+                self.compress_segment(self.path.stat().st_mtime)
+        except OSError as e:
+            print(f"⚠️  이전 로그 압축 실패 - 기존 파일에 이어서 기록: {e}")
+        super().__init__(str(self.path), 'a', encoding='utf-8')
+        self.opened_at = time.time()
+
+    @property
+    def lock_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".lock")
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            return False
+        if self.max_age > 0 and time.time() - self.opened_at >= self.max_age:
+            return True
+        return self.max_bytes > 0 and self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        try:
+            self.compress_segment(self.opened_at)
+        finally:
+            # 압축에 실패해도 기록은 계속 (실패는 emit 의 handleError 로 보고됨)
+            self.stream = self._open()
+            self.opened_at = time.time()
+
+    def compress_segment(self, opened_at: float) -> Path:
+        """현재 조각을 <이름>_<연 시각>.jsonl.gz 로 압축하고 원본 삭제
+
+        임시 파일에 압축한 뒤 원본을 지우고 나서야 .gz 이름으로 바꾸므로, 실패하면
+        원본만 남고 반쯤 쓴 .gz 는 남지 않는다.
+        """
+        stamp = datetime.fromtimestamp(opened_at).strftime('%Y%m%d_%H%M%S')
+        target = self.path.with_name(f"{self.path.stem}_{stamp}{self.path.suffix}.gz")
+        number = 1
+        while target.exists():
+            number += 1
+            target = self.path.with_name(f"{self.path.stem}_{stamp}_{number}{self.path.suffix}.gz")
+        partial = target.with_name(target.name + ".tmp")
+        try:
+            with open(self.path, 'rb') as source, gzip.open(partial, 'wb') as compressed:
+                shutil.copyfileobj(source, compressed)
+            os.remove(self.path)
+        except OSError:
+            if partial.exists():
+                os.remove(partial)
+            raise
+        os.replace(partial, target)
+        return target
+
+    def close(self):
+        super().close()
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+
+class RateLimitFilter(logging.Filter):
+    """key 별 rate limit (key 가 없는 기록은 그대로 통과)
+
+    호출 스레드에서 실행되므로 생략된 기록은 큐에도 들어가지 않는다.
+    """
+
+    def __init__(self, interval: float = 10.0):
+        super().__init__()
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.windows: Dict[str, List] = {}  # key → [창 시작 시각, 생략 횟수, 마지막 생략 기록]
+        self.last_sweep = 0.0
+        self.emit_summary = None  # 요약 기록을 필터를 거치지 않고 내보낼 함수
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "key", None)
+        now = record.created
+        passed = True
+        if key is not None and self.interval > 0:
+            with self.lock:
+                window = self.windows.get(key)
+                if window is not None and now - window[0] < self.interval:
+                    window[1] += 1
+                    window[2] = record
+                    passed = False
+                else:
+                    if window is not None and window[1]:
+                        record.repeated = window[1]
+                    self.windows[key] = [now, 0, None]
+
+        if now - self.last_sweep >= self.interval:
+            self.sweep(now)
+        return passed
+
+    def sweep(self, now: Optional[float] = None):
+        """창이 끝났는데 생략된 기록이 남은 key 를 요약 기록으로 내보냄 (now=None 이면 전부)
+
+        요약 기록은 지금 시각으로 새로 만들어 시간 순서를 지키고, 마지막 생략 기록의
+        메시지/필드와 key, 생략 횟수(repeated)를 담는다.
+        """
+        summaries = []
+        with self.lock:
+            if now is not None:
+                self.last_sweep = now
+            for key, (started, suppressed, last) in list(self.windows.items()):
+                if now is not None and now - started < self.interval:
+                    continue
+                if suppressed and last is not None:
+                    summary = logging.makeLogRecord({
+                        "name": last.name, "levelno": last.levelno, "levelname": last.levelname,
+                        "msg": last.getMessage(), "fields": getattr(last, "fields", None),
+                        "key": key, "repeated": suppressed
+                    })
+                    summaries.append(summary)
+                del self.windows[key]
+
+        if self.emit_summary is not None:
+            for record in summaries:
+                self.emit_summary(record)
+
+
+class MacroLogging:
+    """큐 기반 로깅 (QueueHandler → QueueListener → 파일/콘솔)"""
+
+    def __init__(self, log_path: Path, level: int = logging.INFO, rate_limit: float = 10.0):
+        self.log_path = log_path
+        self.queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+        self.file_handler = file_handler = CompressingRotatingFileHandler(log_path)
+        self.log_path = file_handler.path  # 다른 프로세스가 쓰고 있으면 번호가 붙은 파일
+        file_handler.setFormatter(JsonLinesFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(ConsoleFormatter())
+
+        self.rate_limiter = RateLimitFilter(rate_limit)
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+        self.queue_handler.addFilter(self.rate_limiter)
+        self.rate_limiter.emit_summary = lambda record: self.queue_handler.enqueue(record)
+
+        self.listener = logging.handlers.QueueListener(self.queue, file_handler, console_handler,
+                                                       respect_handler_level=True)
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(self.queue_handler)
+        self.listener.start()
+        self.stopped = False
+
+    def stop(self):
+        """남은 요약과 기록을 모두 출력하고 리스너 종료"""
+        if self.stopped:
+            return
+        self.stopped = True
+        self.rate_limiter.sweep()
+        self.listener.stop()
+        logging.getLogger().removeHandler(self.queue_handler)
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+active_logging: Optional[MacroLogging] = None
+
+
+def configure_logging(logs_dir: Path, rate_limit: float = 10.0) -> MacroLogging:
+    """프로세스 전체 로깅 설정 (여러 번 호출해도 한 번만 설정)"""
+    global active_logging
+    if active_logging is None or active_logging.stopped:
+        log_path = logs_dir / "tower_macro.jsonl"
+        active_logging = MacroLogging(log_path, rate_limit=rate_limit)
+        atexit.register(active_logging.stop)
+    return active_logging
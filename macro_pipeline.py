@@ -0,0 +1,249 @@
+"""
+Seven Knights 매크로 파이프라인 엔진
+캡처 → 감지 → 액션 3단계를 별도 스레드로 나누고 제한된 큐로 연결한다.
+N 번째 프레임의 클릭/대기 중에도 N+1 번째 프레임 감지가 계속 진행된다.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from game_state import GameState
+
+
+@dataclass
+class Detection:
+    """감지 단계 결과 (한 프레임)"""
+    frame: np.ndarray
+    frame_time: float                                # 프레임 캡처 시각
+    state: GameState                                 # 투표로 인정된 상태
+    target: Optional[Tuple[str, int, int, float]]    # (이미지 키, x, y, 신뢰도)
+    detected_at: float                               # 감지 완료 시각
+
+
+@dataclass
+class PendingClick:
+    """효과 확인 전인 클릭"""
+    image_key: str
+    state: GameState
+    clicked_at: float
+    attempts: int = 1
+
+
+class PipelinedMacroEngine:
+    """3단계 파이프라인 매크로 엔진
+
+    - 캡처: CaptureThread 가 링 버퍼에 최신 프레임을 채운다.
+    - 감지: 새 프레임마다 상태 투표 + 현재 상태의 버튼 위치를 찾는다.
+    - 액션: 감지 결과로 클릭하고, 클릭 이후 프레임으로 효과를 확인한다.
+
+    클릭 후 고정 대기 대신, 클릭 시각 + click_delay 이전에 캡처된 같은 버튼의
+    감지 결과만 무시하므로 화면이 바뀌는 즉시 다음 버튼을 누를 수 있다.
+    """
+
+    def __init__(self, macro):
+        self.macro = macro
+        self.detections: "queue.Queue[Detection]" = queue.Queue(
+            maxsize=macro.config.get("pipeline_queue_size", 2))
+        self.state_lock = threading.Lock()
+        self.pending_click: Optional[PendingClick] = None
+        self.result_recorded = False
+        self.dropped_detections = 0
+
+    def run(self):
+        """파이프라인 실행 (macro.running 이 False 가 될 때까지)"""
+        macro = self.macro
+        macro.logger.info("🔀 파이프라인 엔진 시작 (캡처 → 감지 → 액션)")
+
+        detector = threading.Thread(target=self.detection_loop, name="DetectionStage", daemon=True)
+        detector.start()
+        macro.pipeline_engine = self
+
+        try:
+            self.action_loop()
+        finally:
+            macro.pipeline_engine = None
+            detector.join(timeout=2)
+            macro.logger.info(f"🔀 파이프라인 엔진 종료 (버려진 감지 결과: {self.dropped_detections})")
+
+    # ------------------------------------------------------------------
+    # 감지 단계
+    # ------------------------------------------------------------------
+    def next_frame(self, last_frame_time: float) -> Optional[Tuple[np.ndarray, float]]:
+        """마지막으로 처리한 프레임보다 새로운 프레임"""
+        macro = self.macro
+        capture_thread = macro.capture_thread
+        if capture_thread is not None and capture_thread.is_alive():
+            return capture_thread.wait_for_frame(last_frame_time, timeout=0.5)
+
+        # 캡처 스레드가 없으면 직접 캡처
+        frame_time = time.time()
+        frame = macro.grab_screen_direct()
+        if frame is None:
+            time.sleep(0.1)
+            return None
+        return frame, frame_time
+
+    def detection_loop(self):
+        """감지 단계: 새 프레임마다 상태와 클릭 대상을 계산"""
+        macro = self.macro
+        last_frame_time = 0.0
+
+        while macro.running:
+            if macro.paused:
+                time.sleep(0.1)
+                continue
+
+            try:
+                latest = self.next_frame(last_frame_time)
+                if latest is None:
+                    continue
+                frame, frame_time = latest
+                last_frame_time = frame_time
+
+                with self.state_lock:
+                    detected_state = macro.detect_game_state(frame)
+                    # 아직 투표가 모이지 않았으면 현재 상태 기준으로 버튼을 찾음
+                    effective_state = detected_state if detected_state != GameState.UNKNOWN else macro.current_state
+
+                target = None
+                action = macro.state_actions.get(effective_state)
+                if action is not None:
+                    result = macro.find_image_on_screen(action[0], screen=frame)
+                    if result:
+                        target = (action[0], result[0], result[1], result[2])
+
+                self.publish(Detection(frame, frame_time, detected_state, target, time.time()))
+
+            except Exception as e:
+                macro.logger.error(f"감지 단계 오류: {e}")
+                time.sleep(0.5)
+
+    def publish(self, detection: Detection):
+        """감지 결과를 큐에 넣음 (가득 차면 가장 오래된 결과를 버림)"""
+        while True:
+            try:
+                self.detections.put_nowait(detection)
+                return
+            except queue.Full:
+                try:
+                    self.detections.get_nowait()
+                    self.dropped_detections += 1
+                except queue.Empty:
+                    pass
+
+    # ------------------------------------------------------------------
+    # 액션 단계
+    # ------------------------------------------------------------------
+    def action_loop(self):
+        """액션 단계: 감지 결과에 따라 상태 전환과 클릭 수행"""
+        macro = self.macro
+
+        while macro.running:
+            try:
+                detection = self.detections.get(timeout=0.5)
+            except queue.Empty:
+                self.check_state_timeout()
+                continue
+
+            if macro.paused:
+                continue
+
+            try:
+                self.handle_detection(detection)
+            except Exception as e:
+                macro.logger.error(f"액션 단계 오류: {e}")
+                macro.take_screenshot("cycle_error")
+
+    def handle_detection(self, detection: Detection):
+        """감지 결과 하나 처리"""
+        macro = self.macro
+
+        # 감지된 상태로 전환
+        if detection.state != GameState.UNKNOWN and detection.state != macro.current_state:
+            battle_finished = macro.current_state == GameState.BATTLE
+            with self.state_lock:
+                macro.change_state(detection.state)
+            self.result_recorded = False
+            if battle_finished:
+                # 순차 엔진의 전투 처리 사이클 하나에 해당
+                macro.count_cycle()
+
+        self.verify_pending_click(detection)
+
+        # 결과 화면은 한 번만 기록 (OCR 은 이 단계에서 처리하고 감지는 계속 진행)
+        if macro.current_state in (GameState.VICTORY, GameState.DEFEAT) and not self.result_recorded:
+            macro.record_battle_result(detection.frame, is_victory=macro.current_state == GameState.VICTORY)
+            self.result_recorded = True
+
+        if detection.target is None:
+            self.check_state_timeout()
+            return
+
+        image_key, x, y, confidence = detection.target
+        pending = self.pending_click
+
+        if pending is not None and pending.image_key == image_key:
+            # 클릭이 반영되기 전에 캡처된 프레임은 무시
+            if detection.frame_time < pending.clicked_at + macro.click_delay:
+                return
+
+            # 대기 후에도 버튼이 그대로면 다시 클릭
+            if pending.attempts >= macro.max_click_attempts:
+                macro.logger.warning(f"⏰ {image_key} 클릭 실패 (시도: {pending.attempts}/{macro.max_click_attempts})")
+                macro.take_screenshot("click_failure")
+                self.pending_click = None
+                macro.count_cycle()
+                return
+
+            attempts = pending.attempts + 1
+        else:
+            attempts = 1
+
+        clicked_at = time.time()
+        macro.click(x, y)
+        macro.record_click_latency(clicked_at - detection.frame_time)
+        macro.logger.info(f"✅ {image_key} 클릭 (시도: {attempts}/{macro.max_click_attempts}, "
+                          f"프레임→클릭 {1000 * (clicked_at - detection.frame_time):.0f}ms)")
+        self.pending_click = PendingClick(image_key, macro.current_state, clicked_at, attempts)
+
+    def verify_pending_click(self, detection: Detection):
+        """클릭 이후 프레임에서 버튼이 사라졌으면 클릭 효과 확인 처리"""
+        pending = self.pending_click
+        if pending is None or detection.frame_time <= pending.clicked_at:
+            return
+
+        if detection.target is not None and detection.target[0] == pending.image_key:
+            return
+
+        macro = self.macro
+        self.pending_click = None
+        macro.logger.info(f"✅ {pending.image_key} 클릭 효과 확인됨")
+        # 버튼 하나를 처리한 것이 순차 엔진의 사이클 하나에 해당
+        macro.count_cycle()
+
+        action = macro.state_actions.get(pending.state)
+        if action is None:
+            return
+
+        _, stat_name, next_state = action
+        setattr(macro.stats, stat_name, getattr(macro.stats, stat_name) + 1)
+        if macro.current_state == pending.state:
+            with self.state_lock:
+                macro.change_state(next_state)
+            self.result_recorded = False
+
+    def check_state_timeout(self):
+        """알 수 없는 상태가 너무 오래 지속되면 대기 상태로 강제 전환"""
+        macro = self.macro
+        if macro.current_state == GameState.UNKNOWN and macro.is_state_timeout():
+            macro.logger.error("⏰ 상태 타임아웃 - 스크린샷 저장 후 대기 상태로 강제 전환")
+            macro.take_screenshot("state_timeout")
+            with self.state_lock:
+                macro.change_state(GameState.WAITING)
+            # 순차 엔진처럼 타임아웃 처리도 사이클 하나 (화면이 계속 알 수 없는 상태여도 max_cycles 에 도달)
+            macro.count_cycle()
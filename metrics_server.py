@@ -0,0 +1,210 @@
+"""
+Seven Knights 매크로 메트릭 서버
+키보드가 없는 헤드리스 PC 에서도 진행 상황을 볼 수 있도록 localhost HTTP 포트에
+Prometheus 텍스트 형식(/metrics)으로 매크로 통계를 제공한다.
+
+    GameFlowStats 카운터, 시간당 층수, 상태별 체류 시간,
+    구간별 소요 시간 히스토그램 (감지/OCR/매칭/캡처 ...), 클릭 지연,
+    캡처 FPS, 큐 길이, 버려진 녹화 프레임/감지 결과
+
+외부 라이브러리 없이 표준 http.server 만 사용한다.
+"""
+
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from game_state import GameState
+from phase_timing import BUCKET_BOUNDS
+
+PREFIX = "sevenknights"
+
+# 히스토그램으로 내보낼 버킷 경계 (10배 구간마다 2개, 나머지 경계는 합쳐짐)
+EXPORT_BUCKETS = list(range(3, len(BUCKET_BOUNDS), 4))
+
+# GameFlowStats 필드 → (메트릭 이름, 설명)
+STATS_COUNTERS = {
+    "total_runs": ("runs_total", "완료한 전투 수"),
+    "victories": ("victories_total", "승리 수"),
+    "defeats": ("defeats_total", "패배 수"),
+    "enters": ("enter_clicks_total", "입장 버튼 클릭 수"),
+    "starts": ("start_clicks_total", "시작 버튼 클릭 수"),
+    "next_areas": ("next_area_clicks_total", "다음 지역 버튼 클릭 수"),
+    "retries": ("retry_clicks_total", "다시하기 버튼 클릭 수"),
+    "state_detection_attempts": ("state_detections_total", "상태 감지 시도 수"),
+    "successful_transitions": ("state_transitions_total", "상태 전환 수"),
+}
+
+
+class MetricsWriter:
+    """Prometheus 텍스트 형식 작성"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def header(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        self.lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        if labels:
+            label_text = ",".join(f'{key}="{self.escape(str(val))}"' for key, val in labels.items())
+            self.lines.append(f"{PREFIX}_{name}{{{label_text}}} {self.format_value(value)}")
+        else:
+            self.lines.append(f"{PREFIX}_{name} {self.format_value(value)}")
+
+    def metric(self, name: str, kind: str, help_text: str, value: float):
+        self.header(name, kind, help_text)
+        self.sample(name, value)
+
+    @staticmethod
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    @staticmethod
+    def format_value(value: float) -> str:
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, int):
+            return str(value)
+        return repr(float(value))
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(macro) -> str:
+    """매크로 현재 상태를 Prometheus 텍스트로 변환"""
+    out = MetricsWriter()
+    stats = macro.stats
+    now = time.time()
+
+    # 게임 플로우 통계
+    for field_name, (name, help_text) in STATS_COUNTERS.items():
+        out.metric(name, "counter", help_text, getattr(stats, field_name))
+    out.metric("current_floor", "gauge", "현재 층수", stats.current_floor)
+    out.metric("max_floor_reached", "gauge", "최대 도달 층수", stats.max_floor_reached)
+    out.metric("floors_per_hour", "gauge", "시간당 승리(층) 수", stats.get_floors_per_hour())
+    out.metric("floor_screenshots", "gauge", "층수별 스크린샷을 저장한 층 수", len(stats.screenshots_taken))
+    out.metric("screenshots_saved_total", "counter", "새로 저장한 오류/타임아웃 스크린샷 수", macro.screenshot_store.saved)
+    out.metric("screenshots_deduplicated_total", "counter", "비슷한 화면이라 참조 횟수만 늘린 스크린샷 수",
+               macro.screenshot_store.duplicates)
+    out.metric("uptime_seconds", "gauge", "통계 시작 후 경과 시간", stats.get_runtime())
+    out.metric("running", "gauge", "매크로 실행 중 여부", bool(macro.running))
+    out.metric("paused", "gauge", "일시정지 여부", bool(macro.paused))
+
+    # 현재 상태 / 상태별 체류 시간
+    out.header("state", "gauge", "현재 상태 (해당 상태만 1)")
+    for state in GameState:
+        out.sample("state", state == macro.current_state, {"state": state.value})
+    out.header("state_dwell_seconds_total", "counter", "상태별 누적 체류 시간")
+    dwell = macro.get_state_dwell(now)
+    for state in GameState:
+        out.sample("state_dwell_seconds_total", dwell.get(state, 0.0), {"state": state.value})
+
+    # 구간별 소요 시간 히스토그램
+    cumulative = macro.phase_timer.cumulative()
+    if cumulative:
+        out.header("phase_duration_seconds", "histogram", "구간별 소요 시간 (감지, OCR, 매칭, 캡처, 클릭, 대기 등)")
+        for phase, (buckets, count, total) in sorted(cumulative.items()):
+            running_count = 0
+            last_index = 0
+            for index in EXPORT_BUCKETS:
+                running_count += sum(buckets[last_index:index + 1])
+                last_index = index + 1
+                out.sample("phase_duration_seconds_bucket", running_count,
+                           {"phase": phase, "le": f"{BUCKET_BOUNDS[index]:.6g}"})
+            out.sample("phase_duration_seconds_bucket", count, {"phase": phase, "le": "+Inf"})
+            out.sample("phase_duration_seconds_sum", total, {"phase": phase})
+            out.sample("phase_duration_seconds_count", count, {"phase": phase})
+
+    # 프레임 → 클릭 지연 (최근 500회)
+    latencies = sorted(macro.click_latencies)
+    if latencies:
+        out.header("click_latency_seconds", "summary", "프레임 캡처 → 클릭 전송 지연 (최근 클릭)")
+        for quantile in (0.5, 0.95):
+            value = latencies[min(len(latencies) - 1, int(len(latencies) * quantile))]
+            out.sample("click_latency_seconds", value, {"quantile": str(quantile)})
+        out.sample("click_latency_seconds_sum", sum(latencies))
+        out.sample("click_latency_seconds_count", len(latencies))
+
+    # 캡처 스레드
+    capture_thread = macro.capture_thread
+    if capture_thread is not None:
+        out.metric("capture_fps", "gauge", "캡처 스레드 실측 FPS", capture_thread.measured_fps)
+        out.metric("capture_target_fps", "gauge", "캡처 스레드 목표 FPS", capture_thread.current_fps())
+        out.metric("capture_frames_total", "counter", "캡처한 프레임 수", capture_thread.frames_captured)
+        out.metric("capture_errors_total", "counter", "캡처 실패 수", capture_thread.capture_errors)
+
+    # 큐 길이 / 버려진 항목
+    recorder = macro.session_recorder
+    if recorder is not None:
+        out.metric("recording_queue_depth", "gauge", "세션 녹화 대기 큐 길이", recorder.queue.qsize())
+        out.metric("recording_frames_total", "counter", "녹화한 프레임 수", recorder.frames_recorded)
+        out.metric("recording_frames_dropped_total", "counter",
+                   "큐가 가득 차서 버린 녹화 프레임 수", recorder.frames_dropped)
+    pipeline = macro.pipeline_engine
+    if pipeline is not None:
+        out.metric("pipeline_queue_depth", "gauge", "파이프라인 감지 결과 큐 길이", pipeline.detections.qsize())
+        out.metric("pipeline_dropped_detections_total", "counter",
+                   "액션 단계가 늦어 버린 감지 결과 수", pipeline.dropped_detections)
+    runtime = macro.async_runtime
+    if runtime is not None and runtime.events is not None:
+        out.metric("async_event_queue_depth", "gauge", "비동기 엔진 단축키 이벤트 큐 길이", runtime.events.qsize())
+
+    return out.text()
+
+
+class MetricsServer:
+    """localhost 메트릭 HTTP 서버 (데몬 스레드)"""
+
+    def __init__(self, macro, host: str = "127.0.0.1", port: int = 9464):
+        self.macro = macro
+        self.host = host
+        self.port = port
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        """서버 시작 (포트를 열 수 없으면 OSError)"""
+        macro = self.macro
+        logger = self.logger
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                try:
+                    body = render_metrics(macro).encode("utf-8")
+                except Exception as e:
+                    logger.error(f"메트릭 생성 실패: {e}")
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 수집 요청마다 콘솔에 찍히지 않도록 끔
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True)
+        self.thread.start()
+        self.logger.info(f"📡 메트릭 서버 시작: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """서버 종료"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
@@ -0,0 +1,163 @@
+"""
+Seven Knights 매크로 모니터 자동 감지
+모든 모니터를 동시에 캡처해 썸네일로 줄인 뒤, 같은 비율로 줄인 상태 템플릿
+(입장/시작/승리/다음 지역/다시하기 버튼)을 매칭해 게임 화면이 있는 모니터를 찾는다.
+전체 해상도 픽셀에 대한 밝기/분산 계산은 하지 않는다.
+
+결과는 모니터 배치(위치/해상도) 지문과 함께 저장하고, 배치가 같으면 다음 실행에서
+저장된 모니터 하나만 확인한다. 확인에 실패해도(전투 중 등 템플릿이 없는 화면)
+배치가 같으면 저장된 모니터를 그대로 사용한다.
+"""
+
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import mss
+import numpy as np
+
+MIN_TEMPLATE_SIZE = 8  # 썸네일 비율로 줄인 템플릿이 이보다 작으면 매칭하지 않음
+CERTAIN_SCORE = 0.9  # 이 이상이면 나머지 템플릿은 확인하지 않음
+
+# 게임 화면 감지에 사용하는 상태 템플릿 (images/ 기준 경로, 매크로와 같은 이미지)
+STATE_TEMPLATE_FILES = {
+    'enter_button': 'resources/button_images/enter_button.png',
+    'start_button': 'resources/button_images/start_button.png',
+    'win_victory': 'resources/button_images/win_victory.png',
+    'next_area': 'resources/button_images/next_area.png',
+    'lose_button': 'resources/button_images/lose_button.png'
+}
+
+
+def layout_fingerprint(monitors: Sequence[Dict]) -> str:
+    """모니터 배치 지문 (모니터 추가/제거, 해상도·위치 변경 시 달라짐)"""
+    layout = [[m['left'], m['top'], m['width'], m['height']] for m in monitors[1:]]
+    return hashlib.sha1(json.dumps(layout).encode("utf-8")).hexdigest()
+
+
+def grab_thumbnail(monitor: Dict, thumb_width: int) -> Tuple[np.ndarray, float]:
+    """모니터 한 개 캡처 후 썸네일로 축소 (썸네일, 축소 비율)
+
+    스레드마다 mss 인스턴스가 필요하므로 호출할 때마다 새로 만든다.
+    """
+    with mss.mss() as sct:
+        screenshot = sct.grab(monitor)
+    frame = np.asarray(screenshot)  # BGRA, 복사 없음
+    ratio = min(1.0, thumb_width / frame.shape[1])
+    # 픽셀을 건너뛰어 먼저 줄인 뒤 리사이즈 (전체 해상도 연산 회피)
+    step = max(1, int(1 / ratio) // 2)
+    small = frame[::step, ::step, :3]
+    size = (max(1, int(frame.shape[1] * ratio)), max(1, int(frame.shape[0] * ratio)))
+    thumb = cv2.resize(small, size, interpolation=cv2.INTER_AREA)
+    return thumb, ratio
+
+
+class MonitorScanner:
+    """상태 템플릿 기반 게임 모니터 감지기"""
+
+    def __init__(self, templates: Dict[str, np.ndarray], scales: Sequence[float] = (0.9, 1.0, 1.1),
+                 thumb_width: int = 480, min_score: float = 0.6, cache_path: Optional[Path] = None):
+        self.templates = templates
+        self.scales = list(scales)
+        self.thumb_width = thumb_width
+        self.min_score = min_score
+        self.cache_path = cache_path
+
+    def grab_thumbnails(self, monitors: Sequence[Dict], indices: List[int]) -> Dict[int, Tuple[np.ndarray, float]]:
+        """여러 모니터를 동시에 캡처 (실패한 모니터는 결과에서 제외)"""
+        thumbnails = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(indices)), thread_name_prefix="MonitorGrab") as pool:
+            futures = {index: pool.submit(grab_thumbnail, monitors[index], self.thumb_width) for index in indices}
+            for index, future in futures.items():
+                try:
+                    thumbnails[index] = future.result()
+                except Exception as e:
+                    print(f"   모니터 {index} 캡처 실패: {e}")
+        return thumbnails
+
+    def score(self, thumb: np.ndarray, ratio: float) -> Tuple[float, Optional[str]]:
+        """썸네일에서 가장 잘 맞는 템플릿의 신뢰도와 이름 (흑백 매칭, 확실하면 바로 종료)"""
+        gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        thumb_h, thumb_w = gray.shape
+        best_score, best_key = 0.0, None
+        for scale in sorted(self.scales, key=lambda s: abs(s - 1.0)):
+            for key, template in self.templates.items():
+                h, w = template.shape[:2]
+                new_w, new_h = int(w * ratio * scale), int(h * ratio * scale)
+                if min(new_w, new_h) < MIN_TEMPLATE_SIZE or new_w > thumb_w or new_h > thumb_h:
+                    continue
+                small = cv2.resize(cv2.cvtColor(template[:, :, :3], cv2.COLOR_BGR2GRAY), (new_w, new_h),
+                                   interpolation=cv2.INTER_AREA)
+                score = float(cv2.matchTemplate(gray, small, cv2.TM_CCOEFF_NORMED).max())
+                if score > best_score:
+                    best_score, best_key = score, key
+                if best_score >= CERTAIN_SCORE:
+                    return best_score, best_key
+        return best_score, best_key
+
+    def scan(self, monitors: Sequence[Dict], indices: Optional[List[int]] = None) -> Dict[int, Tuple[float, Optional[str]]]:
+        """모니터별 (점수, 매칭된 템플릿)"""
+        if indices is None:
+            indices = list(range(1, len(monitors)))
+        thumbnails = self.grab_thumbnails(monitors, indices)
+        return {index: self.score(thumb, ratio) for index, (thumb, ratio) in thumbnails.items()}
+
+    def detect(self, monitors: Sequence[Dict]) -> Optional[int]:
+        """게임 화면이 있는 모니터 번호 (찾지 못하면 None)"""
+        fingerprint = layout_fingerprint(monitors)
+        cached = self.load_cache(fingerprint)
+        if cached is not None and cached < len(monitors):
+            # 같은 배치: 저장된 모니터만 확인
+            score, key = self.scan(monitors, [cached]).get(cached, (0.0, None))
+            if score >= self.min_score:
+                print(f"🎯 저장된 게임 모니터 확인: 모니터 {cached} ({key} {score:.2f})")
+                return cached
+
+        started = time.perf_counter()
+        scores = self.scan(monitors)
+        for index, (score, key) in sorted(scores.items()):
+            print(f"   모니터 {index}: 점수 {score:.2f}" + (f" ({key})" if key else ""))
+
+        if scores:
+            best_index, (best_score, best_key) = max(scores.items(), key=lambda item: item[1][0])
+            if best_score >= self.min_score:
+                print(f"🎯 게임 화면 감지: 모니터 {best_index} ({best_key} {best_score:.2f}, "
+                      f"{(time.perf_counter() - started) * 1000:.0f}ms)")
+                self.save_cache(fingerprint, best_index, best_score, best_key)
+                return best_index
+
+        if cached is not None and cached < len(monitors):
+            print(f"⚠️  템플릿이 보이지 않아 저장된 모니터 {cached} 사용 (배치 동일)")
+            return cached
+        return None
+
+    def load_cache(self, fingerprint: str) -> Optional[int]:
+        if self.cache_path is None or not self.cache_path.exists():
+            return None
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get("fingerprint") == fingerprint:
+                return int(cache["monitor"])
+        except Exception:
+            pass
+        return None
+
+    def save_cache(self, fingerprint: str, monitor: int, score: float, key: Optional[str]):
+        if self.cache_path is None:
+            return
+        try:
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "fingerprint": fingerprint,
+                    "monitor": monitor,
+                    "score": round(score, 3),
+                    "template": key,
+                    "detected_at": time.strftime("%Y-%m-%d %H:%M:%S")
+                }, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"⚠️  모니터 감지 결과 저장 실패: {e}")
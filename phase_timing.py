@@ -0,0 +1,194 @@
+"""
+Seven Knights 매크로 구간별 소요 시간 측정 모듈
+캡처, 색 변환, 템플릿 매칭, OCR, 이미지 저장, 클릭, 대기 등 구간마다
+perf_counter 로 시간을 재서 최근 일정 시간의 분포(롤링 히스토그램)에 누적한다.
+
+기록은 구간 이름으로 버킷 인덱스를 찾아 정수 하나를 올리는 것이 전부라
+매크로 루프 안에서 항상 켜 둘 수 있다.
+"""
+
+import bisect
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 버킷 경계 (초): 10µs ~ 100초, 10배 구간마다 8개 (로그 간격)
+BUCKET_BOUNDS = [10 ** (exponent / 8) for exponent in range(-40, 17)]
+
+
+class RollingHistogram:
+    """최근 slots × slot_seconds 초 동안의 소요 시간 분포
+
+    시간 슬롯마다 버킷 카운트를 따로 두고, 오래된 슬롯은 다시 쓸 때 비운다.
+    전체 누적 버킷/횟수/합계는 슬롯과 별도로 유지한다 (메트릭 내보내기용).
+    """
+
+    def __init__(self, slot_seconds: float = 10.0, slots: int = 30):
+        self.slot_seconds = slot_seconds
+        self.slots = max(1, slots)
+        self.counts = [[0] * (len(BUCKET_BOUNDS) + 1) for _ in range(self.slots)]
+        self.slot_ids = [-1] * self.slots
+        self.slot_totals = [0.0] * self.slots
+        self.slot_max = [0.0] * self.slots
+        self.lifetime_buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.lifetime_count = 0
+        self.lifetime_total = 0.0
+
+    def add(self, seconds: float, now: float):
+        slot_id = int(now / self.slot_seconds)
+        index = slot_id % self.slots
+        if self.slot_ids[index] != slot_id:
+            self.slot_ids[index] = slot_id
+            self.counts[index] = [0] * (len(BUCKET_BOUNDS) + 1)
+            self.slot_totals[index] = 0.0
+            self.slot_max[index] = 0.0
+
+        bucket = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        self.counts[index][bucket] += 1
+        self.lifetime_buckets[bucket] += 1
+        self.slot_totals[index] += seconds
+        if seconds > self.slot_max[index]:
+            self.slot_max[index] = seconds
+        self.lifetime_count += 1
+        self.lifetime_total += seconds
+
+    def summary(self, now: float) -> Optional[Dict[str, float]]:
+        """최근 구간 통계 (기록이 없으면 None)"""
+        oldest = int(now / self.slot_seconds) - self.slots + 1
+        merged = [0] * (len(BUCKET_BOUNDS) + 1)
+        total = 0.0
+        maximum = 0.0
+        for index, slot_id in enumerate(self.slot_ids):
+            if slot_id < oldest:
+                continue
+            for bucket, count in enumerate(self.counts[index]):
+                merged[bucket] += count
+            total += self.slot_totals[index]
+            maximum = max(maximum, self.slot_max[index])
+
+        count = sum(merged)
+        if count == 0:
+            return None
+        return {
+            "count": count,
+            "total": total,
+            "mean": total / count,
+            "p50": self.percentile(merged, count, 0.50, maximum),
+            "p95": self.percentile(merged, count, 0.95, maximum),
+            "p99": self.percentile(merged, count, 0.99, maximum),
+            "max": maximum,
+            "lifetime_count": self.lifetime_count,
+            "lifetime_total": self.lifetime_total,
+            "buckets": merged
+        }
+
+    @staticmethod
+    def percentile(counts: List[int], total: int, ratio: float, maximum: float) -> float:
+        """버킷 분포의 백분위 (버킷 안에서는 기하 평균 위치로 추정, 최대값을 넘지 않음)"""
+        target = max(1, math.ceil(total * ratio))
+        seen = 0
+        for bucket, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                if bucket == 0:
+                    return min(BUCKET_BOUNDS[0], maximum)
+                if bucket >= len(BUCKET_BOUNDS):
+                    return maximum
+                return min(math.sqrt(BUCKET_BOUNDS[bucket - 1] * BUCKET_BOUNDS[bucket]), maximum)
+        return maximum
+
+
+class PhaseSpan:
+    """with 블록 하나의 소요 시간 측정"""
+
+    __slots__ = ("timer", "phase", "started")
+
+    def __init__(self, timer: "PhaseTimer", phase: str):
+        self.timer = timer
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.record(self.phase, time.perf_counter() - self.started)
+        return False
+
+
+class PhaseTimer:
+    """구간 이름별 롤링 히스토그램 모음 (여러 스레드에서 기록 가능)
+
+    사용법:
+        with timer.measure("capture"):
+            frame = grab()
+        timer.record("click", elapsed)
+    """
+
+    def __init__(self, window: float = 300.0, slots: int = 30, enabled: bool = True):
+        self.slot_seconds = max(0.1, window / max(1, slots))
+        self.slots = max(1, slots)
+        self.enabled = enabled
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    @property
+    def window(self) -> float:
+        return self.slot_seconds * self.slots
+
+    def measure(self, phase: str) -> PhaseSpan:
+        return PhaseSpan(self, phase)
+
+    def record(self, phase: str, seconds: float):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self.lock:
+            histogram = self.histograms.get(phase)
+            if histogram is None:
+                histogram = self.histograms[phase] = RollingHistogram(self.slot_seconds, self.slots)
+            histogram.add(seconds, now)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """구간별 최근 통계 (최근 합계가 큰 순)"""
+        now = time.time()
+        with self.lock:
+            summaries = {phase: histogram.summary(now) for phase, histogram in self.histograms.items()}
+        summaries = {phase: s for phase, s in summaries.items() if s is not None}
+        return dict(sorted(summaries.items(), key=lambda item: item[1]["total"], reverse=True))
+
+    def cumulative(self) -> Dict[str, Tuple[List[int], int, float]]:
+        """구간별 전체 누적 (버킷별 횟수, 횟수, 합계) - 단조 증가 카운터"""
+        with self.lock:
+            return {phase: (list(h.lifetime_buckets), h.lifetime_count, h.lifetime_total)
+                    for phase, h in self.histograms.items()}
+
+    def report_lines(self, limit: int = 20) -> List[str]:
+        """통계 화면용 표 (ms 단위)"""
+        summaries = self.summary()
+        if not summaries:
+            return []
+
+        # 중첩된 구간(예: cycle 안의 detect) 이 있으므로 비중은 최상위 구간 합계가 아닌 측정 시간 대비
+        elapsed = min(self.window, time.time() - self.started_at)
+        lines = [f"   {'구간':<24}{'횟수':>7}{'평균':>9}{'p50':>9}{'p95':>9}{'최대':>9}{'시간 비중':>10}"]
+        for phase, s in list(summaries.items())[:limit]:
+            share = s["total"] / elapsed * 100 if elapsed > 0 else 0.0
+            lines.append(f"   {phase:<24}{s['count']:>7}{s['mean'] * 1000:>9.1f}{s['p50'] * 1000:>9.1f}"
+                         f"{s['p95'] * 1000:>9.1f}{s['max'] * 1000:>9.1f}{share:>9.1f}%")
+        return lines
+
+    def dump(self, path: Path):
+        """현재 통계를 JSON 파일로 저장"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "window_seconds": self.window,
+                "bucket_bounds": BUCKET_BOUNDS,  # buckets[i] 는 bounds[i-1] < t <= bounds[i] 인 횟수
+                "phases": self.summary()
+            }, f, ensure_ascii=False, indent=2)
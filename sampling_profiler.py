@@ -0,0 +1,134 @@
+"""
+Seven Knights 매크로 샘플링 프로파일러
+별도 스레드가 일정 간격으로 sys._current_frames() 를 읽어 스레드별 호출 스택을
+세고, flamegraph.pl / speedscope 에서 바로 열 수 있는 collapsed stack 형식
+("스레드;바깥 함수;...;안쪽 함수 횟수") 으로 저장한다.
+
+대상 코드를 계측하지 않으므로 매크로 루프의 속도는 거의 그대로이고,
+샘플 간격(기본 5ms)마다 스택을 한 번 훑는 비용만 든다.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class SamplingProfiler:
+    """주기적 스택 샘플링 프로파일러 (자기 자신을 제외한 모든 스레드)"""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.frame_labels: Dict[Tuple[str, int, str], str] = {}  # 코드 객체별 라벨 캐시
+
+    def start(self):
+        """샘플링 시작"""
+        if self.thread is not None:
+            return
+        self.running = True
+        self.started_at = time.time()
+        self.thread = threading.Thread(target=self.sample_loop, name="SamplingProfiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """샘플링 종료"""
+        if self.thread is None:
+            return
+        self.running = False
+        self.thread.join(timeout=2)
+        self.thread = None
+        self.stopped_at = time.time()
+
+    def sample_loop(self):
+        own_id = threading.get_ident()
+        while self.running:
+            started = time.perf_counter()
+            self.take_sample(own_id)
+            remaining = self.interval - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def take_sample(self, own_id: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack: List[str] = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self.label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def label(self, frame) -> str:
+        code = frame.f_code
+        key = (code.co_filename, code.co_firstlineno, code.co_name)
+        label = self.frame_labels.get(key)
+        if label is None:
+            # collapsed 형식에서 ';' 와 공백은 구분자이므로 쓰지 않음
+            label = f"{code.co_name}({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            label = label.replace(";", ":").replace(" ", "_")
+            self.frame_labels[key] = label
+        return label
+
+    def write_collapsed(self, path: Path):
+        """collapsed stack 파일 저장 (flamegraph.pl path > out.svg)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, limit: int = 15, thread_filter: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        """(함수, 자기 시간 샘플, 포함 시간 샘플) - 포함 시간 순"""
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            if thread_filter is not None and frames[0] != thread_filter:
+                continue
+            own[frames[-1]] += count
+            for name in set(frames[1:]):
+                inclusive[name] += count
+        return [(name, own[name], count) for name, count in inclusive.most_common(limit)]
+
+    def report_lines(self, limit: int = 10) -> List[str]:
+        """콘솔 요약 (스레드별, 해당 스레드 샘플 대비 비율)
+
+        샘플의 대부분이 같은 스택인 스레드(대기만 하는 스레드)는 생략한다.
+        """
+        duration = (self.stopped_at or time.time()) - self.started_at
+        lines = [f"🔬 샘플 {self.samples}회 ({duration:.1f}초, 간격 {self.interval * 1000:.0f}ms)"]
+
+        per_thread = Counter()
+        busiest = Counter()
+        for stack, count in self.stacks.items():
+            thread = stack.split(";", 1)[0]
+            per_thread[thread] += count
+            busiest[thread] = max(busiest[thread], count)
+
+        for thread, total in per_thread.most_common():
+            if busiest[thread] >= total * 0.95:
+                continue
+            lines.append(f"🧵 {thread} ({total}샘플)")
+            lines.append(f"   {'포함':>7}{'자기':>7}  함수")
+            shown = 0
+            for name, own, inclusive in self.top_functions(limit * 3, thread_filter=thread):
+                if "(threading.py:" in name:
+                    continue
+                lines.append(f"   {inclusive / total * 100:>6.1f}%{own / total * 100:>6.1f}%  {name}")
+                shown += 1
+                if shown >= limit:
+                    break
+        return lines
@@ -0,0 +1,141 @@
+"""
+Seven Knights 매크로 스크린샷 저장소
+오류/타임아웃 스크린샷을 썸네일의 지각 해시(dHash)로 구분해 저장한다.
+매크로가 같은 화면에 멈춰 있으면 같은 프레임이 계속 저장되므로, window 초 안에
+해밍 거리 max_distance 이하인 화면이 이미 저장돼 있으면 새 PNG 를 쓰지 않고
+기존 항목의 참조 횟수만 늘린다. 해시가 완전히 같은 파일은 시간과 상관없이 재사용한다.
+중복 제거는 실패가 반복될 때 찍히는 사유(DEDUP_REASONS)에만 적용하고, 수동(F12) 등
+나머지 사유는 항상 현재 화면을 새 파일로 저장한다.
+
+    logs/screenshots/shot_<해시>.png   # 화면별 PNG 한 장
+    logs/screenshots/<사유>_<시각>.png  # 중복 제거하지 않는 사유의 스크린샷
+    logs/screenshots/index.jsonl       # 촬영마다 한 줄 (시각, 사유, 해시, 파일, 참조 횟수)
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+HASH_MARGIN = 2  # 이웃 픽셀 밝기 차이가 이보다 커야 비트 1
+
+# 매크로가 같은 화면에 멈췄을 때 반복해서 찍히는 사유 (OCR 실패, 사이클 오류, 상태 타임아웃)
+DEDUP_REASONS = ("ocr_failure", "cycle_error", "state_timeout")
+
+
+@dataclass
+class ScreenshotEntry:
+    """저장된 화면 하나"""
+    hash: int
+    path: Path
+    count: int
+    first_seen: float
+    last_seen: float
+
+
+class ScreenshotStore:
+    """지각 해시 기반 스크린샷 저장소 (중복 화면은 참조 횟수로 기록)"""
+
+    def __init__(self, root: Path, window: float = 600.0, max_distance: int = 10, hash_size: int = 16):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.jsonl"
+        self.window = window
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.lock = threading.Lock()
+        self.entries: Dict[int, ScreenshotEntry] = {}
+
+        # 통계
+        self.saved = 0
+        self.duplicates = 0
+
+    def perceptual_hash(self, image: np.ndarray) -> int:
+        """dHash: (hash_size+1)×hash_size 흑백 썸네일에서 가로로 이웃한 픽셀의 밝기 비교
+
+        단색 영역에서는 노이즈로 비트가 뒤집히지 않도록 HASH_MARGIN 이상 밝을 때만 1 로 본다.
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        thumb = cv2.resize(gray, (self.hash_size + 1, self.hash_size), interpolation=cv2.INTER_AREA).astype(np.int16)
+        bits = (thumb[:, 1:] - thumb[:, :-1] > HASH_MARGIN).flatten()
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+    def find_similar(self, image_hash: int, now: float) -> Optional[ScreenshotEntry]:
+        """같은 해시, 또는 window 안에 본 비슷한 화면 중 가장 가까운 항목"""
+        entry = self.entries.get(image_hash)
+        if entry is not None and entry.path.exists():
+            return entry
+
+        best = None
+        best_distance = self.max_distance + 1
+        for entry in self.entries.values():
+            if now - entry.last_seen > self.window:
+                continue
+            distance = bin(entry.hash ^ image_hash).count("1")
+            if distance < best_distance and entry.path.exists():
+                best, best_distance = entry, distance
+        return best
+
+    def save(self, image: np.ndarray, reason: str = "manual") -> Tuple[ScreenshotEntry, bool]:
+        """화면 저장 (비슷한 화면이 있으면 참조 횟수만 증가) - (해당 화면 항목, 중복 여부) 반환
+
+        DEDUP_REASONS 에 없는 사유는 비교하지 않고 항상 새 파일로 저장한다.
+        """
+        now = time.time()
+        image_hash = self.perceptual_hash(image)
+        hex_hash = f"{image_hash:0{self.hash_size * self.hash_size // 4}x}"
+        with self.lock:
+            if reason not in DEDUP_REASONS:
+                stamp = datetime.fromtimestamp(now).strftime('%Y%m%d_%H%M%S_%f')
+                entry = ScreenshotEntry(image_hash, self.root / f"{reason}_{stamp}.png", 1, now, now)
+                cv2.imwrite(str(entry.path), image)
+                self.saved += 1
+                self.append_index(now, reason, hex_hash, entry, False)
+                return entry, False
+
+            entry = self.find_similar(image_hash, now)
+            duplicate = entry is not None
+            if duplicate:
+                entry.count += 1
+                entry.last_seen = now
+                self.duplicates += 1
+            else:
+                path = self.root / f"shot_{hex_hash}.png"
+                if path.exists():
+                    # 이전 실행에서 저장한 같은 화면
+                    duplicate = True
+                    self.duplicates += 1
+                else:
+                    cv2.imwrite(str(path), image)
+                    self.saved += 1
+                entry = ScreenshotEntry(image_hash, path, 1, now, now)
+                self.entries[image_hash] = entry
+            self.expire(now)
+            self.append_index(now, reason, hex_hash, entry, duplicate)
+        return entry, duplicate
+
+    def append_index(self, now: float, reason: str, hex_hash: str, entry: ScreenshotEntry, duplicate: bool):
+        """촬영 기록 한 줄 추가 (lock 을 잡은 상태에서 호출)"""
+        record = {
+            "t": datetime.fromtimestamp(now).isoformat(timespec="milliseconds"),
+            "reason": reason,
+            "hash": hex_hash,
+            "file": entry.path.name,
+            "count": entry.count,
+            "duplicate": duplicate
+        }
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def expire(self, now: float):
+        """window 가 지난 항목은 비교 대상에서 제외 (파일은 남겨 두고 메모리만 정리)"""
+        if len(self.entries) < 256:
+            return
+        for image_hash in [h for h, entry in self.entries.items() if now - entry.last_seen > self.window]:
+            del self.entries[image_hash]
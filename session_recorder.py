@@ -0,0 +1,287 @@
+"""
+Seven Knights 매크로 세션 녹화 모듈
+매크로가 본 화면을 축소 프레임 + 원본 키프레임으로 청크 단위 .npy (메모리 맵) 에
+기록하고, 시각/감지 상태/신뢰도/클릭을 청크별 JSON Lines 인덱스에 남긴다.
+디스크 예산을 넘으면 가장 오래된 청크부터 삭제한다.
+
+세션 디렉토리 구조:
+    logs/recordings/session_YYYYmmdd_HHMMSS/
+        meta.json                  세션 정보 (축소 비율 등)
+        chunk_000001_frames.npy    축소 프레임 (N, h, w, 3) uint8
+        chunk_000001_keys.npy      원본 키프레임 (K, H, W, 3) uint8
+        chunk_000001.jsonl         인덱스 (프레임/클릭 이벤트)
+"""
+
+import json
+import logging
+import queue
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from game_state import GameState
+
+
+class RecordingChunk:
+    """프레임 청크 하나 (미리 할당한 .npy 메모리 맵 + 인덱스 파일)"""
+
+    def __init__(self, session_dir: Path, number: int, thumb_shape: Tuple[int, ...],
+                 key_shape: Tuple[int, ...], capacity: int, key_capacity: int):
+        self.session_dir = session_dir
+        self.number = number
+        self.name = f"chunk_{number:06d}"
+        self.thumb_shape = thumb_shape
+        self.key_shape = key_shape
+        self.capacity = capacity
+        self.key_capacity = key_capacity
+        self.frame_count = 0
+        self.key_count = 0
+
+        self.frames = np.lib.format.open_memmap(self.frames_path, mode='w+', dtype=np.uint8,
+                                                shape=(capacity,) + thumb_shape)
+        self.keys = None  # 키프레임은 처음 필요할 때 할당
+        self.index_file = open(self.index_path, 'w', encoding='utf-8')
+
+    @property
+    def frames_path(self) -> Path:
+        return self.session_dir / f"{self.name}_frames.npy"
+
+    @property
+    def keys_path(self) -> Path:
+        return self.session_dir / f"{self.name}_keys.npy"
+
+    @property
+    def index_path(self) -> Path:
+        return self.session_dir / f"{self.name}.jsonl"
+
+    def is_full(self) -> bool:
+        return self.frame_count >= self.capacity
+
+    def can_add_keyframe(self, shape: Tuple[int, ...]) -> bool:
+        return shape == self.key_shape and self.key_count < self.key_capacity
+
+    def add_frame(self, thumb: np.ndarray) -> int:
+        slot = self.frame_count
+        self.frames[slot] = thumb
+        self.frame_count += 1
+        return slot
+
+    def add_keyframe(self, frame: np.ndarray) -> int:
+        if self.keys is None:
+            self.keys = np.lib.format.open_memmap(self.keys_path, mode='w+', dtype=np.uint8,
+                                                  shape=(self.key_capacity,) + self.key_shape)
+        slot = self.key_count
+        self.keys[slot] = frame
+        self.key_count += 1
+        return slot
+
+    def write_index(self, entry: Dict):
+        self.index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def close(self):
+        """청크 마감 (다 채우지 못한 배열은 실제 기록된 부분만 남김)"""
+        self.index_file.close()
+
+        frames_used = self.used_part(self.frames, self.frame_count)
+        keys_used = self.used_part(self.keys, self.key_count)
+        # 메모리 맵을 먼저 해제해야 같은 파일을 덮어쓸 수 있음 (Windows)
+        self.frames = None
+        self.keys = None
+        if frames_used is not None:
+            np.save(self.frames_path, frames_used)
+        if keys_used is not None:
+            np.save(self.keys_path, keys_used)
+
+    @staticmethod
+    def used_part(array: Optional[np.memmap], count: int) -> Optional[np.ndarray]:
+        """기록된 부분 복사본 (배열을 다 채웠거나 없으면 None)"""
+        if array is None:
+            return None
+        array.flush()
+        if count >= array.shape[0]:
+            return None
+        return np.array(array[:count])
+
+
+class SessionRecorder:
+    """상시 켜 둘 수 있는 세션 녹화기
+
+    record_frame / record_click 은 큐에 넣기만 하고 바로 반환한다. 축소와
+    디스크 기록은 별도 스레드에서 하며, 큐가 가득 차면 프레임을 버린다.
+    프레임은 record_fps 이하로만 기록하되 상태가 바뀐 프레임은 항상 기록하고,
+    상태 변화 시점과 keyframe_interval 마다 원본 해상도 키프레임을 남긴다.
+    """
+
+    def __init__(self, root: Path, scale: float = 0.25, record_fps: float = 2.0,
+                 keyframe_interval: float = 30.0, chunk_frames: int = 240, chunk_keyframes: int = 8,
+                 max_bytes: int = 1024 * 1024 * 1024, queue_size: int = 8):
+        self.root = Path(root)
+        self.scale = scale
+        self.min_interval = 1.0 / record_fps if record_fps > 0 else 0.0
+        self.keyframe_interval = keyframe_interval
+        self.chunk_frames = max(1, chunk_frames)
+        self.chunk_keyframes = max(1, chunk_keyframes)
+        self.max_bytes = max_bytes
+        self.queue: "queue.Queue[Optional[Tuple]]" = queue.Queue(maxsize=queue_size)
+        self.logger = logging.getLogger(__name__)
+
+        self.session_dir: Optional[Path] = None
+        self.chunk: Optional[RecordingChunk] = None
+        self.chunk_number = 0
+        self.thread: Optional[threading.Thread] = None
+
+        # 호출 스레드에서만 쓰는 샘플링 상태
+        self.last_frame_time = 0.0
+        self.last_keyframe_time = 0.0
+        self.last_state: Optional[GameState] = None
+
+        # 통계
+        self.frames_recorded = 0
+        self.keyframes_recorded = 0
+        self.frames_dropped = 0
+        self.chunks_rotated = 0
+
+    # ------------------------------------------------------------------
+    # 호출 스레드 API
+    # ------------------------------------------------------------------
+    def start(self):
+        """새 세션 디렉토리를 만들고 기록 스레드 시작"""
+        self.session_dir = self.root / datetime.now().strftime("session_%Y%m%d_%H%M%S")
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.session_dir / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(),
+                "scale": self.scale,
+                "chunk_frames": self.chunk_frames,
+                "chunk_keyframes": self.chunk_keyframes
+            }, f, ensure_ascii=False, indent=2)
+
+        self.thread = threading.Thread(target=self.writer_loop, name="SessionRecorder", daemon=True)
+        self.thread.start()
+        self.logger.info(f"🎞️  세션 녹화 시작: {self.session_dir}")
+
+    def stop(self):
+        """남은 기록을 마치고 현재 청크를 마감"""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+        self.thread = None
+        self.logger.info(f"🎞️  세션 녹화 종료 (프레임 {self.frames_recorded}, 키프레임 {self.keyframes_recorded}, "
+                         f"버림 {self.frames_dropped}, 회전 {self.chunks_rotated})")
+
+    def record_frame(self, frame: Optional[np.ndarray], timestamp: float, state: GameState,
+                     confidences: Dict[GameState, float]):
+        """감지에 사용한 프레임 기록 (frame 은 이후 수정되지 않는 배열이어야 함)"""
+        if frame is None or self.thread is None:
+            return
+
+        state_changed = state != self.last_state
+        if not state_changed and timestamp - self.last_frame_time < self.min_interval:
+            return
+
+        keyframe = state_changed or timestamp - self.last_keyframe_time >= self.keyframe_interval
+        entry = {
+            "t": round(timestamp, 3),
+            "state": state.value,
+            "conf": {s.value: round(float(c), 3) for s, c in confidences.items()}
+        }
+        if self.enqueue(('frame', frame, keyframe, entry)):
+            self.last_frame_time = timestamp
+            self.last_state = state
+            if keyframe:
+                self.last_keyframe_time = timestamp
+
+    def record_click(self, x: int, y: int, timestamp: float):
+        """클릭 기록 (원본 화면 좌표)"""
+        if self.thread is None:
+            return
+        self.enqueue(('click', None, False, {"t": round(timestamp, 3), "click": [int(x), int(y)]}))
+
+    def enqueue(self, item: Tuple) -> bool:
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    # ------------------------------------------------------------------
+    # 기록 스레드
+    # ------------------------------------------------------------------
+    def writer_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                kind, frame, keyframe, entry = item
+                if kind == 'frame':
+                    self.write_frame(frame, keyframe, entry)
+                elif self.chunk is not None:
+                    self.chunk.write_index(entry)
+            except Exception as e:
+                self.logger.error(f"세션 녹화 오류: {e}")
+
+        self.close_chunk()
+
+    def write_frame(self, frame: np.ndarray, keyframe: bool, entry: Dict):
+        h, w = frame.shape[:2]
+        thumb_size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        thumb = cv2.resize(frame, thumb_size, interpolation=cv2.INTER_AREA)
+
+        chunk = self.chunk
+        if chunk is None or chunk.is_full() or chunk.thumb_shape != thumb.shape or \
+                (keyframe and not chunk.can_add_keyframe(frame.shape)):
+            chunk = self.open_chunk(thumb.shape, frame.shape)
+
+        entry["frame"] = chunk.add_frame(thumb)
+        self.frames_recorded += 1
+        if keyframe:
+            entry["key"] = chunk.add_keyframe(frame)
+            self.keyframes_recorded += 1
+        chunk.write_index(entry)
+
+    def open_chunk(self, thumb_shape: Tuple[int, ...], key_shape: Tuple[int, ...]) -> RecordingChunk:
+        self.close_chunk()
+        self.chunk_number += 1
+        self.chunk = RecordingChunk(self.session_dir, self.chunk_number, thumb_shape, key_shape,
+                                    self.chunk_frames, self.chunk_keyframes)
+        self.enforce_budget()
+        return self.chunk
+
+    def close_chunk(self):
+        if self.chunk is not None:
+            self.chunk.close()
+            self.chunk = None
+
+    def enforce_budget(self):
+        """녹화 디렉토리 전체가 디스크 예산을 넘으면 가장 오래된 청크부터 삭제"""
+        chunks = {}
+        total = 0
+        for path in self.root.glob("session_*/chunk_*"):
+            size = path.stat().st_size
+            total += size
+            key = (path.parent.name, path.name[:len("chunk_000000")])
+            chunks[key] = chunks.get(key, 0) + size
+
+        current = (self.session_dir.name, self.chunk.name) if self.chunk is not None else None
+        for key in sorted(chunks):
+            if total <= self.max_bytes:
+                break
+            if key == current:
+                continue
+            session_dir = self.root / key[0]
+            for path in session_dir.glob(f"{key[1]}*"):
+                path.unlink()
+            total -= chunks[key]
+            self.chunks_rotated += 1
+
+            # 청크가 모두 지워진 이전 세션은 디렉토리째 삭제
+            if session_dir != self.session_dir and not any(session_dir.glob("chunk_*")):
+                shutil.rmtree(session_dir, ignore_errors=True)
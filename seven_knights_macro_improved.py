@@ -1,47 +1,59 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import time
+STARTUP_STARTED = time.perf_counter()  # --benchmark-startup 기준 시각 (무거운 임포트 전)
+
 import cv2
 import numpy as np
-import pyautogui
-import time
 import os
 import sys
 import json
 import logging
+import argparse
 from datetime import datetime
 from pathlib import Path
-from enum import Enum
-import keyboard
 import mss
-from PIL import Image
 import threading
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple, Any, Set
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Any, Set, Callable
 import re
 import shutil
+from collections import deque
+
+from game_state import GameState
+from frame_capture import CaptureThread
+from session_recorder import SessionRecorder
+from phase_timing import PhaseTimer
+from sampling_profiler import SamplingProfiler
+from macro_logging import configure_logging, log_extra
+from disk_janitor import DiskJanitor
+from screenshot_store import ScreenshotStore
+from lazy_import import LazyModule, preload
+from startup_cache import ArrayCache
+from monitor_detection import MonitorScanner
+from window_locator import GameWindowLocator, GameWindowTracker
+from template_normalization import TemplateNormalizer
+from detection_pool import match_template
+
+if TYPE_CHECKING:
+    # 엔진/메트릭 서버는 사용할 때 임포트 (asyncio, http.server 임포트 시간 절약)
+    from macro_pipeline import PipelinedMacroEngine
+    from macro_async import AsyncMacroRuntime
+
 
-# OCR 라이브러리 임포트 (선택적)
-try:
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-    print("⚠️  pytesseract를 설치하면 층수 인식 기능을 사용할 수 있습니다.")
-    print("   pip install pytesseract 설치 후 tesseract 바이너리를 설치하세요.")
+def configure_pyautogui(module):
+    """pyautogui 안전 설정"""
+    module.FAILSAFE = True
+    module.PAUSE = 0.1
 
-# 안전 설정
-pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.1
 
-class GameState(Enum):
-    """게임 상태 열거형"""
-    WAITING = "waiting"           # 무한의 탑 대기 화면
-    TEAM_FORMATION = "formation"  # 팀 편성 화면
-    BATTLE = "battle"            # 전투 중
-    VICTORY = "victory"          # 승리 화면
-    DEFEAT = "defeat"            # 패배 화면
-    UNKNOWN = "unknown"          # 알 수 없는 상태
+# 임포트가 느리거나 없을 수 있는 라이브러리는 처음 사용할 때 임포트
+# (OCR: pytesseract, 입력: 디스플레이가 없는 헤드리스 리플레이 환경에서는 없을 수 있음)
+pytesseract = LazyModule("pytesseract")
+pyautogui = LazyModule("pyautogui", on_import=configure_pyautogui)
+keyboard = LazyModule("keyboard")
+Image = LazyModule("PIL.Image")
 
 @dataclass
 class FloorProgress:
@@ -73,6 +85,7 @@ class GameFlowStats:
     max_floor_reached: int = 0
     floor_progress: Dict[int, FloorProgress] = field(default_factory=dict)
     screenshots_taken: Set[int] = field(default_factory=set)
+    state_dwell: Dict[GameState, float] = field(default_factory=dict)  # 상태별 누적 체류 시간 (지난 상태만)
     
     def get_success_rate(self) -> float:
         """승률 계산"""
@@ -86,21 +99,407 @@ class GameFlowStats:
             return 0.0
         return time.time() - self.start_time
     
+    def get_floors_per_hour(self) -> float:
+        """시간당 승리(층) 수"""
+        runtime = self.get_runtime()
+        if runtime <= 0:
+            return 0.0
+        return self.victories / runtime * 3600
+    
     def get_transition_rate(self) -> float:
         """상태 전환 성공률"""
         if self.state_detection_attempts == 0:
             return 0.0
         return (self.successful_transitions / self.state_detection_attempts) * 100
 
+class StateVoter:
+    """다중 프레임 투표 + 히스테리시스 상태 결정기
+
+    프레임마다 진입 임계값을 넘는 최고 신뢰도 상태에 한 표를 주고, 최근
+    window 프레임 중 required 표 이상을 얻은 상태만 인정한다. 인정된 상태는
+    해제 임계값 아래로 떨어진 프레임이 required 개 쌓일 때까지 유지된다.
+    """
+    
+    def __init__(self, window: int = 3, required: int = 2,
+                 enter_thresholds: Optional[Dict[GameState, float]] = None,
+                 exit_thresholds: Optional[Dict[GameState, float]] = None,
+                 instant_confidence: float = 0.9):
+        self.window = max(1, window)
+        self.required = max(1, min(required, self.window))
+        self.enter_thresholds = enter_thresholds or {}
+        self.exit_thresholds = exit_thresholds or {}
+        self.instant_confidence = instant_confidence
+        self.votes = deque(maxlen=self.window)   # 프레임별 후보 상태
+        self.holds = deque(maxlen=self.window)   # 프레임별 해제 임계값 이상 상태
+        self.stable_state = GameState.UNKNOWN
+        self.stable_confidence = 0.0
+    
+    def reset(self):
+        """투표 기록 초기화"""
+        self.votes.clear()
+        self.holds.clear()
+        self.stable_state = GameState.UNKNOWN
+        self.stable_confidence = 0.0
+    
+    def update(self, state_confidences: Dict[GameState, float]) -> Tuple[GameState, float]:
+        """새 프레임의 상태별 신뢰도를 반영하고 인정된 상태 반환"""
+        candidate = GameState.UNKNOWN
+        candidate_confidence = 0.0
+        holding = set()
+        
+        for state, confidence in state_confidences.items():
+            if confidence >= self.exit_thresholds.get(state, 0.4):
+                holding.add(state)
+            if confidence >= self.enter_thresholds.get(state, 0.5) and confidence > candidate_confidence:
+                candidate = state
+                candidate_confidence = confidence
+        
+        self.votes.append(candidate)
+        self.holds.append(holding)
+        
+        if candidate != GameState.UNKNOWN and candidate != self.stable_state:
+            # 아주 확실한 프레임은 바로 인정, 아니면 N-of-M 투표
+            if (candidate_confidence >= self.instant_confidence or
+                    self.votes.count(candidate) >= self.required):
+                self.stable_state = candidate
+                self.stable_confidence = candidate_confidence
+                # 전환 이전 프레임은 해제 판정에 쓰지 않음
+                self.holds.clear()
+                self.holds.append(holding)
+                return self.stable_state, self.stable_confidence
+        
+        if self.stable_state != GameState.UNKNOWN:
+            misses = sum(1 for states in self.holds if self.stable_state not in states)
+            if misses >= self.required:
+                self.stable_state = GameState.UNKNOWN
+                self.stable_confidence = 0.0
+            elif self.stable_state in holding:
+                self.stable_confidence = state_confidences[self.stable_state]
+        
+        return self.stable_state, self.stable_confidence
+
+class ScreenClassifier:
+    """전체 화면 썸네일 기반 상태 사전 분류기
+
+    화면마다 전체 색상 배치가 크게 다르다는 점을 이용해 작은 썸네일의
+    HSV 히스토그램과 dHash 로 기준 화면과의 거리를 계산한다. 템플릿 매칭은
+    분류 결과를 확인하고 버튼 위치를 찾을 때만 사용한다.
+    """
+    
+    THUMBNAIL_SIZE = (64, 36)
+    
+    def __init__(self, max_distance: float = 0.35, min_margin: float = 0.1):
+        self.max_distance = max_distance
+        self.min_margin = min_margin
+        self.references: List[Tuple[GameState, np.ndarray, np.ndarray]] = []
+        self.learned_references: List[Tuple[GameState, np.ndarray, np.ndarray]] = []  # 실행 중 학습
+    
+    @classmethod
+    def compute_signature(cls, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """썸네일 히스토그램 + dHash 계산"""
+        # 먼저 픽셀을 건너뛰어 줄인 뒤 리사이즈 (전체 해상도 연산 회피)
+        step = max(1, min(frame.shape[0] // (cls.THUMBNAIL_SIZE[1] * 4),
+                          frame.shape[1] // (cls.THUMBNAIL_SIZE[0] * 4)))
+        small = cv2.resize(frame[::step, ::step], cls.THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1, 2], None, [8, 4, 4], [0, 180, 0, 256, 0, 256])
+        cv2.normalize(hist, hist, 1, 0, cv2.NORM_L1)
+        
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        dhash = (gray[:, 1:] > gray[:, :-1]).flatten()
+        
+        return hist, dhash
+    
+    @staticmethod
+    def signature_distance(sig_a: Tuple[np.ndarray, np.ndarray],
+                           sig_b: Tuple[np.ndarray, np.ndarray]) -> float:
+        """두 화면 시그니처 사이 거리 (0: 동일, 1: 완전히 다름)"""
+        hist_distance = cv2.compareHist(sig_a[0], sig_b[0], cv2.HISTCMP_BHATTACHARYYA)
+        hash_distance = np.count_nonzero(sig_a[1] != sig_b[1]) / sig_a[1].size
+        return 0.5 * hist_distance + 0.5 * hash_distance
+    
+    def add_reference(self, state: GameState, frame: np.ndarray):
+        """기준 화면 추가"""
+        hist, dhash = self.compute_signature(frame)
+        self.references.append((state, hist, dhash))
+    
+    def has_reference(self, state: GameState) -> bool:
+        """해당 상태의 기준 화면이 있는지 확인"""
+        return any(ref_state == state for ref_state, _, _ in self.references + self.learned_references)
+    
+    def classify(self, frame: np.ndarray) -> Tuple[GameState, float]:
+        """가장 가까운 기준 화면의 상태와 신뢰도 (1 - 거리) 반환"""
+        if not self.references and not self.learned_references:
+            return GameState.UNKNOWN, 0.0
+        
+        signature = self.compute_signature(frame)
+        
+        # 상태별 최소 거리
+        distances = {}
+        for state, hist, dhash in self.references + self.learned_references:
+            distance = self.signature_distance(signature, (hist, dhash))
+            if distance < distances.get(state, 1.0):
+                distances[state] = distance
+        
+        ranked = sorted(distances.items(), key=lambda item: item[1])
+        best_state, best_distance = ranked[0]
+        second_distance = ranked[1][1] if len(ranked) > 1 else 1.0
+        
+        if best_distance > self.max_distance or second_distance - best_distance < self.min_margin:
+            return GameState.UNKNOWN, float(1.0 - best_distance)
+        
+        return best_state, float(1.0 - best_distance)
+
+class BattleDetector:
+    """전투 화면 양성 판정용 시그니처 학습기
+
+    전투 화면은 스테이지마다 배경이 달라 고정 기준 화면을 두기 어렵다.
+    전투 시작 후 어떤 상태에도 해당하지 않는 프레임의 시그니처를 후보로 잡아 두고,
+    그 전투가 승리/패배로 끝났을 때만 전투 기준 화면으로 사전 분류기에 추가해
+    세션 간에 파일로 유지한다 (로딩 화면/팝업/연결 끊김 창을 전투로 굳히지 않도록).
+    """
+    
+    def __init__(self, classifier: Optional[ScreenClassifier], save_path: Path, max_signatures: int = 8,
+                 persist: bool = True, min_std: float = 10.0):
+        self.classifier = classifier
+        self.save_path = save_path
+        self.persist = persist  # False 면 학습 결과를 파일에 쓰지 않음 (리플레이)
+        self.max_signatures = max_signatures
+        self.min_std = min_std  # 밝기 표준편차가 이보다 낮은 프레임(검은 화면/단색 로딩)은 학습 안 함
+        self.signatures = deque(maxlen=max_signatures)
+        self.candidate = None  # 결과를 기다리는 전투 시그니처
+    
+    def propose(self, frame: np.ndarray) -> bool:
+        """전투 화면 후보 시그니처 기록 (메모리에만, confirm 해야 반영)"""
+        if self.classifier is None:
+            return False
+        
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if float(gray.std()) < self.min_std:
+            return False
+        
+        self.candidate = ScreenClassifier.compute_signature(frame)
+        return True
+    
+    def confirm(self) -> bool:
+        """전투가 승리/패배로 끝났을 때 후보를 전투 시그니처로 추가하고 저장"""
+        signature, self.candidate = self.candidate, None
+        if signature is None:
+            return False
+        
+        # 이미 알고 있는 전투 화면이면 추가하지 않음
+        for known in self.signatures:
+            if ScreenClassifier.signature_distance(signature, known) < self.classifier.max_distance / 2:
+                return True
+        
+        self.signatures.append(signature)
+        self.sync_classifier()
+        self.save()
+        logging.getLogger(__name__).info(f"⚔️  전투 화면 시그니처 학습 ({len(self.signatures)}/{self.max_signatures})")
+        return True
+    
+    def discard(self):
+        """전투 결과를 확인하지 못했으면 후보를 버림"""
+        self.candidate = None
+    
+    def sync_classifier(self):
+        """학습된 시그니처를 사전 분류기의 전투 기준 화면으로 반영"""
+        self.classifier.learned_references = [(GameState.BATTLE, hist, dhash) for hist, dhash in self.signatures]
+    
+    def save(self):
+        """시그니처 파일 저장"""
+        if not self.persist:
+            return
+        
+        try:
+            np.savez(self.save_path,
+                     hists=np.array([hist for hist, _ in self.signatures]),
+                     hashes=np.array([dhash for _, dhash in self.signatures]))
+        except Exception as e:
+            logging.getLogger(__name__).error(f"전투 시그니처 저장 실패: {e}")
+    
+    def load(self) -> int:
+        """시그니처 파일 로드"""
+        if self.classifier is None or not self.save_path.exists():
+            return 0
+        
+        try:
+            with np.load(self.save_path) as data:
+                for hist, dhash in zip(data['hists'], data['hashes']):
+                    self.signatures.append((hist.astype(np.float32), dhash.astype(bool)))
+        except Exception as e:
+            logging.getLogger(__name__).error(f"전투 시그니처 로드 실패: {e}")
+            return 0
+        
+        self.sync_classifier()
+        return len(self.signatures)
+
+class RoiHeatmap:
+    """템플릿별 발견 위치 히스토그램 (검색 영역 자동 학습)
+
+    성공한 매칭의 중심 좌표를 화면 비율 기준 격자에 누적하고, 누적된 셀의
+    범위로 좁은 검색 창을 만든다. 연속으로 놓치면 넓은 창, 전체 화면 순으로
+    검색 범위를 넓힌다. 비율 좌표라서 해상도가 바뀌어도 그대로 쓸 수 있다.
+    """
+    
+    GRID_SIZE = (32, 18)  # (가로, 세로) 셀 수
+    
+    def __init__(self, save_path: Path, min_samples: int = 3, misses_per_level: int = 2,
+                 save_every: int = 20, persist: bool = True):
+        self.save_path = save_path
+        self.persist = persist  # False 면 학습 결과를 파일에 쓰지 않음 (리플레이)
+        self.min_samples = min_samples
+        self.misses_per_level = misses_per_level
+        self.save_every = save_every
+        self.counts: Dict[str, np.ndarray] = {}
+        self.template_sizes: Dict[str, Tuple[int, int]] = {}
+        self.miss_streaks: Dict[str, int] = {}
+        self.unsaved_records = 0
+    
+    def record_hit(self, image_key: str, x: int, y: int, frame_shape: Tuple[int, ...],
+                   template_size: Tuple[int, int]):
+        """매칭 성공 위치 기록"""
+        grid_w, grid_h = self.GRID_SIZE
+        counts = self.counts.setdefault(image_key, np.zeros((grid_h, grid_w), dtype=np.int32))
+        
+        col = min(grid_w - 1, max(0, int(x / frame_shape[1] * grid_w)))
+        row = min(grid_h - 1, max(0, int(y / frame_shape[0] * grid_h)))
+        counts[row, col] += 1
+        
+        self.template_sizes[image_key] = template_size
+        self.miss_streaks[image_key] = 0
+        
+        self.unsaved_records += 1
+        if self.unsaved_records >= self.save_every:
+            self.save()
+    
+    def record_miss(self, image_key: str):
+        """매칭 실패 기록 (다음 검색 범위 확대)"""
+        self.miss_streaks[image_key] = self.miss_streaks.get(image_key, 0) + 1
+    
+    def search_window(self, image_key: str,
+                      frame_shape: Tuple[int, ...]) -> Optional[Tuple[int, int, int, int]]:
+        """다음 검색 창 (x0, y0, x1, y1) 반환, None 이면 전체 화면"""
+        counts = self.counts.get(image_key)
+        if counts is None or counts.sum() < self.min_samples:
+            return None
+        
+        # 0: 좁은 창, 1: 넓은 창, 2: 전체 화면 순으로 돌아가며 검색
+        streak = self.miss_streaks.get(image_key, 0)
+        level = (streak // self.misses_per_level) % 3
+        if level == 2:
+            return None
+        
+        # 잡음 수준의 셀은 제외하고 누적 범위 계산
+        rows, cols = np.nonzero(counts >= max(1, counts.sum() * 0.02))
+        grid_w, grid_h = self.GRID_SIZE
+        frame_h, frame_w = frame_shape[:2]
+        x0 = cols.min() / grid_w * frame_w
+        x1 = (cols.max() + 1) / grid_w * frame_w
+        y0 = rows.min() / grid_h * frame_h
+        y1 = (rows.max() + 1) / grid_h * frame_h
+        
+        # 템플릿 크기만큼 여유 (넓은 창은 추가로 영역 크기만큼 확장)
+        template_w, template_h = self.template_sizes.get(image_key, (0, 0))
+        pad_x = template_w * 0.6
+        pad_y = template_h * 0.6
+        if level == 1:
+            pad_x += (x1 - x0) + template_w
+            pad_y += (y1 - y0) + template_h
+        
+        return (max(0, int(x0 - pad_x)), max(0, int(y0 - pad_y)),
+                min(frame_w, int(x1 + pad_x)), min(frame_h, int(y1 + pad_y)))
+    
+    def save(self):
+        """히스토그램 파일 저장"""
+        if not self.counts or not self.persist:
+            return
+        
+        data = {
+            "grid": list(self.GRID_SIZE),
+            "templates": {
+                key: {
+                    "counts": counts.tolist(),
+                    "template_size": list(self.template_sizes.get(key, (0, 0)))
+                }
+                for key, counts in self.counts.items()
+            }
+        }
+        
+        try:
+            with open(self.save_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            self.unsaved_records = 0
+        except Exception as e:
+            logging.getLogger(__name__).error(f"ROI 히스토그램 저장 실패: {e}")
+    
+    def load(self) -> int:
+        """히스토그램 파일 로드 (격자 크기가 다르면 무시)"""
+        if not self.save_path.exists():
+            return 0
+        
+        try:
+            with open(self.save_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            if tuple(data.get("grid", [])) != self.GRID_SIZE:
+                return 0
+            
+            for key, entry in data.get("templates", {}).items():
+                self.counts[key] = np.array(entry["counts"], dtype=np.int32)
+                self.template_sizes[key] = tuple(entry.get("template_size", (0, 0)))
+                
+        except Exception as e:
+            logging.getLogger(__name__).error(f"ROI 히스토그램 로드 실패: {e}")
+            return 0
+        
+        return len(self.counts)
+
 class SevenKnightsTowerMacro:
     """Seven Knights 무한의 탑 매크로 시스템 - 개선된 버전"""
     
-    def __init__(self):
+    def __init__(self, frame_source: Optional[Callable[[], np.ndarray]] = None,
+                 input_backend: Optional[Any] = None, headless: bool = False):
+        """
+        frame_source: 화면 캡처 대신 프레임을 공급하는 함수 (리플레이/벤치마크)
+        input_backend: pyautogui 대신 click(x, y) 를 처리할 객체 (예: StubInput)
+        headless: 키보드 단축키, 진행 파일, 층수별 스크린샷을 사용하지 않음
+        """
+        self.headless = headless
+        self.input_backend = input_backend
+        self.sleep_scale = 1.0  # 대기 시간 배율 (리플레이에서는 0 으로 대기 생략)
+        self.startup_timings: List[Tuple[str, float]] = [("import", time.perf_counter() - STARTUP_STARTED)]
+        self.last_startup_mark = time.perf_counter()
+        self.ocr_warning_shown = False
+        self.template_cache_hit = False
+        self.reference_cache_hit = False
+        self.template_scale: Optional[Tuple[float, float]] = None  # 정규화 배율 (None 이면 여러 배율 탐색)
         self.setup_directories()
         self.setup_logging()
         self.load_config()
+        self.mark_startup("config")
+        
+        # 느린 선택 라이브러리는 나머지 초기화와 동시에 백그라운드에서 임포트
+        lazy_modules = [pytesseract, Image]
+        if input_backend is None:
+            lazy_modules.append(pyautogui)
+        if not headless:
+            lazy_modules.append(keyboard)
+        self.import_thread = preload(*lazy_modules)
+        
+        self.setup_phase_timer()
+        self.setup_screenshot_store()
         self.setup_images()
+        self.mark_startup("templates")
+        self.capture_thread: Optional[CaptureThread] = None
+        self.frame_source = frame_source  # 외부 프레임 공급 (리플레이/벤치마크 등)
+        self.session_recorder: Optional[SessionRecorder] = None  # 매크로 실행 중에만 설정
+        self.monitor_scan: Optional[threading.Thread] = None  # 모니터 자동 감지 (백그라운드)
+        self.window_tracker: Optional[GameWindowTracker] = None  # 게임 창 위치 재확인
         self.setup_screen_capture()
+        self.mark_startup("screen_capture")
         
         # 게임 상태 관리
         self.current_state = GameState.UNKNOWN
@@ -108,18 +507,37 @@ class SevenKnightsTowerMacro:
         self.last_state_change = time.time()
         self.state_timeout = 30  # 30초 상태 타임아웃
         self.state_detection_interval = 0.2  # 상태 감지 주기
+        self.last_state_confidences: Dict[GameState, float] = {}
+        self.click_latencies = deque(maxlen=500)  # 프레임 → 클릭 지연 (초)
         
         # 통계 및 제어
         self.stats = GameFlowStats()
         self.stats.start_time = time.time()
         self.running = False
         self.paused = False
+        self.async_runtime: Optional["AsyncMacroRuntime"] = None  # 비동기 엔진 실행 중일 때만 설정
+        self.pipeline_engine: Optional["PipelinedMacroEngine"] = None  # 파이프라인 엔진 실행 중일 때만 설정
+        self.profiler: Optional[SamplingProfiler] = None  # --profile 일 때 run_macro 마다 샘플링
+        self.max_cycles: Optional[int] = None  # 지정하면 해당 사이클 수만큼 실행 후 정지
+        self.cycles_completed = 0
+        
+        # 단축키 이벤트별 기본 처리 함수
+        self.hotkey_handlers = {
+            'pause': self.toggle_pause,
+            'toggle': self.toggle_macro,
+            'exit': self.stop_program,
+            'stats': self.show_stats,
+            'screenshot': self.take_screenshot
+        }
         
         # 키보드 단축키 설정
         self.setup_keyboard_shortcuts()
+        self.mark_startup("keyboard")
         
         # 진행 상태 로드
-        self.load_progress_from_md()
+        if not self.headless:
+            self.load_progress_from_md()
+        self.mark_startup("progress")
         
         # 매크로 설정
         self.match_threshold = 0.65  # 약간 낮춤 (더 민감하게)
@@ -136,12 +554,74 @@ class SevenKnightsTowerMacro:
             'lose_button': 0.7
         }
         
+        # 상태별 판정 이미지
+        self.state_images = {
+            GameState.WAITING: ['enter_button'],
+            GameState.TEAM_FORMATION: ['start_button'],
+            GameState.VICTORY: ['win_victory'],
+            GameState.DEFEAT: ['lose_button']
+        }
+        if 'battle_hud' in self.images:
+            self.state_images[GameState.BATTLE] = ['battle_hud']
+        
+        # 상태별 액션: (클릭할 이미지, 증가할 통계 항목, 클릭 후 상태)
+        self.state_actions = {
+            GameState.WAITING: ('enter_button', 'enters', GameState.TEAM_FORMATION),
+            GameState.TEAM_FORMATION: ('start_button', 'starts', GameState.BATTLE),
+            GameState.VICTORY: ('next_area', 'next_areas', GameState.TEAM_FORMATION),
+            GameState.DEFEAT: ('lose_button', 'retries', GameState.TEAM_FORMATION)
+        }
+        
+        # 전체 화면 사전 분류기 (기준 화면 로드) + 전투 화면 학습기
+        self.setup_screen_classifier()
+        self.setup_battle_detector()
+        self.mark_startup("classifier")
+        
+        # 다중 프레임 투표 + 히스테리시스 설정
+        self.setup_state_voter()
+        
+        # localhost 메트릭 서버 (헤드리스 PC 모니터링)
+        self.setup_metrics_server()
+        
+        # logs/ 와 screenshots/ 용량 관리
+        self.setup_disk_janitor()
+        self.mark_startup("services")
+        self.ready_at = time.perf_counter()
+        
         print("🏰 Seven Knights 무한의 탑 매크로 시스템 (개선된 버전) 초기화 완료")
         print("📋 게임 플로우: 어떤 상태든 자동으로 올바른 플로우 진행")
         print(f"📊 로드된 진행 상태: {len(self.stats.floor_progress)}개 층수")
         if self.stats.max_floor_reached > 0:
             print(f"🏆 최대 도달 층수: {self.stats.max_floor_reached}층")
     
+    def mark_startup(self, step: str):
+        """시작 단계별 소요 시간 기록 (직전 기록 이후 경과 시간)"""
+        now = time.perf_counter()
+        self.startup_timings.append((step, now - self.last_startup_mark))
+        self.last_startup_mark = now
+    
+    def report_startup(self, target: float = 1.0):
+        """--benchmark-startup: 준비 완료까지 걸린 시간과 단계별 소요 시간 출력"""
+        time_to_ready = self.ready_at - STARTUP_STARTED
+        self.wait_for_screen_setup()
+        screen_done = time.perf_counter() - STARTUP_STARTED
+        self.import_thread.join()
+        imports_done = time.perf_counter() - STARTUP_STARTED
+        
+        print("\n" + "="*50)
+        print("⏱️  시작 시간 측정")
+        print("="*50)
+        for step, seconds in self.startup_timings:
+            print(f"   {step:<16}{seconds * 1000:>8.1f}ms")
+        print("-"*50)
+        verdict = "✅" if time_to_ready <= target else "⚠️ "
+        print(f"{verdict} 준비 완료 (F9 대기): {time_to_ready:.3f}초 (목표 {target:.1f}초)")
+        print(f"   모니터 설정 완료: {screen_done:.3f}초 (백그라운드)")
+        print(f"   선택 라이브러리 임포트 완료: {imports_done:.3f}초 (백그라운드)")
+        print(f"   템플릿 캐시: {'사용' if self.template_cache_hit else '새로 생성'}, "
+              f"기준 화면 캐시: {'사용' if self.reference_cache_hit else '새로 생성'}")
+        print("="*50)
+    
     def setup_directories(self):
         """필요한 디렉토리 설정"""
         self.base_dir = Path(__file__).parent
@@ -150,6 +630,9 @@ class SevenKnightsTowerMacro:
         self.config_dir = self.base_dir / "config"
         self.screenshots_dir = self.base_dir / "screenshots"
         self.progress_dir = self.base_dir / "progress"
+        self.recordings_dir = self.logs_dir / "recordings"
+        self.cache_dir = self.config_dir / "cache"  # 템플릿/기준 화면 시작 캐시
+        self.learned_dir = self.config_dir  # 학습 결과 (ROI 히스토그램, 전투 시그니처)
         
         # 디렉토리 생성
         for directory in [self.images_dir, self.logs_dir, self.config_dir, 
@@ -163,18 +646,8 @@ class SevenKnightsTowerMacro:
         self.defeat_screenshots_dir.mkdir(exist_ok=True)
     
     def setup_logging(self):
-        """로깅 설정"""
-        log_filename = self.logs_dir / f"tower_macro_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_filename, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
-        
+        """로깅 설정 (큐 기반: 파일/콘솔 출력은 별도 스레드, 파일은 JSON Lines)"""
+        self.macro_logging = configure_logging(self.logs_dir)
         self.logger = logging.getLogger(__name__)
         self.logger.info("🚀 Seven Knights 무한의 탑 매크로 시작 (개선된 버전)")
     
@@ -190,7 +663,70 @@ class SevenKnightsTowerMacro:
             "max_click_attempts": 5,
             "screenshot_on_error": True,
             "auto_recovery": True,
-            "continuous_monitoring": True
+            "continuous_monitoring": True,
+            "use_template_masks": True,
+            "masked_templates": ["next_area", "lose_button"],
+            "auto_mask_tolerance": 40,
+            "template_scales": [0.9, 1.0, 1.1],
+            "state_vote_window": 3,
+            "state_vote_required": 2,
+            "state_vote_instant_confidence": 0.9,
+            "state_enter_thresholds": {},
+            "state_exit_thresholds": {},
+            "use_screen_classifier": True,
+            "screen_classifier_max_distance": 0.35,
+            "screen_classifier_min_margin": 0.1,
+            "screen_references": {
+                "waiting": ["resources/button_images/tower_waiting_screen.png"],
+                "formation": ["resources/button_images/team_formation_screen.png"],
+                "victory": ["resources/button_images/real_victory_screen.png"],
+                "defeat": ["resources/button_images/real_defeat_screen.png"],
+                "battle": ["resources/button_images/battle_screen.png"]
+            },
+            "battle_poll_interval": 0.5,
+            "battle_timeout": 20,
+            "battle_learn_delay": 3.0,
+            "battle_max_signatures": 8,
+            "battle_learn_min_std": 10.0,
+            "use_roi_heatmap": True,
+            "roi_min_samples": 3,
+            "roi_misses_per_level": 2,
+            "use_capture_thread": True,
+            "capture_fps": 10,
+            "capture_battle_fps": 2,
+            "capture_boost_fps": 30,
+            "capture_boost_duration": 1.5,
+            "capture_ring_size": 4,
+            "capture_max_frame_age": 0.5,
+            "macro_engine": "sequential",
+            "pipeline_queue_size": 2,
+            "async_control_poll_interval": 0.02,
+            "session_recording": True,
+            "recording_scale": 0.25,
+            "recording_fps": 2,
+            "recording_keyframe_interval": 30,
+            "recording_chunk_frames": 240,
+            "recording_max_mb": 1024,
+            "phase_timing": True,
+            "phase_timing_window": 300,
+            "phase_timing_slots": 30,
+            "metrics_server": False,
+            "metrics_host": "127.0.0.1",
+            "metrics_port": 9464,
+            "log_rate_limit_seconds": 10,
+            "log_max_mb": 20,
+            "log_rotate_hours": 24,
+            "logs_max_mb": 4096,
+            "screenshots_max_mb": 2048,
+            "janitor_interval": 300,
+            "screenshot_dedup_window": 600,
+            "screenshot_dedup_distance": 10,
+            "monitor_scan_width": 480,
+            "monitor_scan_min_score": 0.6,
+            "game_window_locator": True,
+            "game_resolution": [1920, 1080],
+            "game_window_recheck_interval": 30,
+            "template_normalization": True
         }
         
         try:
@@ -217,6 +753,29 @@ class SevenKnightsTowerMacro:
         self.state_check_interval = self.config.get("state_check_interval", 0.3)
         self.state_timeout = self.config.get("state_timeout", 30)
         self.max_click_attempts = self.config.get("max_click_attempts", 5)
+        self.use_template_masks = self.config.get("use_template_masks", True)
+        self.masked_templates = set(self.config.get("masked_templates", ["next_area", "lose_button"]))
+        self.auto_mask_tolerance = self.config.get("auto_mask_tolerance", 40)
+        self.template_scales = self.config.get("template_scales", [0.9, 1.0, 1.1])
+        self.template_normalization = self.config.get("template_normalization", True)
+        self.template_normalizer = TemplateNormalizer(tuple(self.config.get("game_resolution", [1920, 1080])))
+        self.battle_poll_interval = self.config.get("battle_poll_interval", 0.5)
+        self.battle_timeout = self.config.get("battle_timeout", 20)
+        self.battle_learn_delay = self.config.get("battle_learn_delay", 3.0)
+        self.use_roi_heatmap = self.config.get("use_roi_heatmap", True)
+        self.use_capture_thread = self.config.get("use_capture_thread", True)
+        self.capture_max_frame_age = self.config.get("capture_max_frame_age", 0.5)
+        self.macro_logging.rate_limiter.interval = self.config.get("log_rate_limit_seconds", 10)
+        self.macro_logging.file_handler.max_bytes = int(self.config.get("log_max_mb", 20) * 1024 * 1024)
+        self.macro_logging.file_handler.max_age = self.config.get("log_rotate_hours", 24) * 3600
+    
+    def setup_phase_timer(self):
+        """구간별 소요 시간 측정기 (최근 phase_timing_window 초 분포)"""
+        self.phase_timer = PhaseTimer(
+            window=self.config.get("phase_timing_window", 300),
+            slots=self.config.get("phase_timing_slots", 30),
+            enabled=self.config.get("phase_timing", True)
+        )
     
     def setup_images(self):
         """이미지 설정 및 로드"""
@@ -228,39 +787,331 @@ class SevenKnightsTowerMacro:
             'lose_button': 'resources/button_images/lose_button.png'         # 다시하기 버튼
         }
         
+        # 있으면 사용하는 선택 이미지
+        self.optional_images = {
+            'battle_hud': 'resources/button_images/battle_hud.png'           # 전투 HUD (스킬 바)
+        }
+        
         self.images = {}
-        missing_images = []
+        self.template_masks = {}
+        
+        # 원본 이미지/마스크 파일과 마스크·스케일 설정이 그대로면 캐시에서 바로 로드
+        template_cache = ArrayCache(self.cache_dir / "templates.npz")
+        fingerprint = self.template_fingerprint()
+        if self.load_cached_templates(template_cache.load(fingerprint)):
+            self.template_cache_hit = True
+            self.setup_roi_heatmap()
+            print(f"📦 총 {len(self.images)}개 이미지 캐시에서 로드 완료")
+            return
         
+        missing_images = []
+
         for key, filename in self.required_images.items():
-            image_path = self.images_dir / filename
-            if image_path.exists():
-                try:
-                    image = cv2.imread(str(image_path))
-                    if image is not None:
-                        self.images[key] = image
-                        h, w = image.shape[:2]
-                        print(f"   ✅ {filename}: {w}x{h} 로드됨")
-                    else:
-                        missing_images.append(filename)
-                except Exception as e:
-                    self.logger.error(f"이미지 로드 실패 {filename}: {e}")
-                    missing_images.append(filename)
-            else:
+            if not self.load_template_image(key, filename):
                 missing_images.append(filename)
-        
+
         if missing_images:
             print(f"❌ 누락된 이미지: {', '.join(missing_images)}")
             print("🔧 이미지 생성 도구 실행: python create_missing_images.py")
             sys.exit(1)
-        
+
+        for key, filename in self.optional_images.items():
+            if (self.images_dir / filename).exists():
+                self.load_template_image(key, filename)
+
+        self.build_template_bank()
+        template_cache.save(fingerprint, self.template_cache_arrays())
+        self.setup_roi_heatmap()
         print(f"📸 총 {len(self.images)}개 이미지 로드 완료")
+
+    def template_fingerprint(self) -> str:
+        """템플릿 캐시 지문 (이미지/마스크 파일 상태 + 마스크·스케일 설정)"""
+        files = []
+        for filename in list(self.required_images.values()) + list(self.optional_images.values()):
+            image_path = self.images_dir / filename
+            files += [image_path, image_path.with_name(f"{image_path.stem}_mask.png")]
+        settings = {
+            "required": sorted(self.required_images),
+            "optional": sorted(self.optional_images),
+            "scales": self.template_scales,
+            "use_template_masks": self.use_template_masks,
+            "masked_templates": sorted(self.masked_templates),
+            "auto_mask_tolerance": self.auto_mask_tolerance
+        }
+        return ArrayCache.fingerprint(files, settings)
+
+    def template_cache_arrays(self) -> Dict[str, np.ndarray]:
+        """템플릿/마스크/스케일별 템플릿을 캐시용 배열로 변환"""
+        arrays = {}
+        for key, image in self.images.items():
+            arrays[f"image:{key}"] = image
+            if self.template_masks.get(key) is not None:
+                arrays[f"mask:{key}"] = self.template_masks[key]
+            for index, (_, scaled_template, scaled_mask) in enumerate(self.template_bank[key]):
+                arrays[f"bank:{key}:{index}"] = scaled_template
+                if scaled_mask is not None:
+                    arrays[f"bankmask:{key}:{index}"] = scaled_mask
+        return arrays
+
+    def load_cached_templates(self, arrays: Optional[Dict[str, np.ndarray]]) -> bool:
+        """캐시 배열에서 템플릿/마스크/스케일별 템플릿 복원 (필수 이미지가 모두 있어야 성공)"""
+        if arrays is None or any(f"image:{key}" not in arrays for key in self.required_images):
+            return False
+        
+        self.template_bank = {}
+        for name, image in arrays.items():
+            kind, key = name.split(":", 1)
+            if kind != "image":
+                continue
+            self.images[key] = image
+            self.template_masks[key] = arrays.get(f"mask:{key}")
+            self.template_bank[key] = [
+                (scale, arrays[f"bank:{key}:{index}"], arrays.get(f"bankmask:{key}:{index}"))
+                for index, scale in enumerate(self.template_scales)
+            ]
+        return True
+
+    def load_template_image(self, key: str, filename: str) -> bool:
+        """템플릿 이미지 한 개 로드 (마스크 포함)"""
+        image_path = self.images_dir / filename
+        if not image_path.exists():
+            return False
+        
+        try:
+            # 알파 채널이 있으면 마스크로 사용하기 위해 그대로 읽음
+            image = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+            if image is None:
+                return False
+            
+            image, mask = self.load_template_mask(key, image_path, image)
+            self.images[key] = image
+            self.template_masks[key] = mask
+            h, w = image.shape[:2]
+            mask_info = " (마스크 적용)" if mask is not None else ""
+            print(f"   ✅ {filename}: {w}x{h} 로드됨{mask_info}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"이미지 로드 실패 {filename}: {e}")
+            return False
+
+    def load_template_mask(self, image_key: str, image_path: Path,
+                           image: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """템플릿 마스크 결정 (알파 채널 → 마스크 파일 → 자동 생성 순)"""
+        # 그레이스케일 PNG는 BGR로 맞춤
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+        # 1. 알파 채널 (반투명 버튼용)
+        if image.shape[2] == 4:
+            alpha = image[:, :, 3]
+            image = image[:, :, :3].copy()
+            if alpha.min() < 255:
+                mask = np.where(alpha > 0, 255, 0).astype(np.uint8)
+                return image, self.validate_template_mask(image_key, mask)
+
+        # 2. 수동으로 만든 마스크 파일 (예: next_area_mask.png)
+        mask_path = image_path.with_name(f"{image_path.stem}_mask.png")
+        if mask_path.exists():
+            mask = cv2.imread(str(mask_path), cv2.IMREAD_GRAYSCALE)
+            if mask is not None and mask.shape[:2] == image.shape[:2]:
+                mask = np.where(mask > 127, 255, 0).astype(np.uint8)
+                return image, self.validate_template_mask(image_key, mask)
+            self.logger.warning(f"마스크 파일 무시 (크기 불일치): {mask_path.name}")
+
+        # 3. 배경이 움직이는 버튼은 자동 마스크 생성
+        if self.use_template_masks and image_key in self.masked_templates:
+            return image, self.build_auto_mask(image_key, image)
+
+        return image, None
+
+    def build_auto_mask(self, image_key: str, template: np.ndarray) -> Optional[np.ndarray]:
+        """배경 픽셀을 제외하는 자동 마스크 생성
+
+        템플릿 테두리의 중앙값 색상을 배경으로 보고, 배경과 색상 차이가 큰
+        픽셀과 윤곽선(글자, 버튼 테두리)만 매칭에 사용한다.
+        """
+        h, w = template.shape[:2]
+        border = max(1, min(h, w) // 20)
+
+        border_pixels = np.concatenate([
+            template[:border].reshape(-1, 3),
+            template[-border:].reshape(-1, 3),
+            template[:, :border].reshape(-1, 3),
+            template[:, -border:].reshape(-1, 3)
+        ])
+        background = np.median(border_pixels, axis=0)
+
+        # 배경색과의 채널별 최대 차이
+        diff = np.abs(template.astype(np.int16) - background.astype(np.int16)).max(axis=2)
+        foreground = (diff > self.auto_mask_tolerance).astype(np.uint8) * 255
+
+        # 글자/테두리 윤곽선 추가
+        gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(gray, 80, 160)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+        mask = cv2.bitwise_or(foreground, edges)
+
+        # 작은 잡음 제거 후 경계를 약간 넓힘
+        kernel = np.ones((3, 3), np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        mask = cv2.dilate(mask, kernel, iterations=2)
+
+        return self.validate_template_mask(image_key, mask)
+
+    def validate_template_mask(self, image_key: str, mask: np.ndarray) -> Optional[np.ndarray]:
+        """마스크 유효성 확인 (너무 작거나 전체를 덮으면 사용하지 않음)"""
+        coverage = np.count_nonzero(mask) / mask.size
+        if coverage < 0.1 or coverage > 0.95:
+            self.logger.info(f"🎭 {image_key} 마스크 미사용 (전경 비율: {coverage:.1%})")
+            return None
+
+        self.logger.info(f"🎭 {image_key} 마스크 적용 (전경 비율: {coverage:.1%})")
+        return mask
+
+    def build_template_bank(self):
+        """스케일별 템플릿/마스크 미리 계산 (매칭 때마다 resize 하지 않도록)
+
+        게임 화면 크기를 재기 전에는 template_scales 배율을 모두 탐색한다.
+        """
+        self.template_bank = self.template_normalizer.build_bank(
+            self.images, self.template_masks, scales=self.template_scales)
+
+    def normalize_templates(self, width: int, height: int):
+        """게임 화면 크기에 맞춘 배율 하나로 템플릿 뱅크 재구성 (템플릿마다 매칭 한 번)"""
+        if not self.template_normalization or width <= 0 or height <= 0:
+            return
+        scale = self.template_normalizer.scale_for(width, height)
+        if self.template_scale is not None and max(abs(a - b) for a, b in zip(scale, self.template_scale)) < 0.002:
+            return
+        # 매칭 중인 스레드가 있어도 사전을 통째로 바꾸므로 안전
+        self.template_bank = self.template_normalizer.build_bank(self.images, self.template_masks, scale)
+        self.template_scale = scale
+        reference_w, reference_h = self.template_normalizer.reference_size
+        print(f"📐 템플릿 정규화: 게임 화면 {width}x{height} (기준 {reference_w}x{reference_h}) "
+              f"→ 배율 {scale[0]:.3f}x{scale[1]:.3f}")
+
+    def setup_roi_heatmap(self):
+        """템플릿별 발견 위치 히스토그램 로드"""
+        self.roi_heatmap = RoiHeatmap(
+            self.learned_dir / "roi_heatmap.json",
+            min_samples=self.config.get("roi_min_samples", 3),
+            misses_per_level=self.config.get("roi_misses_per_level", 2),
+            persist=not self.headless
+        )
+        if self.use_roi_heatmap:
+            loaded = self.roi_heatmap.load()
+            if loaded:
+                print(f"🗺️  학습된 검색 영역 {loaded}개 템플릿 로드")
+    
+    def setup_screen_classifier(self):
+        """기준 화면을 읽어 전체 화면 사전 분류기 구성"""
+        self.screen_classifier = None
+        if not self.config.get("use_screen_classifier", True):
+            return
+        
+        classifier = ScreenClassifier(
+            max_distance=self.config.get("screen_classifier_max_distance", 0.35),
+            min_margin=self.config.get("screen_classifier_min_margin", 0.1)
+        )
+        
+        # 기준 화면 PNG 디코딩은 느리므로 시그니처만 캐시
+        screen_references = self.config.get("screen_references", {})
+        reference_cache = ArrayCache(self.cache_dir / "screen_references.npz")
+        fingerprint = ArrayCache.fingerprint(
+            [self.base_dir / path for paths in screen_references.values() for path in paths],
+            {"screen_references": screen_references, "thumbnail": ScreenClassifier.THUMBNAIL_SIZE}
+        )
+        cached = reference_cache.load(fingerprint)
+        if cached is not None:
+            for index in range(len(cached) // 3):
+                classifier.references.append((GameState(str(cached[f"state:{index}"])),
+                                              cached[f"hist:{index}"], cached[f"dhash:{index}"]))
+            self.reference_cache_hit = True
+        else:
+            for state_value, paths in screen_references.items():
+                try:
+                    state = GameState(state_value)
+                except ValueError:
+                    self.logger.warning(f"알 수 없는 기준 화면 상태: {state_value}")
+                    continue
+                
+                for path in paths:
+                    reference_path = self.base_dir / path
+                    if not reference_path.exists():
+                        continue
+                    reference = cv2.imread(str(reference_path))
+                    if reference is not None:
+                        classifier.add_reference(state, reference)
+            
+            arrays = {}
+            for index, (state, hist, dhash) in enumerate(classifier.references):
+                arrays[f"state:{index}"] = np.array(state.value)
+                arrays[f"hist:{index}"] = hist
+                arrays[f"dhash:{index}"] = dhash
+            reference_cache.save(fingerprint, arrays)
+        
+        if not classifier.references:
+            self.logger.warning("기준 화면이 없어 사전 분류기를 사용하지 않습니다")
+            return
+        
+        self.screen_classifier = classifier
+        loaded_states = sorted({state.value for state, _, _ in classifier.references})
+        print(f"🖼️  사전 분류기 기준 화면 {len(classifier.references)}개 로드 ({', '.join(loaded_states)})")
+    
+    def setup_battle_detector(self):
+        """전투 화면 학습기 설정 (저장된 전투 시그니처 로드)"""
+        self.battle_detector = BattleDetector(
+            self.screen_classifier,
+            self.learned_dir / "battle_signatures.npz",
+            max_signatures=self.config.get("battle_max_signatures", 8),
+            persist=not self.headless,
+            min_std=self.config.get("battle_learn_min_std", 10.0)
+        )
+        loaded = self.battle_detector.load()
+        if loaded:
+            print(f"⚔️  학습된 전투 화면 시그니처 {loaded}개 로드")
+    
+    def match_template(self, screen: np.ndarray, template: np.ndarray,
+                       mask: Optional[np.ndarray] = None) -> Tuple[float, Tuple[int, int]]:
+        """템플릿 매칭 (마스크가 있으면 전경 픽셀만 비교)"""
+        with self.phase_timer.measure("match_template"):
+            return match_template(screen, template, mask)
     
     def setup_screen_capture(self):
         """화면 캡처 설정 (듀얼 모니터 지원)"""
+        if self.frame_source is not None:
+            # 외부 프레임 공급: 모니터를 사용하지 않고 프레임 좌표를 그대로 사용
+            frame_size = getattr(self.frame_source, 'frame_size', None)
+            width, height = frame_size() if frame_size is not None else (0, 0)
+            self.screen_region = {'left': 0, 'top': 0, 'width': width, 'height': height}
+            self.monitor_index = 0
+            print(f"🎞️  외부 프레임 공급 사용: {width}x{height}")
+            # 공급되는 프레임이 곧 게임 화면
+            self.normalize_templates(width, height)
+            return
+        
         try:
             self.sct = mss.mss()
             self.monitors = self.sct.monitors
             
+            # 검사가 끝날 때까지는 기본 모니터 사용
+            self.screen_region = self.monitors[1] if len(self.monitors) > 1 else self.monitors[0]
+            self.monitor_index = 1
+            
+            # 모니터 감지(설정이 없을 때)와 캡처 테스트는 나머지 초기화와 동시에 진행
+            self.monitor_scan = threading.Thread(target=self.finish_screen_capture_setup,
+                                                 name="MonitorScan", daemon=True)
+            self.monitor_scan.start()
+                
+        except Exception as e:
+            self.logger.error(f"화면 캡처 설정 실패: {e}")
+            print(f"❌ 화면 캡처 설정 실패: {e}")
+            print(f"🔧 해결 방법: python monitor_detector.py 실행하여 모니터 설정")
+    
+    def finish_screen_capture_setup(self):
+        """모니터 선택 + 화면 캡처 테스트 (백그라운드 스레드)"""
+        try:
             # 모니터 설정 로드
             selected_monitor = self.load_monitor_config()
             if selected_monitor is None:
@@ -272,12 +1123,18 @@ class SevenKnightsTowerMacro:
                 print(f"🖥️  모니터 {selected_monitor} 사용: {self.screen_region['width']}x{self.screen_region['height']}")
             else:
                 # 기본값: 첫 번째 모니터
-                self.screen_region = self.monitors[1] if len(self.monitors) > 1 else self.monitors[0]
-                self.monitor_index = 1
                 print(f"🖥️  기본 모니터 사용: {self.screen_region['width']}x{self.screen_region['height']}")
+            self.monitor_region = dict(self.screen_region)
+            
+            # 모니터 안의 게임 화면(에뮬레이터 창)만 캡처하도록 영역 축소
+            if self.config.get("game_window_locator", True) and not self.headless:
+                self.setup_window_locator()
+            else:
+                # 창 찾기를 끄면 게임이 모니터 전체를 채운다고 봄
+                self.normalize_templates(self.screen_region['width'], self.screen_region['height'])
             
             # 화면 캡처 테스트
-            test_screen = self.capture_screen()
+            test_screen = self.grab_screen_direct()
             if test_screen is not None:
                 print(f"✅ 화면 캡처 테스트 성공")
             else:
@@ -288,17 +1145,85 @@ class SevenKnightsTowerMacro:
             print(f"❌ 화면 캡처 설정 실패: {e}")
             print(f"🔧 해결 방법: python monitor_detector.py 실행하여 모니터 설정")
     
+    def grab_monitor(self) -> Optional[np.ndarray]:
+        """게임 창 찾기용 모니터 전체 캡처 (BGRA, 별도 스레드에서 호출)"""
+        try:
+            with mss.mss() as local_sct:
+                return np.asarray(local_sct.grab(self.monitor_region))
+        except Exception as e:
+            self.logger.error(f"모니터 캡처 실패: {e}")
+            return None
+    
+    def setup_window_locator(self):
+        """게임 화면 영역을 찾아 screen_region 을 좁히고 주기적 재확인 시작"""
+        locator = GameWindowLocator(
+            self.images,
+            game_size=tuple(self.config.get("game_resolution", [1920, 1080])),
+            scales=self.template_scales,
+            min_score=self.config.get("monitor_scan_min_score", 0.6)
+        )
+        rect = None
+        frame = self.grab_monitor()
+        if frame is not None:
+            started = time.perf_counter()
+            found = locator.locate(frame)
+            if found is not None:
+                rect, score, key = found
+                self.apply_game_window(rect)
+                print(f"🪟 게임 화면 영역: ({rect[0]}, {rect[1]}) {rect[2]}x{rect[3]} "
+                      f"({key} {score:.2f}, {(time.perf_counter() - started) * 1000:.0f}ms)")
+            else:
+                print("⚠️  게임 화면 영역을 찾지 못함 - 모니터 전체 캡처 (주기적으로 다시 확인)")
+        
+        interval = self.config.get("game_window_recheck_interval", 30)
+        if interval > 0:
+            self.window_tracker = GameWindowTracker(locator, self.grab_monitor, self.on_game_window_change,
+                                                    interval=interval)
+            self.window_tracker.current = rect
+            self.window_tracker.start()
+    
+    def apply_game_window(self, rect: Tuple[int, int, int, int]):
+        """모니터 기준 게임 화면 영역을 캡처 영역으로 설정"""
+        x, y, width, height = rect
+        # 새 크기의 프레임이 들어오기 전에 템플릿부터 맞춤
+        self.normalize_templates(width, height)
+        self.screen_region = {
+            'left': self.monitor_region['left'] + x,
+            'top': self.monitor_region['top'] + y,
+            'width': width,
+            'height': height
+        }
+        if self.capture_thread is not None:
+            self.capture_thread.set_region(self.screen_region)
+    
+    def on_game_window_change(self, rect: Tuple[int, int, int, int]):
+        """게임 창이 움직이거나 크기가 바뀜"""
+        self.apply_game_window(rect)
+        self.logger.info(f"🪟 게임 화면 영역 변경: ({rect[0]}, {rect[1]}) {rect[2]}x{rect[3]}")
+    
+    def wait_for_screen_setup(self):
+        """백그라운드 모니터 감지가 끝날 때까지 대기 (매크로 시작 전)"""
+        if self.monitor_scan is not None:
+            self.monitor_scan.join()
+            self.monitor_scan = None
+    
     def extract_floor_number(self, screenshot: np.ndarray) -> Optional[int]:
         """스크린샷에서 층수 정보 추출"""
-        if not OCR_AVAILABLE:
+        if not pytesseract.available:
+            if not self.ocr_warning_shown:
+                self.ocr_warning_shown = True
+                print("⚠️  pytesseract를 설치하면 층수 인식 기능을 사용할 수 있습니다.")
+                print("   pip install pytesseract 설치 후 tesseract 바이너리를 설치하세요.")
             return None
         
         try:
             # 스크린샷을 PIL 이미지로 변환
-            pil_image = Image.fromarray(cv2.cvtColor(screenshot, cv2.COLOR_BGR2RGB))
+            with self.phase_timer.measure("color_convert"):
+                pil_image = Image.fromarray(cv2.cvtColor(screenshot, cv2.COLOR_BGR2RGB))
             
             # OCR 수행
-            text = pytesseract.image_to_string(pil_image, lang='kor+eng')
+            with self.phase_timer.measure("ocr"):
+                text = pytesseract.image_to_string(pil_image, lang='kor+eng')
             
             # 층수 패턴 찾기 (다양한 패턴 지원)
             patterns = [
@@ -372,7 +1297,8 @@ class SevenKnightsTowerMacro:
         screenshot_path = screenshot_dir / filename
         
         try:
-            cv2.imwrite(str(screenshot_path), screenshot)
+            with self.phase_timer.measure("imwrite"):
+                cv2.imwrite(str(screenshot_path), screenshot)
             self.stats.screenshots_taken.add(floor_num)
             self.logger.info(f"📸 {floor_num}층 스크린샷 저장: {filename}")
             
@@ -485,35 +1411,19 @@ class SevenKnightsTowerMacro:
         return None
     
     def auto_detect_monitor(self):
-        """게임 화면이 있는 모니터 자동 감지"""
+        """게임 화면이 있는 모니터 자동 감지 (썸네일 + 상태 템플릿, 배치가 같으면 저장된 결과 사용)"""
         try:
             print("🔍 게임 화면 자동 감지 중...")
-            
-            # 각 모니터에서 스크린샷 테스트
-            for monitor_idx in range(1, len(self.monitors)):
-                try:
-                    monitor = self.monitors[monitor_idx]
-                    screenshot = self.sct.grab(monitor)
-                    
-                    if screenshot:
-                        # 간단한 화면 활성도 체크
-                        img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-                        img_array = np.array(img)
-                        
-                        # 화면 밝기 및 색상 분포 체크
-                        brightness = np.mean(img_array)
-                        color_variance = np.var(img_array)
-                        
-                        print(f"   모니터 {monitor_idx}: 밝기 {brightness:.1f}, 색상분산 {color_variance:.1f}")
-                        
-                        # 게임 화면으로 추정되는 조건
-                        if brightness > 50 and color_variance > 1000:
-                            print(f"🎯 게임 화면으로 추정: 모니터 {monitor_idx}")
-                            return monitor_idx
-                            
-                except Exception as e:
-                    print(f"   모니터 {monitor_idx} 테스트 실패: {e}")
-                    continue
+            scanner = MonitorScanner(
+                self.images,
+                scales=self.template_scales,
+                thumb_width=self.config.get("monitor_scan_width", 480),
+                min_score=self.config.get("monitor_scan_min_score", 0.6),
+                cache_path=self.config_dir / "monitor_detection.json"
+            )
+            detected = scanner.detect(self.monitors)
+            if detected is not None:
+                return detected
             
             print("⚠️  게임 화면 자동 감지 실패 - 기본 모니터 사용")
             return 1
@@ -524,21 +1434,80 @@ class SevenKnightsTowerMacro:
     
     def setup_keyboard_shortcuts(self):
         """키보드 단축키 설정"""
+        if self.headless or not keyboard.available:
+            return
+        
         print("\n⌨️  키보드 단축키:")
+        print("   F8: 일시정지/재개")
         print("   F9: 매크로 시작/정지")
         print("   F10: 프로그램 종료")
         print("   F11: 통계 표시")
         print("   F12: 현재 화면 스크린샷")
         print("   ESC: 안전 정지 (화면 구석으로 마우스 이동)")
         
-        # 키보드 이벤트 핸들러
-        keyboard.add_hotkey('f9', self.toggle_macro)
-        keyboard.add_hotkey('f10', self.stop_program)
-        keyboard.add_hotkey('f11', self.show_stats)
-        keyboard.add_hotkey('f12', self.take_screenshot)
+        # 키보드 이벤트 핸들러 (모두 on_hotkey 를 거침)
+        keyboard.add_hotkey('f8', self.on_hotkey, args=('pause',))
+        keyboard.add_hotkey('f9', self.on_hotkey, args=('toggle',))
+        keyboard.add_hotkey('f10', self.on_hotkey, args=('exit',))
+        keyboard.add_hotkey('f11', self.on_hotkey, args=('stats',))
+        keyboard.add_hotkey('f12', self.on_hotkey, args=('screenshot',))
+    
+    def on_hotkey(self, event: str):
+        """단축키 이벤트 처리
+
+        비동기 엔진이 실행 중이면 이벤트 큐로 보내 진행 중인 대기/매칭을 바로
+        취소하게 하고, 아니면 기본 처리 함수를 키보드 스레드에서 호출한다.
+        """
+        runtime = self.async_runtime
+        if runtime is not None and runtime.post_event(event) and event != 'exit':
+            return
+        self.hotkey_handlers[event]()
+    
+    def capture_screen(self, newer_than: Optional[float] = None) -> np.ndarray:
+        """화면 캡처 (캡처 스레드가 있으면 최신 프레임 사용)
+
+        newer_than 을 주면 그 시각 이후에 캡처된 프레임을 기다려서 반환한다.
+        """
+        with self.phase_timer.measure("capture"):
+            if self.capture_thread is not None and self.capture_thread.is_alive():
+                max_age = self.frame_max_age()
+                if newer_than is not None:
+                    latest = self.capture_thread.wait_for_frame(newer_than, timeout=max_age)
+                else:
+                    latest = self.capture_thread.latest(max_age=max_age)
+                if latest is not None:
+                    return latest[0]
+            
+            return self.grab_screen_direct()
+    
+    def frame_max_age(self) -> float:
+        """캡처 스레드 프레임을 그대로 쓸 수 있는 최대 나이
+
+        전투 중처럼 캡처 FPS 를 낮추면 최신 프레임도 capture_max_frame_age 보다 오래될 수
+        있으므로, 현재 캡처 간격의 1.5배까지는 허용한다 (직접 캡처로 빠지지 않도록).
+        """
+        if self.capture_thread is None:
+            return self.capture_max_frame_age
+        return max(self.capture_max_frame_age, 1.5 / max(0.1, self.capture_thread.current_fps()))
     
-    def capture_screen(self) -> np.ndarray:
-        """화면 캡처 (듀얼 모니터 및 thread safe)"""
+    def get_latest_frame(self) -> Optional[Tuple[np.ndarray, float]]:
+        """최신 프레임과 캡처 시각"""
+        with self.phase_timer.measure("capture"):
+            if self.capture_thread is not None and self.capture_thread.is_alive():
+                latest = self.capture_thread.latest(max_age=self.frame_max_age())
+                if latest is not None:
+                    return latest
+            
+            timestamp = time.time()
+            frame = self.grab_screen_direct()
+            return (frame, timestamp) if frame is not None else None
+    
+    def grab_screen_direct(self) -> np.ndarray:
+        """화면 직접 캡처 (듀얼 모니터 및 thread safe)"""
+        if self.frame_source is not None:
+            with self.phase_timer.measure("capture_grab"):
+                return self.frame_source()
+        
         try:
             # thread local 오류 해결을 위해 새로운 mss 인스턴스 생성
             with mss.mss() as local_sct:
@@ -549,9 +1518,10 @@ class SevenKnightsTowerMacro:
                     # 기본 모니터 사용
                     monitor = local_sct.monitors[1] if len(local_sct.monitors) > 1 else local_sct.monitors[0]
                 
-                screenshot = local_sct.grab(monitor)
-                img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-                return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+                with self.phase_timer.measure("capture_grab"):
+                    screenshot = local_sct.grab(monitor)
+                with self.phase_timer.measure("color_convert"):
+                    return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_BGRA2BGR)
                 
         except Exception as e:
             self.logger.error(f"화면 캡처 실패: {e}")
@@ -570,111 +1540,299 @@ class SevenKnightsTowerMacro:
                 self.logger.error(f"대안 화면 캡처도 실패: {e2}")
                 return None
     
-    def find_image_on_screen(self, image_key: str, threshold: float = None) -> Optional[Tuple[int, int, float]]:
-        """화면에서 이미지 찾기 (신뢰도 포함)"""
+    def start_capture_thread(self):
+        """캡처 전용 스레드 시작"""
+        if not self.use_capture_thread or not hasattr(self, 'screen_region'):
+            return
+        if self.capture_thread is not None and self.capture_thread.is_alive():
+            return
+        
+        self.capture_thread = CaptureThread(
+            self.screen_region,
+            fps=self.capture_fps_for_state(self.current_state),
+            ring_size=self.config.get("capture_ring_size", 4),
+            grab_fn=self.frame_source,
+            phase_timer=self.phase_timer
+        )
+        self.capture_thread.start()
+        self.logger.info(f"📷 캡처 스레드 시작 ({self.capture_thread.base_fps:.0f} FPS)")
+    
+    def stop_capture_thread(self):
+        """캡처 전용 스레드 종료"""
+        if self.capture_thread is not None:
+            self.capture_thread.stop()
+            self.capture_thread.join(timeout=2)
+            self.capture_thread = None
+    
+    def capture_fps_for_state(self, state: GameState) -> float:
+        """상태별 기본 캡처 FPS (전투 중에는 낮춤)"""
+        if state == GameState.BATTLE:
+            return self.config.get("capture_battle_fps", 2)
+        return self.config.get("capture_fps", 10)
+    
+    def boost_capture(self):
+        """클릭 직후 화면 변화를 빨리 보기 위해 캡처 FPS 를 잠시 높임"""
+        if self.capture_thread is not None:
+            self.capture_thread.boost(self.config.get("capture_boost_fps", 30),
+                                      self.config.get("capture_boost_duration", 1.5))
+    
+    def find_image_on_screen(self, image_key: str, threshold: float = None,
+                             screen: Optional[np.ndarray] = None) -> Optional[Tuple[int, int, float]]:
+        """화면에서 이미지 찾기 (신뢰도 포함)
+
+        screen 을 넘기면 새로 캡처하지 않고 해당 프레임에서 찾는다.
+        """
         if image_key not in self.images:
             return None
         
         if threshold is None:
             threshold = self.state_specific_thresholds.get(image_key, self.match_threshold)
         
-        screen = self.capture_screen()
         if screen is None:
-            return None
+            screen = self.capture_screen()
+            if screen is None:
+                return None
+        
+        best_match = self.locate_template(image_key, screen)
+        
+        if best_match and best_match[2] >= threshold:
+            self.logger.info(f"🎯 {image_key} 발견", extra=log_extra(
+                f"match.{image_key}", confidence=round(best_match[2], 3), x=best_match[0], y=best_match[1]))
+            return best_match
         
-        template = self.images[image_key]
+        return None
+    
+    def locate_template(self, image_key: str, screen: np.ndarray) -> Optional[Tuple[int, int, float]]:
+        """다중 스케일 템플릿 매칭 (임계값 적용 전 최고 신뢰도 위치 반환)
+
+        학습된 ROI 히스토그램이 있으면 해당 검색 창만 매칭한다.
+        """
+        window = self.roi_heatmap.search_window(image_key, screen.shape) if self.use_roi_heatmap else None
+        if window is not None:
+            x0, y0, x1, y1 = window
+            search_area = screen[y0:y1, x0:x1]
+        else:
+            x0, y0 = 0, 0
+            search_area = screen
         
-        # 다중 스케일 템플릿 매칭
         best_match = None
         best_confidence = 0
-        
-        # 스케일 범위 (0.8 ~ 1.2)
-        for scale in [0.9, 1.0, 1.1]:
-            if scale != 1.0:
-                h, w = template.shape[:2]
-                new_h, new_w = int(h * scale), int(w * scale)
-                scaled_template = cv2.resize(template, (new_w, new_h))
+        best_size = (0, 0)
+
+        # 미리 계산된 스케일별 템플릿/마스크 사용 (템플릿별 전체 스케일 소요 시간 기록)
+        with self.phase_timer.measure(f"match.{image_key}"):
+            for scale, scaled_template, scaled_mask in self.template_bank[image_key]:
+                if scaled_template.shape[0] > search_area.shape[0] or scaled_template.shape[1] > search_area.shape[1]:
+                    continue
+
+                # 템플릿 매칭
+                max_val, max_loc = self.match_template(search_area, scaled_template, scaled_mask)
+
+                if max_val > best_confidence:
+                    best_confidence = max_val
+                    h, w = scaled_template.shape[:2]
+                    center_x = x0 + max_loc[0] + w // 2
+                    center_y = y0 + max_loc[1] + h // 2
+                    best_match = (center_x, center_y, max_val)
+                    best_size = (w, h)
+        
+        # 발견 위치 학습 / 실패 시 다음 검색 범위 확대
+        if self.use_roi_heatmap:
+            threshold = self.state_specific_thresholds.get(image_key, self.match_threshold)
+            if best_match and best_confidence >= threshold:
+                self.roi_heatmap.record_hit(image_key, best_match[0], best_match[1], screen.shape, best_size)
             else:
-                scaled_template = template
-            
-            if scaled_template.shape[0] > screen.shape[0] or scaled_template.shape[1] > screen.shape[1]:
-                continue
-            
-            # 템플릿 매칭
-            result = cv2.matchTemplate(screen, scaled_template, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-            
-            if max_val > best_confidence:
-                best_confidence = max_val
-                h, w = scaled_template.shape[:2]
-                center_x = max_loc[0] + w // 2
-                center_y = max_loc[1] + h // 2
-                best_match = (center_x, center_y, max_val)
-        
-        if best_match and best_confidence >= threshold:
-            self.logger.info(f"🎯 {image_key} 발견 (신뢰도: {best_confidence:.3f}) at ({best_match[0]}, {best_match[1]})")
-            return best_match
+                self.roi_heatmap.record_miss(image_key)
         
-        return None
+        return best_match
     
-    def comprehensive_state_detection(self) -> Dict[GameState, float]:
-        """포괄적인 상태 감지 (모든 상태의 신뢰도 반환)"""
-        state_confidences = {}
+    def comprehensive_state_detection(self, screen: Optional[np.ndarray] = None,
+                                      raw: bool = False) -> Dict[GameState, float]:
+        """포괄적인 상태 감지 (모든 상태의 신뢰도 반환)
+
+        한 프레임만 캡처해서 모든 상태를 평가한다. raw=True 이면 템플릿별
+        임계값을 적용하지 않은 원래 신뢰도를 반환한다 (히스테리시스 판정용).
+        사전 분류기가 상태를 짚으면 해당 상태의 템플릿만 확인한다.
+        """
+        state_confidences = {state: 0.0 for state in self.state_images}
         
-        # 각 상태별 이미지 확인
-        state_images = {
-            GameState.WAITING: ['enter_button'],
-            GameState.TEAM_FORMATION: ['start_button'],
-            GameState.VICTORY: ['win_victory'],
-            GameState.DEFEAT: ['lose_button']
-        }
+        if screen is None:
+            screen = self.capture_screen()
+            if screen is None:
+                return state_confidences
         
-        for state, images in state_images.items():
-            max_confidence = 0
-            for image_key in images:
-                result = self.find_image_on_screen(image_key)
-                if result:
-                    confidence = result[2]
-                    max_confidence = max(max_confidence, confidence)
+        if self.screen_classifier is not None:
+            guessed_state, guessed_confidence = self.screen_classifier.classify(screen)
             
-            state_confidences[state] = max_confidence
+            # 전투 화면은 확인할 템플릿이 없으므로 분류 결과를 그대로 사용
+            if guessed_state == GameState.BATTLE:
+                state_confidences[GameState.BATTLE] = guessed_confidence
+                return state_confidences
+            
+            if guessed_state in self.state_images:
+                confidence = self.score_state(guessed_state, screen, raw)
+                confirm_threshold = self.state_voter.exit_thresholds.get(guessed_state, 0.4) if raw else 0
+                if confidence > confirm_threshold:
+                    state_confidences[guessed_state] = confidence
+                    return state_confidences
+        
+        # 분류 실패 또는 확인 실패 시 모든 상태 템플릿 확인
+        for state in self.state_images:
+            state_confidences[state] = self.score_state(state, screen, raw)
         
         return state_confidences
     
-    def detect_game_state(self) -> GameState:
-        """현재 게임 상태 감지 (개선된 버전)"""
-        self.stats.state_detection_attempts += 1
+    def score_state(self, state: GameState, screen: np.ndarray, raw: bool = False) -> float:
+        """한 상태의 판정 이미지들 중 최고 신뢰도"""
+        max_confidence = 0
+        for image_key in self.state_images[state]:
+            if raw:
+                result = self.locate_template(image_key, screen) if image_key in self.images else None
+            else:
+                result = self.find_image_on_screen(image_key, screen=screen)
+            if result:
+                max_confidence = max(max_confidence, result[2])
         
-        state_confidences = self.comprehensive_state_detection()
+        return max_confidence
+    
+    def detect_game_state(self, screen: Optional[np.ndarray] = None) -> GameState:
+        """현재 게임 상태 감지 (다중 프레임 투표 + 히스테리시스)
+
+        한 프레임의 결과로 바로 상태를 바꾸지 않고 최근 M 프레임 중 N 프레임
+        이상이 같은 상태를 가리킬 때만 전환한다. 이미 인정된 상태는 신뢰도가
+        해제 임계값 아래로 떨어진 프레임이 N 개 쌓일 때까지 유지된다.
+        """
+        self.stats.state_detection_attempts += 1
         
-        # 가장 높은 신뢰도의 상태 선택
-        best_state = GameState.UNKNOWN
-        best_confidence = 0
+        if screen is None:
+            screen = self.capture_screen()
         
-        for state, confidence in state_confidences.items():
-            if confidence > best_confidence:
-                best_confidence = confidence
-                best_state = state
+        with self.phase_timer.measure("detect"):
+            state_confidences = self.comprehensive_state_detection(screen, raw=True)
+            self.last_state_confidences = state_confidences
+            
+            best_state, best_confidence = self.state_voter.update(state_confidences)
         
-        # 신뢰도가 너무 낮으면 UNKNOWN
-        if best_confidence < 0.5:
-            best_state = GameState.UNKNOWN
+        if self.session_recorder is not None:
+            self.session_recorder.record_frame(screen, time.time(), best_state, state_confidences)
         
         if best_state != GameState.UNKNOWN:
-            self.logger.info(f"🔍 상태 감지: {best_state.value} (신뢰도: {best_confidence:.3f})")
+            self.logger.info(f"🔍 상태 감지: {best_state.value}", extra=log_extra(
+                f"detect.{best_state.value}", confidence=round(best_confidence, 3)))
         
         return best_state
     
+    def setup_metrics_server(self):
+        """Prometheus 형식 메트릭 서버 시작 (metrics_server 설정이 켜져 있을 때만)"""
+        self.metrics_server = None
+        if not self.config.get("metrics_server", False):
+            return
+        
+        from metrics_server import MetricsServer
+        server = MetricsServer(
+            self,
+            host=self.config.get("metrics_host", "127.0.0.1"),
+            port=self.config.get("metrics_port", 9464)
+        )
+        try:
+            server.start()
+        except OSError as e:
+            self.logger.error(f"메트릭 서버 시작 실패: {e}")
+            return
+        self.metrics_server = server
+        print(f"📡 메트릭: http://{server.host}:{server.port}/metrics")
+    
+    def setup_screenshot_store(self):
+        """오류/타임아웃 스크린샷 저장소 (비슷한 화면은 참조 횟수만 기록)"""
+        self.screenshot_store = ScreenshotStore(
+            self.logs_dir / "screenshots",
+            window=self.config.get("screenshot_dedup_window", 600),
+            max_distance=self.config.get("screenshot_dedup_distance", 10)
+        )
+    
+    def setup_disk_janitor(self):
+        """logs/ 와 screenshots/ 바이트 예산을 지키는 백그라운드 정리 스레드 시작"""
+        self.disk_janitor = None
+        if self.headless:
+            return
+        
+        self.disk_janitor = DiskJanitor(
+            {
+                self.logs_dir: int(self.config.get("logs_max_mb", 4096) * 1024 * 1024),
+                self.screenshots_dir: int(self.config.get("screenshots_max_mb", 2048) * 1024 * 1024)
+            },
+            interval=self.config.get("janitor_interval", 300),
+            protected=self.get_active_paths
+        )
+        self.disk_janitor.start()
+    
+    def get_active_paths(self) -> Set[Path]:
+        """지금 쓰고 있는 로그 파일과 녹화 중인 세션 디렉토리"""
+        paths = {self.macro_logging.log_path.resolve(), self.macro_logging.file_handler.lock_path.resolve()}
+        if self.session_recorder is not None and self.session_recorder.session_dir is not None:
+            paths.add(self.session_recorder.session_dir.resolve())
+        return paths
+    
+    def setup_state_voter(self):
+        """상태 투표기 설정 (진입/해제 임계값은 상태별로 지정 가능)"""
+        enter_config = self.config.get("state_enter_thresholds", {})
+        exit_config = self.config.get("state_exit_thresholds", {})
+        
+        enter_thresholds = {}
+        exit_thresholds = {}
+        for state, images in self.state_images.items():
+            # 기본 진입 임계값은 해당 상태 이미지의 매칭 임계값
+            default_enter = min(self.state_specific_thresholds.get(key, self.match_threshold) for key in images)
+            enter_thresholds[state] = enter_config.get(state.value, default_enter)
+            exit_thresholds[state] = exit_config.get(state.value, enter_thresholds[state] - 0.15)
+        
+        # 전투 HUD 템플릿이 없으면 사전 분류기 신뢰도 (1 - 거리) 로 판정
+        if self.screen_classifier is not None and GameState.BATTLE not in enter_thresholds:
+            battle_enter = 1.0 - self.screen_classifier.max_distance
+            enter_thresholds[GameState.BATTLE] = enter_config.get("battle", battle_enter)
+            exit_thresholds[GameState.BATTLE] = exit_config.get("battle", battle_enter - 0.1)
+        
+        self.state_voter = StateVoter(
+            window=self.config.get("state_vote_window", 3),
+            required=self.config.get("state_vote_required", 2),
+            enter_thresholds=enter_thresholds,
+            exit_thresholds=exit_thresholds,
+            instant_confidence=self.config.get("state_vote_instant_confidence", 0.9)
+        )
+    
     def change_state(self, new_state: GameState):
         """게임 상태 변경"""
         if self.current_state != new_state:
             self.previous_state = self.current_state
             self.logger.info(f"🔄 상태 변경: {self.current_state.value} → {new_state.value}")
+            now = time.time()
+            dwell = self.stats.state_dwell
+            dwell[self.current_state] = dwell.get(self.current_state, 0.0) + now - self.last_state_change
             self.current_state = new_state
-            self.last_state_change = time.time()
+            self.last_state_change = now
             self.stats.current_state = new_state
             self.stats.last_state_change = time.time()
             self.stats.successful_transitions += 1
+            # 매크로가 직접 상태를 바꿨으므로 이전 화면의 투표는 무효
+            self.state_voter.reset()
+            if self.capture_thread is not None:
+                self.capture_thread.set_base_fps(self.capture_fps_for_state(new_state))
+    
+    def get_state_dwell(self, now: Optional[float] = None) -> Dict[GameState, float]:
+        """상태별 누적 체류 시간 (현재 상태의 진행 중인 시간 포함)"""
+        now = time.time() if now is None else now
+        dwell = dict(self.stats.state_dwell)
+        dwell[self.current_state] = dwell.get(self.current_state, 0.0) + now - self.last_state_change
+        return dwell
+    
+    def sleep(self, seconds: float, phase: str = "sleep"):
+        """대기 (sleep_scale 배율 적용, 리플레이에서는 0 으로 생략)
+
+        phase 는 구간별 소요 시간 통계에 기록할 대기 이름이다.
+        """
+        if self.sleep_scale > 0:
+            with self.phase_timer.measure(phase):
+                time.sleep(seconds * self.sleep_scale)
     
     def is_state_timeout(self) -> bool:
         """상태 타임아웃 확인"""
@@ -691,25 +1849,23 @@ class SevenKnightsTowerMacro:
             if not self.running:
                 return False
             
-            # 이미지 찾기
-            result = self.find_image_on_screen(image_key)
+            # 이미지 찾기 (프레임 캡처 시각은 클릭 지연 측정용)
+            latest = self.get_latest_frame()
+            result = self.find_image_on_screen(image_key, screen=latest[0]) if latest else None
             if result:
                 x, y, confidence = result
                 try:
                     # 클릭 실행
-                    pyautogui.click(x, y)
+                    self.click(x, y)
+                    self.record_click_latency(time.time() - latest[1])
                     self.logger.info(f"✅ {image_key} 클릭 성공 (시도: {click_attempts + 1}/{self.max_click_attempts})")
                     
                     # 클릭 후 잠시 대기
-                    time.sleep(self.click_delay)
-                    
-                    # 상태 변화 확인
-                    time.sleep(0.5)
-                    new_state = self.detect_game_state()
+                    self.sleep(self.click_delay, "sleep.click_delay")
                     
-                    # 상태가 변경되었거나 해당 이미지가 사라졌으면 성공
-                    if new_state != self.current_state or not self.find_image_on_screen(image_key):
-                        self.logger.info(f"✅ {image_key} 클릭 효과 확인됨")
+                    # 상태 변화 확인 (대기 이후에 캡처된 프레임 하나로 판정)
+                    self.sleep(0.5, "sleep.click_confirm")
+                    if self.confirm_click_effect(image_key, self.capture_screen(newer_than=time.time())):
                         return True
                     
                     click_attempts += 1
@@ -718,14 +1874,40 @@ class SevenKnightsTowerMacro:
                     self.logger.error(f"클릭 실패: {e}")
                     click_attempts += 1
             
-            time.sleep(0.5)
+            self.sleep(0.5, "sleep.click_retry")
         
         self.logger.warning(f"⏰ {image_key} 클릭 실패 (시도: {click_attempts}/{self.max_click_attempts}, 시간: {timeout}초)")
         return False
     
+    def confirm_click_effect(self, image_key: str, screen: Optional[np.ndarray]) -> bool:
+        """클릭 이후 프레임에서 상태가 바뀌었거나 버튼이 사라졌는지 확인"""
+        new_state = self.detect_game_state(screen)
+        
+        # 상태가 변경되었거나 해당 이미지가 사라졌으면 성공
+        if new_state != self.current_state or not self.find_image_on_screen(image_key, screen=screen):
+            self.logger.info(f"✅ {image_key} 클릭 효과 확인됨")
+            return True
+        return False
+    
+    def click(self, x: int, y: int):
+        """클릭 실행 후 화면 변화를 빨리 보도록 캡처 FPS 를 높임"""
+        with self.phase_timer.measure("click"):
+            if self.input_backend is not None:
+                self.input_backend.click(x, y)
+            else:
+                # 프레임 좌표 → 화면 좌표 (캡처 영역이 모니터/게임 창 위치에서 시작)
+                pyautogui.click(self.screen_region['left'] + x, self.screen_region['top'] + y)
+        self.boost_capture()
+        if self.session_recorder is not None:
+            self.session_recorder.record_click(x, y, time.time())
+    
+    def record_click_latency(self, latency: float):
+        """프레임 캡처 → 클릭 전송까지 걸린 시간 기록"""
+        self.click_latencies.append(latency)
+    
     def handle_waiting_state(self) -> bool:
         """무한의 탑 대기 화면 처리"""
-        self.logger.info("🏰 무한의 탑 대기 화면 처리 중...")
+        self.logger.info("🏰 무한의 탑 대기 화면 처리 중...", extra=log_extra("handle.waiting"))
         
         if self.smart_click_image('enter_button'):
             self.stats.enters += 1
@@ -736,7 +1918,7 @@ class SevenKnightsTowerMacro:
     
     def handle_team_formation_state(self) -> bool:
         """팀 편성 화면 처리"""
-        self.logger.info("⚔️  팀 편성 화면 처리 중...")
+        self.logger.info("⚔️  팀 편성 화면 처리 중...", extra=log_extra("handle.formation"))
         
         if self.smart_click_image('start_button'):
             self.stats.starts += 1
@@ -746,53 +1928,59 @@ class SevenKnightsTowerMacro:
         return False
     
     def handle_battle_state(self) -> bool:
-        """전투 중 상태 처리"""
+        """전투 중 상태 처리
+
+        전투 화면이 확인되는 동안은 사전 분류기/HUD 검사만 하며 대기하고,
+        전투 신호가 사라졌을 때만 결과 화면 템플릿을 확인한다.
+        """
         self.logger.info("⚔️  전투 진행 중...")
         
+        battle_start = time.time()
+        proposed = False
+        self.battle_detector.discard()  # 이전 전투(중단된 전투 포함)의 후보는 쓰지 않음
+        
         # 전투 결과 지속적으로 확인
-        for _ in range(10):  # 최대 20초 대기 (2초 × 10)
+        while time.time() - battle_start < self.battle_timeout:
             if not self.running:
+                self.battle_detector.discard()
                 return False
             
-            # 상태 재감지
-            current_state = self.detect_game_state()
-            if current_state == GameState.VICTORY:
-                self.change_state(GameState.VICTORY)
-                return True
-            elif current_state == GameState.DEFEAT:
-                self.change_state(GameState.DEFEAT)
-                return True
+            screen = self.capture_screen()
+            if screen is not None:
+                # 상태 재감지 (전투 화면이면 템플릿 매칭 없이 끝남)
+                current_state = self.detect_game_state(screen)
+                if current_state in (GameState.VICTORY, GameState.DEFEAT):
+                    # 승패가 나온 전투에서 잡은 후보만 전투 시그니처로 저장
+                    self.battle_detector.confirm()
+                    self.change_state(current_state)
+                    return True
+                
+                # 어떤 화면과도 맞지 않는 전투 화면은 시그니처 후보로 기록
+                if (not proposed and current_state == GameState.UNKNOWN and
+                        time.time() - battle_start >= self.battle_learn_delay and
+                        self.is_unrecognized_screen(self.last_state_confidences)):
+                    proposed = self.battle_detector.propose(screen)
             
-            time.sleep(2)
+            self.sleep(self.battle_poll_interval, "sleep.battle_poll")
         
         # 전투가 너무 오래 걸리면 상태 재확인
+        self.battle_detector.discard()
         self.logger.warning("⏰ 전투 시간이 너무 오래 걸림 - 상태 재확인")
         return True
     
+    def is_unrecognized_screen(self, state_confidences: Dict[GameState, float]) -> bool:
+        """모든 상태의 신뢰도가 해제 임계값 미만인지 확인"""
+        for state, confidence in state_confidences.items():
+            if confidence >= self.state_voter.exit_thresholds.get(state, 0.4):
+                return False
+        return True
+    
     def handle_victory_state(self) -> bool:
         """승리 화면 처리"""
         self.logger.info("🏆 승리 화면 처리 중...")
         
         # 스크린샷 촬영 및 층수 인식
-        screenshot = self.capture_screen()
-        if screenshot is not None:
-            floor_num = self.extract_floor_number(screenshot)
-            if floor_num is not None:
-                # 층수별 진행 상태 업데이트
-                self.update_floor_progress(floor_num, is_victory=True)
-                
-                # 승리 스크린샷 촬영 (한 번만)
-                self.take_floor_screenshot(floor_num, is_victory=True)
-                
-                # 진행 상태 저장
-                self.save_progress_to_md()
-            else:
-                self.logger.warning("❌ 층수 인식 실패 - 스크린샷만 저장")
-                # 층수 인식 실패시 일반 스크린샷 저장
-                self.take_screenshot()
-        
-        self.stats.victories += 1
-        self.stats.total_runs += 1
+        self.record_battle_result(self.capture_screen(), is_victory=True)
         
         if self.smart_click_image('next_area'):
             self.stats.next_areas += 1
@@ -806,44 +1994,56 @@ class SevenKnightsTowerMacro:
         self.logger.info("💀 패배 화면 처리 중...")
         
         # 스크린샷 촬영 및 층수 인식
-        screenshot = self.capture_screen()
+        self.record_battle_result(self.capture_screen(), is_victory=False)
+        
+        if self.smart_click_image('lose_button'):
+            self.stats.retries += 1
+            self.change_state(GameState.TEAM_FORMATION)
+            return True
+        
+        return False
+    
+    def record_battle_result(self, screenshot: Optional[np.ndarray], is_victory: bool):
+        """전투 결과 기록 (층수 인식, 층수별 스크린샷, 승패 통계)"""
         if screenshot is not None:
             floor_num = self.extract_floor_number(screenshot)
             if floor_num is not None:
                 # 층수별 진행 상태 업데이트
-                self.update_floor_progress(floor_num, is_victory=False)
+                self.update_floor_progress(floor_num, is_victory=is_victory)
                 
-                # 패배 스크린샷 촬영 (한 번만)
-                self.take_floor_screenshot(floor_num, is_victory=False)
-                
-                # 진행 상태 저장
-                self.save_progress_to_md()
+                if not self.headless:
+                    # 승리/패배 스크린샷 촬영 (한 번만)
+                    self.take_floor_screenshot(floor_num, is_victory=is_victory)
+                    
+                    # 진행 상태 저장
+                    self.save_progress_to_md()
             else:
                 self.logger.warning("❌ 층수 인식 실패 - 스크린샷만 저장")
                 # 층수 인식 실패시 일반 스크린샷 저장
-                self.take_screenshot()
+                self.take_screenshot("ocr_failure")
         
-        self.stats.defeats += 1
+        if is_victory:
+            self.stats.victories += 1
+        else:
+            self.stats.defeats += 1
         self.stats.total_runs += 1
-        
-        if self.smart_click_image('lose_button'):
-            self.stats.retries += 1
-            self.change_state(GameState.TEAM_FORMATION)
-            return True
-        
-        return False
     
     def handle_unknown_state(self) -> bool:
         """알 수 없는 상태 처리 (강화된 버전)"""
-        self.logger.warning("❓ 알 수 없는 상태 - 포괄적 상태 분석 중...")
+        self.logger.warning("❓ 알 수 없는 상태 - 포괄적 상태 분석 중...", extra=log_extra("handle.unknown"))
         
         # 포괄적 상태 분석
-        state_confidences = self.comprehensive_state_detection()
-        
+        if not self.resolve_unknown_state(self.comprehensive_state_detection()):
+            self.sleep(1, "sleep.unknown")
+        return True
+    
+    def resolve_unknown_state(self, state_confidences: Dict[GameState, float]) -> bool:
+        """포괄적 분석 결과로 추정 상태 전환 (상태가 바뀌면 True)"""
         # 모든 상태의 신뢰도 출력
         for state, confidence in state_confidences.items():
             if confidence > 0.3:  # 30% 이상의 신뢰도만 표시
-                self.logger.info(f"   {state.value}: {confidence:.3f}")
+                self.logger.info(f"   {state.value}", extra=log_extra(
+                    f"unknown.{state.value}", confidence=round(confidence, 3)))
         
         # 가장 높은 신뢰도의 상태로 전환
         best_state = max(state_confidences, key=state_confidences.get)
@@ -857,15 +2057,19 @@ class SevenKnightsTowerMacro:
         # 타임아웃 확인
         if self.is_state_timeout():
             self.logger.error("⏰ 상태 타임아웃 - 스크린샷 저장 후 대기 상태로 강제 전환")
-            self.take_screenshot()
+            self.take_screenshot("state_timeout")
             self.change_state(GameState.WAITING)
             return True
         
-        time.sleep(1)
-        return True
+        return False
     
     def run_macro_cycle(self) -> bool:
         """매크로 사이클 실행 (개선된 버전)"""
+        with self.phase_timer.measure("cycle"):
+            return self.run_macro_cycle_once()
+    
+    def run_macro_cycle_once(self) -> bool:
+        """상태 감지 후 현재 상태 처리 (한 사이클)"""
         try:
             # 지속적인 상태 감지
             detected_state = self.detect_game_state()
@@ -890,14 +2094,98 @@ class SevenKnightsTowerMacro:
         
         except Exception as e:
             self.logger.error(f"매크로 사이클 오류: {e}")
-            self.take_screenshot()
+            self.take_screenshot("cycle_error")
             return False
     
     def run_macro(self):
         """매크로 메인 루프"""
         self.logger.info("🚀 매크로 실행 시작")
         self.running = True
+        self.cycles_completed = 0
+        self.wait_for_screen_setup()
+        if self.profiler is not None:
+            self.profiler.start()
+        self.start_capture_thread()
+        self.start_session_recorder()
+        
+        engine = self.config.get("macro_engine", "sequential")
+        if engine == "pipeline":
+            # 캡처 → 감지 → 액션 3단계 파이프라인
+            from macro_pipeline import PipelinedMacroEngine
+            PipelinedMacroEngine(self).run()
+        elif engine == "async":
+            # 코루틴 상태 처리 + 취소 가능한 대기 (단축키 즉시 반영)
+            from macro_async import AsyncMacroRuntime
+            AsyncMacroRuntime(self).run()
+        else:
+            self.run_sequential_loop()
         
+        self.stop_capture_thread()
+        self.stop_session_recorder()
+        self.roi_heatmap.save()
+        self.dump_phase_timings()
+        self.write_profile()
+        self.logger.info("🛑 매크로 실행 중지")
+    
+    def enable_profiling(self, interval: float = 0.005):
+        """run_macro 실행 구간을 샘플링 프로파일러로 측정 (세션마다 collapsed stack 저장)"""
+        self.profiler = SamplingProfiler(interval=interval)
+    
+    def write_profile(self) -> Optional[Path]:
+        """프로파일 결과 저장 (logs/profiles/profile_*.collapsed) 후 요약 출력"""
+        profiler = self.profiler
+        if profiler is None or profiler.thread is None:
+            return None
+        profiler.stop()
+        
+        path = self.logs_dir / "profiles" / f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed"
+        try:
+            profiler.write_collapsed(path)
+        except Exception as e:
+            self.logger.error(f"프로파일 저장 실패: {e}")
+            return None
+        
+        for line in profiler.report_lines():
+            print(line)
+        print(f"🔥 프로파일 저장: {path} (flamegraph.pl 또는 speedscope 로 열기)")
+        # 다음 run_macro 는 새 프로파일로 측정
+        self.profiler = SamplingProfiler(interval=profiler.interval)
+        return path
+    
+    def count_cycle(self):
+        """사이클 완료 기록 (max_cycles 에 도달하면 매크로 정지)"""
+        self.cycles_completed += 1
+        if self.max_cycles is not None and self.cycles_completed >= self.max_cycles:
+            self.logger.info(f"🔁 {self.cycles_completed}사이클 완료 - 매크로 정지")
+            self.running = False
+    
+    def start_session_recorder(self):
+        """세션 녹화 시작 (매크로 실행마다 새 세션)"""
+        if not self.config.get("session_recording", True) or self.session_recorder is not None:
+            return
+        
+        try:
+            recorder = SessionRecorder(
+                self.recordings_dir,
+                scale=self.config.get("recording_scale", 0.25),
+                record_fps=self.config.get("recording_fps", 2),
+                keyframe_interval=self.config.get("recording_keyframe_interval", 30),
+                chunk_frames=self.config.get("recording_chunk_frames", 240),
+                max_bytes=int(self.config.get("recording_max_mb", 1024) * 1024 * 1024)
+            )
+            recorder.start()
+            self.session_recorder = recorder
+        except Exception as e:
+            self.logger.error(f"세션 녹화 시작 실패: {e}")
+    
+    def stop_session_recorder(self):
+        """세션 녹화 종료"""
+        if self.session_recorder is not None:
+            self.session_recorder.stop()
+            self.session_recorder = None
+    
+    def run_sequential_loop(self):
+        """순차 루프 (감지 → 처리 → 대기 반복)"""
         # 초기 상태 감지
         self.logger.info("🔍 초기 상태 감지 중...")
         initial_state = self.detect_game_state()
@@ -910,19 +2198,21 @@ class SevenKnightsTowerMacro:
         while self.running:
             try:
                 if not self.paused:
-                    if not self.run_macro_cycle():
+                    ok = self.run_macro_cycle()
+                    self.count_cycle()
+                    if not self.running:
+                        break
+                    if not ok:
                         self.logger.error("매크로 사이클 실패 - 2초 후 재시도")
-                        time.sleep(2)
+                        self.sleep(2, "sleep.retry")
                 
-                time.sleep(self.state_check_interval)
+                self.sleep(self.state_check_interval, "sleep.state_check")
                 
             except KeyboardInterrupt:
                 break
             except Exception as e:
                 self.logger.error(f"예상치 못한 오류: {e}")
-                time.sleep(2)
-        
-        self.logger.info("🛑 매크로 실행 중지")
+                self.sleep(2, "sleep.retry")
     
     def toggle_macro(self):
         """매크로 토글"""
@@ -933,10 +2223,24 @@ class SevenKnightsTowerMacro:
             self.logger.info("⏸️  매크로 정지")
             self.running = False
     
+    def toggle_pause(self):
+        """일시정지/재개"""
+        self.paused = not self.paused
+        self.logger.info("⏸️  일시정지" if self.paused else "▶️  재개")
+    
     def stop_program(self):
         """프로그램 종료"""
         self.logger.info("🔚 프로그램 종료")
         self.running = False
+        self.macro_logging.rate_limiter.sweep()
+        self.roi_heatmap.save()
+        self.dump_phase_timings()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.disk_janitor is not None:
+            self.disk_janitor.stop()
+        if self.window_tracker is not None:
+            self.window_tracker.stop()
         sys.exit(0)
     
     def show_stats(self):
@@ -962,6 +2266,7 @@ class SevenKnightsTowerMacro:
         print(f"   최대 도달 층수: {self.stats.max_floor_reached}층")
         print(f"   클리어한 층수: {len([p for p in self.stats.floor_progress.values() if p.cleared])}층")
         print(f"   스크린샷 촬영 층수: {len(self.stats.screenshots_taken)}층")
+        print(f"   오류 스크린샷: {self.screenshot_store.saved}장 저장, 중복 {self.screenshot_store.duplicates}회 생략")
         
         print("\n🔄 액션 통계:")
         print(f"   입장 클릭: {self.stats.enters}")
@@ -970,6 +2275,19 @@ class SevenKnightsTowerMacro:
         print(f"   다시하기 클릭: {self.stats.retries}")
         print(f"   상태 감지 시도: {self.stats.state_detection_attempts}")
         
+        if self.click_latencies:
+            latencies = sorted(self.click_latencies)
+            p50 = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+            print(f"   프레임→클릭 지연: p50 {p50:.0f}ms / p95 {p95:.0f}ms ({len(latencies)}회)")
+        
+        # 구간별 소요 시간 (캡처/매칭/대기 중 무엇이 시간을 차지하는지)
+        timing_lines = self.phase_timer.report_lines()
+        if timing_lines:
+            print(f"\n⏱️  구간별 소요 시간 (최근 {self.phase_timer.window / 60:.0f}분, ms):")
+            for line in timing_lines:
+                print(line)
+        
         # 최근 5개 층수 상태 표시
         if self.stats.floor_progress:
             print("\n🔍 최근 층수 상태:")
@@ -981,17 +2299,29 @@ class SevenKnightsTowerMacro:
         
         print("="*70)
     
-    def take_screenshot(self):
-        """스크린샷 저장"""
+    def dump_phase_timings(self):
+        """구간별 소요 시간 통계를 logs/ 에 저장 (종료 시)"""
+        if self.headless or not self.phase_timer.histograms:
+            return
+        try:
+            path = self.logs_dir / f"phase_timings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            self.phase_timer.dump(path)
+            self.logger.info(f"⏱️  구간별 소요 시간 저장: {path.name}")
+        except Exception as e:
+            self.logger.error(f"구간별 소요 시간 저장 실패: {e}")
+    
+    def take_screenshot(self, reason: str = "manual"):
+        """스크린샷 저장 (실패 반복 사유는 최근에 저장한 화면과 거의 같으면 참조 횟수만 증가)"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"screenshot_{timestamp}.png"
-            filepath = self.logs_dir / filename
-            
             screen = self.capture_screen()
             if screen is not None:
-                cv2.imwrite(str(filepath), screen)
-                self.logger.info(f"📸 스크린샷 저장: {filename}")
+                with self.phase_timer.measure("screenshot"):
+                    entry, duplicate = self.screenshot_store.save(screen, reason)
+                if not duplicate:
+                    self.logger.info(f"📸 스크린샷 저장: {entry.path.name}")
+                else:
+                    self.logger.info(f"📸 같은 화면 스크린샷 ({entry.count}회): {entry.path.name}",
+                                     extra=log_extra(f"screenshot.{reason}", count=entry.count))
             
         except Exception as e:
             self.logger.error(f"스크린샷 저장 실패: {e}")
@@ -1013,6 +2343,7 @@ class SevenKnightsTowerMacro:
         print("   4. 승리 시: 다음 지역 → 2번으로")
         print("   5. 패배 시: 다시하기 → 2번으로")
         print("\n⌨️  단축키:")
+        print("   F8: 일시정지/재개")
         print("   F9: 매크로 시작/정지")
         print("   F10: 프로그램 종료")
         print("   F11: 통계 표시")
@@ -1027,10 +2358,34 @@ class SevenKnightsTowerMacro:
 
 def main():
     """메인 함수"""
+    parser = argparse.ArgumentParser(description="Seven Knights 무한의 탑 매크로")
+    parser.add_argument('--profile', action='store_true',
+                        help="매크로 실행 구간을 샘플링 프로파일러로 측정 (logs/profiles/*.collapsed)")
+    parser.add_argument('--profile-cycles', type=int, default=0,
+                        help="바로 시작해서 N 사이클 프로파일링 후 종료")
+    parser.add_argument('--profile-interval', type=float, default=5.0, help="샘플 간격 (ms)")
+    parser.add_argument('--benchmark-startup', action='store_true',
+                        help="준비 완료까지 걸린 시간과 단계별 소요 시간 출력 후 종료")
+    args = parser.parse_args()
+    
     try:
         # 매크로 인스턴스 생성
         macro = SevenKnightsTowerMacro()
         
+        if args.benchmark_startup:
+            macro.report_startup()
+            return
+        
+        if args.profile or args.profile_cycles > 0:
+            macro.enable_profiling(args.profile_interval / 1000)
+        
+        if args.profile_cycles > 0:
+            # F9 없이 바로 실행하고 N 사이클 뒤 결과 저장 후 종료
+            print(f"🔬 {args.profile_cycles}사이클 프로파일링 시작")
+            macro.max_cycles = args.profile_cycles
+            macro.run_macro()
+            return
+        
         # 사용법 출력
         macro.print_usage()
         
@@ -0,0 +1,58 @@
+"""
+Seven Knights 매크로 시작 캐시
+템플릿/마스크/스케일별 템플릿, 기준 화면 시그니처처럼 원본 파일에서 계산하는
+배열을 npz 한 파일에 저장해 두고, 원본 파일(경로, 크기, 수정 시각)과 설정으로
+만든 지문이 같으면 PNG 디코딩과 마스크 생성 없이 바로 불러온다.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+
+class ArrayCache:
+    """지문이 맞을 때만 유효한 배열 묶음 캐시 (npz)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def fingerprint(files: Iterable[Path], settings: Dict[str, Any]) -> str:
+        """원본 파일 상태 + 설정으로 만든 지문 (파일이 바뀌거나 없어지면 달라짐)"""
+        entries = []
+        for path in files:
+            try:
+                stat = path.stat()
+                entries.append([str(path), stat.st_size, stat.st_mtime_ns])
+            except OSError:
+                entries.append([str(path), None, None])
+        payload = json.dumps({"files": entries, "settings": settings}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def load(self, fingerprint: str) -> Optional[Dict[str, np.ndarray]]:
+        """지문이 같으면 저장된 배열 반환 (없거나 다르면 None)"""
+        if not self.path.exists():
+            return None
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    return None
+                return {name: data[name] for name in data.files if name != "fingerprint"}
+        except Exception as e:
+            self.logger.warning(f"캐시 로드 실패 ({self.path.name}): {e}")
+            return None
+
+    def save(self, fingerprint: str, arrays: Dict[str, np.ndarray]):
+        """배열 저장 (임시 파일에 쓴 뒤 교체)"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(self.path.stem + ".tmp.npz")
+            np.savez(temp_path, fingerprint=np.array(fingerprint), **arrays)
+            temp_path.replace(self.path)
+        except Exception as e:
+            self.logger.warning(f"캐시 저장 실패 ({self.path.name}): {e}")
@@ -0,0 +1,60 @@
+"""
+Seven Knights 매크로 템플릿 해상도 정규화
+템플릿은 기준 해상도(기본 1920x1080) 게임 화면에서 잘라낸 것이므로, 실제 게임 화면
+(캡처 영역) 크기를 한 번 재면 템플릿을 줄이거나 키울 정확한 배율을 알 수 있다.
+그 배율로 템플릿 뱅크를 만들면 0.9/1.0/1.1 배율을 모두 매칭해 보는 대신
+템플릿마다 한 번만 매칭한다.
+
+    normalizer = TemplateNormalizer((1920, 1080))
+    bank = normalizer.build_bank(images, masks, normalizer.scale_for(1280, 720))
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# 키: [(배율, 템플릿, 마스크), ...]
+TemplateBank = Dict[str, List[Tuple[float, np.ndarray, Optional[np.ndarray]]]]
+
+
+class TemplateNormalizer:
+    """기준 해상도 템플릿을 캡처 해상도에 맞추는 변환기"""
+
+    def __init__(self, reference_size: Tuple[int, int] = (1920, 1080)):
+        self.reference_size = reference_size  # 템플릿을 추출한 게임 화면 해상도
+
+    def scale_for(self, width: int, height: int) -> Tuple[float, float]:
+        """게임 화면 크기에 대한 가로/세로 배율 (창이 늘어난 경우 둘이 다를 수 있음)"""
+        return width / self.reference_size[0], height / self.reference_size[1]
+
+    @staticmethod
+    def resize(template: np.ndarray, mask: Optional[np.ndarray],
+               scale_x: float, scale_y: float) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """템플릿/마스크 크기 변경 (줄일 때는 INTER_AREA, 키울 때는 INTER_CUBIC)"""
+        h, w = template.shape[:2]
+        new_w, new_h = max(1, int(round(w * scale_x))), max(1, int(round(h * scale_y)))
+        if (new_w, new_h) == (w, h):
+            return template, mask
+        interpolation = cv2.INTER_AREA if new_w * new_h < w * h else cv2.INTER_CUBIC
+        scaled_template = cv2.resize(template, (new_w, new_h), interpolation=interpolation)
+        scaled_mask = None
+        if mask is not None:
+            scaled_mask = cv2.resize(mask, (new_w, new_h), interpolation=cv2.INTER_NEAREST)
+        return scaled_template, scaled_mask
+
+    def build_bank(self, images: Dict[str, np.ndarray], masks: Dict[str, Optional[np.ndarray]],
+                   scale: Tuple[float, float] = (1.0, 1.0), scales: Sequence[float] = (1.0,)) -> TemplateBank:
+        """템플릿 뱅크 생성 (scale 로 정규화한 뒤 scales 배율마다 한 개씩)
+
+        정규화했으면 scales 는 (1.0,) 이면 충분하고, 게임 화면 크기를 모를 때는
+        scale=(1, 1) 과 여러 배율로 기존처럼 탐색한다.
+        """
+        bank = {}
+        for key, template in images.items():
+            mask = masks.get(key)
+            bank[key] = [
+                (factor, *self.resize(template, mask, scale[0] * factor, scale[1] * factor))
+                for factor in scales
+            ]
+        return bank
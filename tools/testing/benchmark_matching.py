@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+템플릿 매칭 벤치마크
+라벨이 붙은 스크린샷 모음에서 매칭 방식별로 지연(p50/p95/p99), 템플릿별/상태별
+정밀도와 재현율, 메모리 사용량을 측정해 표와 JSON 으로 출력한다.
+
+매칭 방식:
+    multiscale  현재 방식 (스케일별 컬러 매칭, 설정된 템플릿만 마스크)
+    grayscale   그레이스케일 변환 후 매칭
+    pyramid     1/2 축소 화면에서 후보 위치를 찾고 원본 해상도로 주변만 재확인
+    roi         학습된 ROI 검색 창 (벤치마크 중 처음부터 학습)
+    masked      모든 템플릿에 자동 마스크 적용
+
+스크린샷 모음 형식 (둘 중 하나):
+    corpus/labels.json   {"파일.png": {"state": "victory", "templates": {"next_area": [x, y]}}}
+    corpus/<상태>/*.png   폴더 이름이 상태 (waiting, formation, battle, victory, defeat)
+
+사용법:
+    python tools/testing/benchmark_matching.py --corpus screenshots/labeled
+    python tools/testing/benchmark_matching.py --simulated 20 --scale 0.5    # 시뮬레이터 화면으로 생성
+    python tools/testing/benchmark_matching.py --simulated 20 --strategies multiscale,pyramid
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+
+from game_state import GameState  # noqa: E402
+from seven_knights_macro_improved import RoiHeatmap, SevenKnightsTowerMacro  # noqa: E402
+
+Match = Optional[Tuple[int, int, float]]
+
+
+@dataclass
+class LabeledFrame:
+    """라벨이 붙은 스크린샷 한 장"""
+    name: str
+    image: np.ndarray
+    state: str
+    positions: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # 템플릿 중심 좌표 (있으면 위치까지 검사)
+
+
+# ----------------------------------------------------------------------
+# 매칭 방식
+# ----------------------------------------------------------------------
+class Strategy(ABC):
+    """매칭 방식 공통 부분 (prepare_frame 은 프레임마다 한 번, locate 는 템플릿마다 호출)"""
+
+    name = ""
+
+    def __init__(self, macro: SevenKnightsTowerMacro):
+        self.macro = macro
+
+    def prepare_frame(self, screen: np.ndarray):
+        self.screen = screen
+
+    @abstractmethod
+    def locate(self, key: str) -> Match:
+        """템플릿 하나의 최고 신뢰도 위치"""
+
+    def bank_bytes(self) -> int:
+        return sum(t.nbytes + (m.nbytes if m is not None else 0)
+                   for entries in self.macro.template_bank.values() for _, t, m in entries)
+
+
+class MultiScaleStrategy(Strategy):
+    name = "multiscale"
+
+    def locate(self, key: str) -> Match:
+        self.macro.use_roi_heatmap = False
+        return self.macro.locate_template(key, self.screen)
+
+
+class RoiStrategy(Strategy):
+    name = "roi"
+
+    def __init__(self, macro: SevenKnightsTowerMacro):
+        super().__init__(macro)
+        # 저장된 학습 결과와 섞이지 않도록 빈 히스토그램에서 시작
+        self.heatmap = RoiHeatmap(macro.config_dir / "roi_heatmap.json",
+                                  min_samples=macro.config.get("roi_min_samples", 3),
+                                  misses_per_level=macro.config.get("roi_misses_per_level", 2),
+                                  persist=False)
+
+    def locate(self, key: str) -> Match:
+        original = self.macro.roi_heatmap
+        self.macro.roi_heatmap = self.heatmap
+        self.macro.use_roi_heatmap = True
+        try:
+            return self.macro.locate_template(key, self.screen)
+        finally:
+            self.macro.roi_heatmap = original
+            self.macro.use_roi_heatmap = False
+
+
+class BankStrategy(Strategy):
+    """자체 템플릿 뱅크로 매칭하는 방식"""
+
+    def __init__(self, macro: SevenKnightsTowerMacro):
+        super().__init__(macro)
+        self.bank = {key: self.build_entries(key, template) for key, template in macro.images.items()}
+
+    @abstractmethod
+    def build_entries(self, key: str, template: np.ndarray):
+        """템플릿 하나의 (배율, 템플릿, 마스크) 목록"""
+
+    def bank_bytes(self) -> int:
+        return sum(t.nbytes + (m.nbytes if m is not None else 0)
+                   for entries in self.bank.values() for _, t, m in entries)
+
+    def best_in(self, area: np.ndarray, entries, offset: Tuple[int, int] = (0, 0)) -> Match:
+        best = None
+        for _, template, mask in entries:
+            if template.shape[0] > area.shape[0] or template.shape[1] > area.shape[1]:
+                continue
+            max_val, max_loc = self.macro.match_template(area, template, mask)
+            if best is None or max_val > best[2]:
+                h, w = template.shape[:2]
+                best = (offset[0] + max_loc[0] + w // 2, offset[1] + max_loc[1] + h // 2, max_val)
+        return best
+
+    def locate(self, key: str) -> Match:
+        return self.best_in(self.screen, self.bank[key])
+
+
+class GrayscaleStrategy(BankStrategy):
+    name = "grayscale"
+
+    def build_entries(self, key: str, template: np.ndarray):
+        gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        mask = self.macro.template_masks.get(key)
+        entries = []
+        for scale in self.macro.template_scales:
+            size = (int(gray.shape[1] * scale), int(gray.shape[0] * scale))
+            entries.append((scale, cv2.resize(gray, size),
+                            cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST) if mask is not None else None))
+        return entries
+
+    def prepare_frame(self, screen: np.ndarray):
+        self.screen = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+
+
+class MaskedStrategy(BankStrategy):
+    name = "masked"
+
+    def build_entries(self, key: str, template: np.ndarray):
+        mask = self.macro.template_masks.get(key)
+        if mask is None:
+            mask = self.macro.build_auto_mask(key, template)
+        entries = []
+        for scale in self.macro.template_scales:
+            size = (int(template.shape[1] * scale), int(template.shape[0] * scale))
+            entries.append((scale, cv2.resize(template, size),
+                            cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST) if mask is not None else None))
+        return entries
+
+
+class PyramidStrategy(BankStrategy):
+    name = "pyramid"
+    coarse_scale = 0.5
+
+    def build_entries(self, key: str, template: np.ndarray):
+        # (스케일, 축소 템플릿, 원본 템플릿) - 마스크는 원본 확인 단계에서만 사용
+        entries = []
+        for _, full, mask in self.macro.template_bank[key]:
+            size = (max(1, int(full.shape[1] * self.coarse_scale)), max(1, int(full.shape[0] * self.coarse_scale)))
+            entries.append((cv2.resize(full, size, interpolation=cv2.INTER_AREA), full, mask))
+        return entries
+
+    def bank_bytes(self) -> int:
+        return sum(c.nbytes for entries in self.bank.values() for c, _, _ in entries) + super(BankStrategy, self).bank_bytes()
+
+    def prepare_frame(self, screen: np.ndarray):
+        self.screen = screen
+        size = (int(screen.shape[1] * self.coarse_scale), int(screen.shape[0] * self.coarse_scale))
+        self.coarse = cv2.resize(screen, size, interpolation=cv2.INTER_AREA)
+
+    def locate(self, key: str) -> Match:
+        best = None
+        for coarse_template, full, mask in self.bank[key]:
+            if coarse_template.shape[0] > self.coarse.shape[0] or coarse_template.shape[1] > self.coarse.shape[1]:
+                continue
+            _, max_loc = self.macro.match_template(self.coarse, coarse_template)
+
+            # 후보 주변 (템플릿 크기 + 여백) 만 원본 해상도로 재확인
+            h, w = full.shape[:2]
+            pad = 8
+            x0 = max(0, int(max_loc[0] / self.coarse_scale) - pad)
+            y0 = max(0, int(max_loc[1] / self.coarse_scale) - pad)
+            x1 = min(self.screen.shape[1], x0 + w + 2 * pad)
+            y1 = min(self.screen.shape[0], y0 + h + 2 * pad)
+            match = self.best_in(self.screen[y0:y1, x0:x1], [(None, full, mask)], (x0, y0))
+            if match is not None and (best is None or match[2] > best[2]):
+                best = match
+        return best
+
+
+STRATEGIES = {cls.name: cls for cls in (MultiScaleStrategy, GrayscaleStrategy, PyramidStrategy,
+                                        RoiStrategy, MaskedStrategy)}
+
+
+# ----------------------------------------------------------------------
+# 스크린샷 모음
+# ----------------------------------------------------------------------
+def load_corpus(corpus_dir: Path) -> List[LabeledFrame]:
+    """labels.json 또는 상태별 폴더에서 라벨이 붙은 스크린샷 로드"""
+    frames = []
+    labels_path = corpus_dir / "labels.json"
+    if labels_path.exists():
+        with open(labels_path, 'r', encoding='utf-8') as f:
+            labels = json.load(f)
+        for name, label in labels.items():
+            image = cv2.imread(str(corpus_dir / name), cv2.IMREAD_COLOR)
+            if image is None:
+                print(f"⚠️  이미지를 읽을 수 없음: {name}")
+                continue
+            positions = {key: tuple(pos) for key, pos in label.get("templates", {}).items()}
+            frames.append(LabeledFrame(name, image, label["state"], positions))
+        return frames
+
+    for state in GameState:
+        for path in sorted((corpus_dir / state.value).glob("*.png")):
+            image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            if image is not None:
+                frames.append(LabeledFrame(f"{state.value}/{path.name}", image, state.value))
+    return frames
+
+
+def simulated_corpus(count: int, scale: float, seed: int):
+    """게임 시뮬레이터 화면에 밝기/잡음/크기 변화를 줘서 라벨이 붙은 스크린샷 생성"""
+    from game_simulator import BUTTONS, MARKERS, SimulatedMacro, SimulatedTowerGame
+
+    game = SimulatedTowerGame(scale=scale, seed=seed)
+    macro = SimulatedMacro(game)
+    rng = np.random.default_rng(seed)
+
+    # 기준 해상도 템플릿을 시뮬레이터 배율로 맞춘 뒤, 화면 크기를 흔들므로(jitter) 다시 여러 배율로 탐색
+    normalized = macro.template_normalizer.build_bank(macro.images, macro.template_masks,
+                                                      macro.template_normalizer.scale_for(*game.frame_size()))
+    macro.images = {key: entries[0][1] for key, entries in normalized.items()}
+    macro.template_masks = {key: entries[0][2] for key, entries in normalized.items()}
+    macro.build_template_bank()
+
+    screens = dict(game.screens)
+    screens['battle'] = game.battle_frames[0]
+    rects = {}
+    for key, (screen, rect, *_) in list(BUTTONS.items()) + list(MARKERS.items()):
+        rects.setdefault(screen, {})[key] = rect
+
+    frames = []
+    for state, base in screens.items():
+        for i in range(count):
+            jitter = float(rng.choice(macro.template_scales))
+            image = cv2.resize(base, None, fx=jitter, fy=jitter, interpolation=cv2.INTER_AREA) if jitter != 1.0 else base
+            image = cv2.convertScaleAbs(image, alpha=float(rng.uniform(0.9, 1.1)), beta=float(rng.uniform(-12, 12)))
+            noise = rng.normal(0, 4, image.shape)
+            image = np.clip(image.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+            positions = {}
+            for key, rect in rects.get(state, {}).items():
+                x0, y0, x1, y1 = game.scaled_rect(rect)
+                positions[key] = (int((x0 + x1) / 2 * jitter), int((y0 + y1) / 2 * jitter))
+            frames.append(LabeledFrame(f"{state}_{i:03d}", image, state, positions))
+    return macro, frames
+
+
+# ----------------------------------------------------------------------
+# 측정
+# ----------------------------------------------------------------------
+def expected_templates(macro: SevenKnightsTowerMacro) -> Dict[str, List[str]]:
+    """상태별로 화면에 있어야 하는 템플릿 (상태 판정 이미지 + 클릭 버튼)"""
+    expected = {}
+    for state in GameState:
+        keys = list(macro.state_images.get(state, []))
+        action = macro.state_actions.get(state)
+        if action is not None and action[0] not in keys:
+            keys.append(action[0])
+        expected[state.value] = [key for key in keys if key in macro.images]
+    return expected
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    array = np.array(values) * 1000
+    return {f"p{q}": float(np.percentile(array, q)) for q in (50, 95, 99)}
+
+
+def precision_recall(counts: Dict[str, int]) -> Dict[str, float]:
+    tp, fp, fn = counts["tp"], counts["fp"], counts["fn"]
+    return {
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "recall": tp / (tp + fn) if tp + fn else 1.0,
+        **counts
+    }
+
+
+def run_strategy(name: str, macro: SevenKnightsTowerMacro, frames: List[LabeledFrame]) -> Dict:
+    """매칭 방식 하나로 스크린샷 모음 전체를 측정"""
+    expected = expected_templates(macro)
+    thresholds = {key: macro.state_specific_thresholds.get(key, macro.match_threshold) for key in macro.images}
+    state_keys = {state.value: keys for state, keys in macro.state_images.items()}
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    strategy = STRATEGIES[name](macro)
+
+    call_times: List[float] = []
+    frame_times: List[float] = []
+    template_counts = {key: {"tp": 0, "fp": 0, "fn": 0} for key in macro.images}
+    state_counts = {state.value: {"tp": 0, "fp": 0, "fn": 0} for state in GameState}
+
+    for frame in frames:
+        frame_start = time.perf_counter()
+        strategy.prepare_frame(frame.image)
+        matches = {}
+        for key in macro.images:
+            call_start = time.perf_counter()
+            matches[key] = strategy.locate(key)
+            call_times.append(time.perf_counter() - call_start)
+        frame_times.append(time.perf_counter() - frame_start)
+
+        # 템플릿별 판정 (위치 라벨이 있으면 허용 오차 안이어야 정답)
+        for key, match in matches.items():
+            found = match is not None and match[2] >= thresholds[key]
+            should = key in expected.get(frame.state, [])
+            if found and should and key in frame.positions:
+                tolerance = max(10, macro.images[key].shape[1] // 4)
+                px, py = frame.positions[key]
+                if abs(match[0] - px) > tolerance or abs(match[1] - py) > tolerance:
+                    template_counts[key]["fp"] += 1
+                    template_counts[key]["fn"] += 1
+                    continue
+            if found and should:
+                template_counts[key]["tp"] += 1
+            elif found:
+                template_counts[key]["fp"] += 1
+            elif should:
+                template_counts[key]["fn"] += 1
+
+        # 상태 판정: 임계값을 넘은 상태 중 신뢰도 최고 (템플릿이 없는 상태는 unknown 으로 봄)
+        predicted = GameState.UNKNOWN.value
+        best = 0.0
+        for state, keys in state_keys.items():
+            for key in keys:
+                match = matches.get(key)
+                if match is not None and match[2] >= thresholds[key] and match[2] > best:
+                    predicted, best = state, match[2]
+        truth = frame.state if state_keys.get(frame.state) else GameState.UNKNOWN.value
+        if predicted == truth:
+            state_counts[truth]["tp"] += 1
+        else:
+            state_counts[predicted]["fp"] += 1
+            state_counts[truth]["fn"] += 1
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "strategy": name,
+        "frames": len(frames),
+        "call_latency_ms": percentiles(call_times),
+        "frame_latency_ms": percentiles(frame_times),
+        "templates": {key: precision_recall(counts) for key, counts in template_counts.items()},
+        "states": {state: precision_recall(counts) for state, counts in state_counts.items()
+                   if any(counts.values())},
+        "memory": {
+            "template_bank_bytes": strategy.bank_bytes(),
+            "peak_traced_bytes": peak
+        }
+    }
+
+
+def print_report(results: List[Dict]):
+    """표 출력"""
+    print("\n" + "=" * 88)
+    print(f"{'방식':<12}{'호출 p50':>10}{'p95':>8}{'p99':>8}{'프레임 p50':>12}{'p95':>8}{'p99':>8}"
+          f"{'정밀도':>8}{'재현율':>8}{'뱅크(KB)':>10}")
+    for r in results:
+        tp = sum(c["tp"] for c in r["templates"].values())
+        fp = sum(c["fp"] for c in r["templates"].values())
+        fn = sum(c["fn"] for c in r["templates"].values())
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        call, frame = r["call_latency_ms"], r["frame_latency_ms"]
+        print(f"{r['strategy']:<12}{call['p50']:>10.1f}{call['p95']:>8.1f}{call['p99']:>8.1f}"
+              f"{frame['p50']:>12.1f}{frame['p95']:>8.1f}{frame['p99']:>8.1f}"
+              f"{precision:>8.2f}{recall:>8.2f}{r['memory']['template_bank_bytes'] / 1024:>10.0f}")
+    print("(지연 단위: ms)")
+
+    for r in results:
+        print(f"\n🔍 {r['strategy']} - 템플릿별 / 상태별 정밀도·재현율")
+        for key, c in r["templates"].items():
+            print(f"   {key:<14} P {c['precision']:.2f}  R {c['recall']:.2f}  (TP {c['tp']}, FP {c['fp']}, FN {c['fn']})")
+        for state, c in r["states"].items():
+            print(f"   [{state:<12}] P {c['precision']:.2f}  R {c['recall']:.2f}  (TP {c['tp']}, FP {c['fp']}, FN {c['fn']})")
+    print("=" * 88)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="템플릿 매칭 방식별 지연/정확도/메모리 벤치마크")
+    parser.add_argument('--corpus', help="라벨이 붙은 스크린샷 디렉토리")
+    parser.add_argument('--simulated', type=int, default=0, help="시뮬레이터 화면으로 상태별 N장 생성")
+    parser.add_argument('--strategies', default=','.join(STRATEGIES), help="측정할 방식 (쉼표 구분)")
+    parser.add_argument('--output', help="JSON 결과 파일 (기본: logs/benchmarks/matching_<시각>.json)")
+    parser.add_argument('--scale', type=float, default=1.0, help="시뮬레이터 화면 배율 (1.0 = 1920x1080)")
+    parser.add_argument('--seed', type=int, default=7, help="시뮬레이터 난수 시드")
+    args = parser.parse_args()
+
+    print("🧪 템플릿 매칭 벤치마크")
+    print("=" * 60)
+
+    if args.simulated > 0:
+        macro, frames = simulated_corpus(args.simulated, args.scale, args.seed)
+    elif args.corpus:
+        macro = SevenKnightsTowerMacro(frame_source=lambda: None, headless=True)
+        frames = load_corpus(Path(args.corpus))
+    else:
+        parser.error("--corpus 또는 --simulated 중 하나가 필요합니다")
+
+    if not frames:
+        print("❌ 스크린샷이 없습니다")
+        sys.exit(1)
+
+    # 매칭마다 찍히는 로그는 측정을 방해하므로 끔
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"📸 스크린샷 {len(frames)}장, 템플릿 {len(macro.images)}개")
+
+    results = []
+    for name in [n.strip() for n in args.strategies.split(',') if n.strip()]:
+        if name not in STRATEGIES:
+            print(f"⚠️  알 수 없는 방식: {name}")
+            continue
+        print(f"   ▶ {name} 측정 중...")
+        results.append(run_strategy(name, macro, frames))
+
+    print_report(results)
+
+    output = Path(args.output) if args.output else \
+        macro.logs_dir / "benchmarks" / f"matching_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({"created_at": datetime.now().isoformat(), "frames": len(frames), "results": results},
+                  f, ensure_ascii=False, indent=2)
+    print(f"💾 결과 저장: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+매크로 엔진 클릭 지연 벤치마크
+가상 게임 화면을 만들어 순차 루프, 파이프라인 엔진, 비동기 엔진을 같은 조건에서
+실행하고 "버튼이 화면에 나타난 시각 → 클릭 전송 시각" 지연과
+정지 단축키(F9) → 매크로 종료까지 걸린 시간을 비교한다.
+
+사용법:
+    python tools/testing/benchmark_pipeline.py --duration 30
+    python tools/testing/benchmark_pipeline.py --engines sequential,async
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from seven_knights_macro_improved import SevenKnightsTowerMacro  # noqa: E402
+
+FRAME_SHAPE = (360, 640, 3)
+BUTTON_SIZE = (40, 110)  # (높이, 너비)
+
+# 화면별로 표시되는 버튼과 위치 (좌상단 x, y)
+SCREEN_BUTTONS = {
+    'waiting': {'enter_button': (470, 280)},
+    'formation': {'start_button': (490, 290)},
+    'battle': {},
+    'victory': {'win_victory': (265, 80), 'next_area': (370, 280)},
+    'defeat': {'lose_button': (265, 280)},
+}
+
+# 버튼 클릭 후 이동할 화면
+BUTTON_TRANSITIONS = {
+    'enter_button': 'formation',
+    'start_button': 'battle',
+    'next_area': 'formation',
+    'lose_button': 'formation',
+}
+
+
+class FakeTowerGame:
+    """벤치마크용 가상 무한의 탑 화면
+
+    화면이 바뀐 뒤 appear_delay 초가 지나야 버튼이 나타나고, 버튼 영역을
+    클릭하면 다음 화면으로 넘어간다. 버튼이 나타난 시각과 클릭 시각의 차이를
+    클릭 지연으로 기록한다.
+    """
+
+    def __init__(self, seed: int = 7, appear_delay: float = 0.4, battle_duration: float = 3.0,
+                 win_rate: float = 0.7):
+        self.rng = np.random.default_rng(seed)
+        self.appear_delay = appear_delay
+        self.battle_duration = battle_duration
+        self.win_rate = win_rate
+        self.lock = threading.Lock()
+
+        # 버튼 템플릿과 화면 배경은 고정 잡음 패턴
+        self.templates = {key: self.rng.integers(0, 256, BUTTON_SIZE + (3,), dtype=np.uint8)
+                          for key in ['enter_button', 'start_button', 'win_victory', 'next_area', 'lose_button']}
+        self.backgrounds = {screen: self.rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8)
+                            for screen in SCREEN_BUTTONS}
+
+        self.click_latencies = []
+        self.floors_cleared = 0
+        self.screen = 'waiting'
+        self.screen_changed_at = time.time()
+
+    def set_screen(self, screen: str):
+        """화면 전환"""
+        self.screen = screen
+        self.screen_changed_at = time.time()
+
+    def update(self):
+        """시간 경과에 따른 화면 전환 (전투 종료)"""
+        if self.screen == 'battle' and time.time() - self.screen_changed_at >= self.battle_duration:
+            if self.rng.random() < self.win_rate:
+                self.floors_cleared += 1
+                self.set_screen('victory')
+            else:
+                self.set_screen('defeat')
+
+    def buttons_visible(self) -> bool:
+        return time.time() - self.screen_changed_at >= self.appear_delay
+
+    def render(self) -> np.ndarray:
+        """현재 화면 프레임 (BGR)"""
+        with self.lock:
+            self.update()
+            frame = self.backgrounds[self.screen].copy()
+            if self.buttons_visible():
+                for key, (x, y) in SCREEN_BUTTONS[self.screen].items():
+                    h, w = BUTTON_SIZE
+                    frame[y:y + h, x:x + w] = self.templates[key]
+            return frame
+
+    def click(self, x: int, y: int):
+        """클릭 처리 (버튼 영역이면 지연 기록 후 화면 전환)"""
+        with self.lock:
+            self.update()
+            if not self.buttons_visible():
+                return
+            for key, (bx, by) in SCREEN_BUTTONS[self.screen].items():
+                h, w = BUTTON_SIZE
+                if key in BUTTON_TRANSITIONS and bx <= x < bx + w and by <= y < by + h:
+                    appeared_at = self.screen_changed_at + self.appear_delay
+                    self.click_latencies.append(time.time() - appeared_at)
+                    self.set_screen(BUTTON_TRANSITIONS[key])
+                    return
+
+
+class BenchmarkMacro(SevenKnightsTowerMacro):
+    """가상 게임에 연결된 매크로 (키보드/모니터/진행 파일을 건드리지 않음)"""
+
+    def __init__(self, game: FakeTowerGame, engine: str):
+        self.game = game
+        self.engine = engine
+        super().__init__()
+
+    def load_config(self):
+        super().load_config()
+        # 실제 학습 데이터가 가상 화면으로 오염되지 않도록 비활성화
+        self.config.update({"macro_engine": self.engine, "use_roi_heatmap": False,
+                            "use_screen_classifier": False, "use_capture_thread": True})
+        self.use_roi_heatmap = False
+        self.use_capture_thread = True
+
+    def setup_images(self):
+        self.images = dict(self.game.templates)
+        self.template_masks = {key: None for key in self.images}
+        self.build_template_bank()
+        self.setup_roi_heatmap()
+
+    def setup_screen_capture(self):
+        self.screen_region = {'left': 0, 'top': 0, 'width': FRAME_SHAPE[1], 'height': FRAME_SHAPE[0]}
+        self.monitor_index = 1
+        self.frame_source = self.game.render
+
+    def setup_keyboard_shortcuts(self):
+        pass
+
+    def load_progress_from_md(self):
+        pass
+
+    def save_progress_to_md(self):
+        pass
+
+    def take_screenshot(self, reason: str = "manual"):
+        pass
+
+    def click(self, x: int, y: int):
+        self.game.click(x, y)
+        self.boost_capture()
+
+
+def percentile(values, ratio: float) -> float:
+    """단순 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def run_engine(engine: str, duration: float, seed: int) -> dict:
+    """엔진 하나를 duration 초 동안 실행하고 결과 반환"""
+    game = FakeTowerGame(seed=seed)
+    macro = BenchmarkMacro(game, engine)
+
+    runner = threading.Thread(target=macro.run_macro, daemon=True)
+    runner.start()
+    time.sleep(duration)
+
+    # F9 단축키와 같은 경로로 정지 요청
+    stop_requested = time.perf_counter()
+    macro.on_hotkey('toggle')
+    runner.join(timeout=30)
+    stop_latency = time.perf_counter() - stop_requested
+
+    latencies = game.click_latencies
+    return {
+        'engine': engine,
+        'clicks': len(latencies),
+        'floors': game.floors_cleared,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'max_ms': max(latencies) * 1000 if latencies else 0.0,
+        'stop_ms': stop_latency * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="매크로 엔진 클릭 지연 벤치마크")
+    parser.add_argument('--duration', type=float, default=30.0, help="엔진별 실행 시간 (초)")
+    parser.add_argument('--seed', type=int, default=7, help="가상 게임 난수 시드")
+    parser.add_argument('--engines', default='sequential,pipeline,async', help="비교할 엔진 (쉼표 구분)")
+    args = parser.parse_args()
+
+    print("🧪 매크로 엔진 클릭 지연 벤치마크")
+    print("=" * 60)
+
+    engines = [engine.strip() for engine in args.engines.split(',') if engine.strip()]
+    results = [run_engine(engine, args.duration, args.seed) for engine in engines]
+
+    print("\n" + "=" * 70)
+    print(f"{'엔진':<12}{'클릭':>6}{'층수':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}{'정지(ms)':>10}")
+    for r in results:
+        print(f"{r['engine']:<12}{r['clicks']:>6}{r['floors']:>6}{r['p50_ms']:>10.0f}"
+              f"{r['p95_ms']:>10.0f}{r['max_ms']:>10.0f}{r['stop_ms']:>10.0f}")
+
+    baseline = results[0]
+    for r in results[1:]:
+        if baseline['p50_ms'] > 0:
+            improvement = (1 - r['p50_ms'] / baseline['p50_ms']) * 100
+            print(f"\n📉 {r['engine']} p50 클릭 지연 {improvement:.0f}% 감소 ({baseline['engine']} 대비)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
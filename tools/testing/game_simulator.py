@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+무한의 탑 게임 플로우 시뮬레이터
+resources/button_images/ 의 기준 화면(대기/팀 편성/승리/패배)을 가상 프레임 버퍼에
+그려 주고, 버튼 좌표 클릭에 반응하며, 전투 시간과 승률을 설정한 분포로 흉내 낸다.
+SevenKnightsTowerMacro 를 헤드리스로 연결해 시간당 층수, 클릭 지연, CPU 사용률을
+측정하므로 게임이 없는 Linux CI 에서도 같은 조건의 처리량 벤치마크를 돌릴 수 있다.
+
+사용법:
+    python tools/testing/game_simulator.py --duration 300
+    python tools/testing/game_simulator.py --engine pipeline --battle-mean 20 --win-rate 0.6
+"""
+
+import argparse
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+
+from seven_knights_macro_improved import SevenKnightsTowerMacro  # noqa: E402
+
+SCREENS_DIR = ROOT_DIR / "resources" / "button_images"
+
+# 화면별 기준 이미지 (1920x1080)
+SCREEN_IMAGES = {
+    'waiting': 'tower_waiting_screen.png',
+    'formation': 'team_formation_screen.png',
+    'victory': 'real_victory_screen.png',
+    'defeat': 'real_defeat_screen.png',
+}
+
+# 클릭 가능한 버튼: 키 → (화면, (x0, y0, x1, y1), 클릭 후 화면)  좌표는 1920x1080 기준
+# 기준 화면 네 장 모두 같은 자리에 같은 모양(글꼴이 없어 "?" 로 표시된 라벨)의 버튼이 있다.
+BUTTONS = {
+    'enter_button': ('waiting', (1398, 918, 1703, 1002), 'formation'),
+    'start_button': ('formation', (1398, 918, 1703, 1002), 'battle'),
+    'next_area': ('victory', (1398, 918, 1703, 1002), 'formation'),
+    'lose_button': ('defeat', (1398, 918, 1703, 1002), 'formation'),
+}
+
+# 클릭하지 않는 판정용 이미지
+MARKERS = {
+    'win_victory': ('victory', (815, 125, 1185, 245)),
+}
+
+# 같은 모양의 버튼은 서로의 화면에서도 매칭되므로, 버튼마다 아이콘/라벨/색을 다시 그려 구분한다
+# (실제 게임처럼 버튼마다 입장/시작/다음 지역/다시하기 라벨이 다름). 키 → (아이콘, 라벨, BGR 색)
+BUTTON_STYLES = {
+    'enter_button': ('arrows', 'ENTER', (0, 215, 255)),
+    'start_button': ('cross', 'START', (60, 200, 60)),
+    'next_area': ('square', 'NEXT AREA', (255, 200, 0)),
+    'lose_button': ('ring', 'RETRY', (200, 60, 200)),
+}
+
+TEMPLATE_PADDING = 12  # 판정용 이미지 템플릿에 포함할 배경 여백
+TEMPLATE_INSET = 8  # 버튼 템플릿은 테두리 안쪽(아이콘 + 라벨)만 사용 (버튼 윤곽은 모든 화면이 같음)
+CROSS_MATCH_LIMIT = 0.6  # 템플릿이 다른 화면에서 이 신뢰도 이상으로 매칭되면 잘못 자른 템플릿
+
+
+@dataclass
+class Distribution:
+    """정규 분포 (최소값으로 자름)"""
+    mean: float
+    std: float = 0.0
+    minimum: float = 0.0
+
+    def sample(self, rng: np.random.Generator) -> float:
+        value = rng.normal(self.mean, self.std) if self.std > 0 else self.mean
+        return max(self.minimum, float(value))
+
+
+class SimulatedTowerGame:
+    """가상 무한의 탑
+
+    호출하면 현재 화면 프레임(BGR)을 반환하고(frame_source), click(x, y) 로
+    입력을 받는다(input_backend). 화면 전환 후 transition 동안은 로딩(검은)
+    화면이 보이고, 그 뒤 버튼이 나타난 시각부터 클릭까지를 지연으로 기록한다.
+    """
+
+    def __init__(self, scale: float = 1.0, battle: Distribution = Distribution(20.0, 5.0, 3.0),
+                 transition: Distribution = Distribution(0.5, 0.2, 0.1), win_rate: float = 0.7,
+                 seed: int = 7):
+        self.scale = scale
+        self.battle = battle
+        self.transition = transition
+        self.win_rate = win_rate
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+
+        references: Dict[str, np.ndarray] = {}
+        self.screens: Dict[str, np.ndarray] = {}
+        for name, filename in SCREEN_IMAGES.items():
+            image = cv2.imread(str(SCREENS_DIR / filename), cv2.IMREAD_COLOR)
+            if image is None:
+                raise FileNotFoundError(f"기준 화면이 없습니다: {SCREENS_DIR / filename}")
+            references[name] = image
+        self.draw_buttons(references)
+        for name, image in references.items():
+            self.screens[name] = self.resize(image)
+
+        height, width = self.screens['waiting'].shape[:2]
+        self.loading = np.zeros((height, width, 3), dtype=np.uint8)
+        self.battle_frames = self.make_battle_frames(width, height)
+        self.templates = self.make_templates(references)
+
+        # 진행 상태
+        self.screen = 'waiting'
+        self.visible_at = time.time()
+        self.battle_ends_at = 0.0
+
+        # 측정값
+        self.floors_cleared = 0
+        self.defeats = 0
+        self.click_latencies: List[float] = []
+        self.misclicks = 0
+
+    def resize(self, image: np.ndarray) -> np.ndarray:
+        if self.scale == 1.0:
+            return image
+        size = (int(image.shape[1] * self.scale), int(image.shape[0] * self.scale))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def scaled_rect(self, rect: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        return tuple(int(v * self.scale) for v in rect)
+
+    def make_battle_frames(self, width: int, height: int) -> List[np.ndarray]:
+        """전투 화면 (기준 이미지가 없으므로 움직이는 도형으로 합성)"""
+        frames = []
+        for _ in range(4):
+            frame = np.full((height, width, 3), (40, 70, 40), dtype=np.uint8)
+            for _ in range(12):
+                center = (int(self.rng.integers(0, width)), int(self.rng.integers(0, height)))
+                radius = int(self.rng.integers(10, max(11, height // 6)))
+                color = tuple(int(c) for c in self.rng.integers(0, 256, 3))
+                cv2.circle(frame, center, radius, color, -1)
+            frames.append(frame)
+        return frames
+
+    @staticmethod
+    def draw_buttons(references: Dict[str, np.ndarray]):
+        """기준 화면의 버튼을 버튼별 아이콘/라벨/색으로 다시 그림"""
+        ink = (0, 0, 0)
+        for key, (icon, label, color) in BUTTON_STYLES.items():
+            screen, (x0, y0, x1, y1), _ = BUTTONS[key]
+            image = references[screen]
+            # 라벨이 버튼 밖으로 넘친 부분까지 배경색으로 지움
+            background = tuple(int(c) for c in image[y0 - 4, x0 - 4])
+            cv2.rectangle(image, (x0, y0), (image.shape[1] - 1, y1), background, -1)
+            cv2.rectangle(image, (x0, y0), (x1, y1), color, -1)
+
+            cx, cy = x0 + 45, (y0 + y1) // 2
+            if icon == 'arrows':
+                for dx in (-14, 10):
+                    points = np.array([[cx + dx - 12, cy - 22], [cx + dx + 12, cy], [cx + dx - 12, cy + 22]])
+                    cv2.fillPoly(image, [points], ink)
+            elif icon == 'cross':
+                cv2.line(image, (cx - 20, cy - 20), (cx + 20, cy + 20), ink, 6)
+                cv2.line(image, (cx - 20, cy + 20), (cx + 20, cy - 20), ink, 6)
+            elif icon == 'square':
+                cv2.rectangle(image, (cx - 22, cy - 22), (cx + 22, cy + 22), ink, 4)
+            elif icon == 'ring':
+                cv2.circle(image, (cx, cy), 22, ink, 5)
+
+            _, height = cv2.getTextSize(label, cv2.FONT_HERSHEY_DUPLEX, 1.2, 2)[0]
+            cv2.putText(image, label, (x0 + 85, (y0 + y1 + height) // 2),
+                        cv2.FONT_HERSHEY_DUPLEX, 1.2, ink, 2, cv2.LINE_AA)
+
+    def make_templates(self, references: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """매크로가 사용할 템플릿을 1920x1080 기준 화면에서 잘라냄
+
+        실제 템플릿처럼 화면 배율과 상관없이 기준 해상도 크기이므로, scale 이 1 이 아니면
+        매크로의 템플릿 정규화가 배율을 맞춰야 한다. 템플릿이 다른 화면에서도 매칭되면
+        상태 오판을 잡을 수 없으므로 자를 때 컬러/흑백 모두 확인한다.
+        """
+        templates = {}
+        for key, (screen, rect, *_) in list(BUTTONS.items()) + list(MARKERS.items()):
+            x0, y0, x1, y1 = rect
+            pad = -TEMPLATE_INSET if key in BUTTONS else TEMPLATE_PADDING
+            template = references[screen][max(0, y0 - pad):y1 + pad, max(0, x0 - pad):x1 + pad].copy()
+            for other, other_image in references.items():
+                if other == screen:
+                    continue
+                for convert in (None, cv2.COLOR_BGR2GRAY):
+                    area = other_image if convert is None else cv2.cvtColor(other_image, convert)
+                    needle = template if convert is None else cv2.cvtColor(template, convert)
+                    _, confidence, _, _ = cv2.minMaxLoc(cv2.matchTemplate(area, needle, cv2.TM_CCOEFF_NORMED))
+                    if confidence >= CROSS_MATCH_LIMIT:
+                        raise ValueError(f"{key} 템플릿이 {other} 화면에서도 매칭됨 (신뢰도 {confidence:.2f})")
+            templates[key] = template
+        return templates
+
+    def frame_size(self) -> Tuple[int, int]:
+        height, width = self.loading.shape[:2]
+        return width, height
+
+    def set_screen(self, screen: str):
+        """화면 전환 (로딩 시간 후 표시)"""
+        self.screen = screen
+        self.visible_at = time.time() + self.transition.sample(self.rng)
+        if screen == 'battle':
+            self.battle_ends_at = self.visible_at + self.battle.sample(self.rng)
+
+    def update(self):
+        """전투 종료 처리"""
+        if self.screen == 'battle' and time.time() >= self.battle_ends_at:
+            if self.rng.random() < self.win_rate:
+                self.floors_cleared += 1
+                self.set_screen('victory')
+            else:
+                self.defeats += 1
+                self.set_screen('defeat')
+
+    def __call__(self) -> np.ndarray:
+        """현재 프레임 (frame_source)"""
+        with self.lock:
+            self.update()
+            now = time.time()
+            if now < self.visible_at:
+                return self.loading.copy()
+            if self.screen == 'battle':
+                return self.battle_frames[int(now * 4) % len(self.battle_frames)].copy()
+            return self.screens[self.screen].copy()
+
+    def click(self, x: int, y: int):
+        """클릭 처리 (input_backend)"""
+        with self.lock:
+            self.update()
+            now = time.time()
+            if now >= self.visible_at:
+                for screen, rect, next_screen in BUTTONS.values():
+                    x0, y0, x1, y1 = self.scaled_rect(rect)
+                    if screen == self.screen and x0 <= x < x1 and y0 <= y < y1:
+                        self.click_latencies.append(now - self.visible_at)
+                        self.set_screen(next_screen)
+                        return
+            self.misclicks += 1
+
+
+class SimulatedMacro(SevenKnightsTowerMacro):
+    """시뮬레이터 템플릿을 사용하는 헤드리스 매크로"""
+
+    def __init__(self, game: SimulatedTowerGame):
+        self.game = game
+        super().__init__(frame_source=game, input_backend=game, headless=True)
+
+    def setup_images(self):
+        self.images = dict(self.game.templates)
+        self.template_masks = {key: None for key in self.images}
+        self.build_template_bank()
+        self.setup_roi_heatmap()
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def run_simulation(args) -> Dict:
+    """시뮬레이터에 매크로를 연결해 duration 초 동안 실행"""
+    game = SimulatedTowerGame(
+        scale=args.scale,
+        battle=Distribution(args.battle_mean, args.battle_std, args.battle_min),
+        transition=Distribution(args.transition_mean, args.transition_std, 0.05),
+        win_rate=args.win_rate,
+        seed=args.seed
+    )
+    macro = SimulatedMacro(game)
+    macro.config["macro_engine"] = args.engine
+    macro.config["session_recording"] = False
+
+    runner = threading.Thread(target=macro.run_macro, daemon=True)
+    cpu_start = time.process_time()
+    wall_start = time.time()
+    runner.start()
+    time.sleep(args.duration)
+    macro.running = False
+    runner.join(timeout=30)
+    wall = time.time() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    return {
+        'engine': args.engine,
+        'duration': wall,
+        'floors': game.floors_cleared,
+        'defeats': game.defeats,
+        'floors_per_hour': game.floors_cleared / wall * 3600,
+        'clicks': len(game.click_latencies),
+        'misclicks': game.misclicks,
+        'p50_ms': percentile(game.click_latencies, 0.5) * 1000,
+        'p95_ms': percentile(game.click_latencies, 0.95) * 1000,
+        'cpu_percent': cpu / wall * 100,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="무한의 탑 게임 플로우 시뮬레이터 처리량 벤치마크")
+    parser.add_argument('--duration', type=float, default=300.0, help="실행 시간 (초)")
+    parser.add_argument('--engine', default='sequential', choices=['sequential', 'pipeline', 'async'])
+    parser.add_argument('--scale', type=float, default=1.0, help="화면 배율 (1.0 = 1920x1080)")
+    parser.add_argument('--battle-mean', type=float, default=20.0, help="전투 시간 평균 (초)")
+    parser.add_argument('--battle-std', type=float, default=5.0, help="전투 시간 표준편차 (초)")
+    parser.add_argument('--battle-min', type=float, default=3.0, help="최소 전투 시간 (초)")
+    parser.add_argument('--transition-mean', type=float, default=0.5, help="화면 전환(로딩) 평균 (초)")
+    parser.add_argument('--transition-std', type=float, default=0.2, help="화면 전환 표준편차 (초)")
+    parser.add_argument('--win-rate', type=float, default=0.7, help="승률 (0~1)")
+    parser.add_argument('--seed', type=int, default=7, help="난수 시드")
+    args = parser.parse_args()
+
+    print("🎮 무한의 탑 게임 플로우 시뮬레이터")
+    print("=" * 60)
+
+    result = run_simulation(args)
+
+    print("\n" + "=" * 60)
+    print(f"⚙️  엔진: {result['engine']} ({result['duration']:.0f}초)")
+    print(f"🏆 클리어 층수: {result['floors']} (패배 {result['defeats']})")
+    print(f"📈 시간당 층수: {result['floors_per_hour']:.1f}")
+    print(f"🖱️  클릭 {result['clicks']}회 (빗나감 {result['misclicks']}회)")
+    print(f"⏱️  버튼 표시 → 클릭 지연: p50 {result['p50_ms']:.0f}ms / p95 {result['p95_ms']:.0f}ms")
+    print(f"💻 CPU 사용률: {result['cpu_percent']:.1f}% (코어 1개 기준, 시뮬레이터 렌더링 포함)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
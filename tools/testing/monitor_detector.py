@@ -13,8 +13,14 @@ from PIL import Image, ImageDraw, ImageFont
 import tkinter as tk
 from tkinter import messagebox
 import threading
+import sys
 from pathlib import Path
 
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+
+from monitor_detection import STATE_TEMPLATE_FILES, MonitorScanner  # noqa: E402
+
 class MonitorDetector:
     """모니터 감지 및 선택 클래스"""
     
@@ -173,51 +179,40 @@ class MonitorDetector:
         cv2.waitKey(0)
         cv2.destroyWindow(window_name)
     
+    def load_state_templates(self):
+        """매크로 이미지 폴더에서 상태 템플릿 로드"""
+        templates = {}
+        for key, filename in STATE_TEMPLATE_FILES.items():
+            image = cv2.imread(str(ROOT_DIR / "images" / filename))
+            if image is not None:
+                templates[key] = image
+        return templates
+    
     def auto_detect_game_monitor(self):
-        """게임 화면이 있는 모니터 자동 감지"""
+        """게임 화면이 있는 모니터 자동 감지 (모든 모니터 동시 캡처 + 썸네일 템플릿 매칭)"""
         print("\n🎮 게임 화면 자동 감지 중...")
         
-        # 각 모니터에서 스크린샷 촬영
-        screenshots = []
-        for i in range(1, len(self.monitors)):
-            screen = self.capture_monitor(i)
-            if screen is not None:
-                screenshots.append((i, screen))
+        templates = self.load_state_templates()
+        if not templates:
+            print("❌ 상태 템플릿이 없습니다: python tools/image_extraction/extract_from_current_screen.py")
+            return None
         
-        if not screenshots:
+        scanner = MonitorScanner(templates)
+        scores = scanner.scan(self.monitors)
+        if not scores:
             print("❌ 스크린샷 촬영 실패")
             return None
         
-        # 간단한 게임 화면 감지 (색상 분포 분석)
-        game_scores = []
-        
-        for monitor_idx, screen in screenshots:
-            # 색상 분포 분석
-            hsv = cv2.cvtColor(screen, cv2.COLOR_BGR2HSV)
-            
-            # 게임 화면 특성 분석
-            # 1. 색상 다양성 (게임 화면은 다양한 색상)
-            color_variance = np.var(hsv[:, :, 0])  # Hue 분산
-            
-            # 2. 밝기 분포 (게임 화면은 적절한 밝기)
-            brightness = np.mean(hsv[:, :, 2])
-            
-            # 3. 채도 (게임 화면은 채도가 높음)
-            saturation = np.mean(hsv[:, :, 1])
-            
-            # 점수 계산 (경험적 가중치)
-            score = (color_variance * 0.4 + brightness * 0.3 + saturation * 0.3)
-            game_scores.append((monitor_idx, score))
-            
-            print(f"   모니터 {monitor_idx}: 점수 {score:.1f} (색상분산: {color_variance:.1f}, 밝기: {brightness:.1f}, 채도: {saturation:.1f})")
+        for monitor_idx, (score, key) in sorted(scores.items()):
+            print(f"   모니터 {monitor_idx}: 점수 {score:.2f}" + (f" ({key})" if key else ""))
         
         # 가장 높은 점수의 모니터 선택
-        if game_scores:
-            best_monitor = max(game_scores, key=lambda x: x[1])
-            print(f"🎯 추천 모니터: {best_monitor[0]} (점수: {best_monitor[1]:.1f})")
-            return best_monitor[0]
-        
-        return None
+        best_monitor, (best_score, best_key) = max(scores.items(), key=lambda item: item[1][0])
+        if best_score < scanner.min_score:
+            print("⚠️  게임 화면을 찾지 못했습니다 (대기/편성/결과 화면에서 다시 시도하세요)")
+            return None
+        print(f"🎯 추천 모니터: {best_monitor} (점수: {best_score:.2f}, {best_key})")
+        return best_monitor
     
     def interactive_monitor_selection(self):
         """대화형 모니터 선택"""
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+매크로 프로파일링 도구
+게임 없이 시뮬레이터 또는 세션 녹화 리플레이를 프레임 공급원으로 run_macro 를
+샘플링 프로파일러로 감싸 실행하고, flamegraph 용 collapsed stack 을
+logs/profiles/ 에 저장한다. find_image_on_screen / OCR 등 핫스팟 확인용.
+
+사용법:
+    python tools/testing/profile_macro.py --cycles 50                # 시뮬레이터, 50 사이클
+    python tools/testing/profile_macro.py --duration 60 --engine pipeline
+    python tools/testing/profile_macro.py --replay logs/recordings/session_20250101_120000
+
+    flamegraph.pl logs/profiles/profile_*.collapsed > flame.svg
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from macro_backends import ImageDirectoryFrameSource, RecordingFrameSource, StubInput  # noqa: E402
+from seven_knights_macro_improved import SevenKnightsTowerMacro  # noqa: E402
+
+
+def build_simulator_macro(args):
+    """가상 게임에 연결된 헤드리스 매크로"""
+    from game_simulator import Distribution, SimulatedMacro, SimulatedTowerGame
+
+    game = SimulatedTowerGame(scale=args.scale, battle=Distribution(args.battle_mean, args.battle_mean / 4, 1.0),
+                              seed=args.seed)
+    return SimulatedMacro(game)
+
+
+def build_replay_macro(args):
+    """녹화/스크린샷 리플레이 매크로 (프레임이 끝나면 정지)"""
+    path = Path(args.replay)
+    if path.joinpath("meta.json").exists():
+        source = RecordingFrameSource(path)
+    else:
+        source = ImageDirectoryFrameSource(path)
+    if len(source) == 0:
+        print(f"❌ 재생할 프레임이 없습니다: {path}")
+        sys.exit(1)
+
+    macro = SevenKnightsTowerMacro(frame_source=source, input_backend=StubInput(source), headless=True)
+    # 프레임이 호출마다 넘어가야 하므로 캡처 스레드 없이, 대기도 생략
+    macro.use_capture_thread = False
+    macro.sleep_scale = 0.0
+    source.on_exhausted = lambda: setattr(macro, 'running', False)
+    return macro
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시뮬레이터/리플레이로 매크로 샘플링 프로파일링")
+    parser.add_argument('--replay', help="세션 녹화 또는 스크린샷 디렉토리 (없으면 시뮬레이터)")
+    parser.add_argument('--engine', default='sequential', choices=['sequential', 'pipeline', 'async'])
+    parser.add_argument('--cycles', type=int, default=0, help="N 사이클 후 종료")
+    parser.add_argument('--duration', type=float, default=60.0, help="--cycles 가 없을 때 실행 시간 (초)")
+    parser.add_argument('--max-duration', type=float, default=600.0,
+                        help="--cycles / --replay 실행 시간 상한 (초, 사이클이 끝나지 않아도 정지)")
+    parser.add_argument('--interval', type=float, default=5.0, help="샘플 간격 (ms)")
+    parser.add_argument('--scale', type=float, default=1.0, help="시뮬레이터 화면 배율")
+    parser.add_argument('--battle-mean', type=float, default=5.0, help="시뮬레이터 전투 시간 평균 (초)")
+    parser.add_argument('--seed', type=int, default=7, help="시뮬레이터 난수 시드")
+    parser.add_argument('--verbose', action='store_true', help="매크로 로그 출력")
+    args = parser.parse_args()
+
+    print("🔬 Seven Knights 매크로 프로파일링")
+    print("=" * 60)
+
+    macro = build_replay_macro(args) if args.replay else build_simulator_macro(args)
+    macro.config["macro_engine"] = args.engine
+    macro.config["session_recording"] = False
+    macro.enable_profiling(args.interval / 1000)
+    if args.cycles > 0:
+        macro.max_cycles = args.cycles
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    runner = threading.Thread(target=macro.run_macro, daemon=True)
+    runner.start()
+    if args.cycles > 0 or args.replay:
+        # 사이클 수 / 프레임 끝에서 매크로가 스스로 정지 (상한 시간이 지나면 강제 정지)
+        runner.join(timeout=args.max_duration)
+        if runner.is_alive():
+            print(f"⏰ {args.max_duration:.0f}초 안에 끝나지 않아 정지합니다")
+    else:
+        time.sleep(args.duration)
+    macro.running = False
+    runner.join(timeout=30)
+
+    print(f"🔁 완료한 사이클: {macro.cycles_completed}")
+
+
+if __name__ == "__main__":
+    main()
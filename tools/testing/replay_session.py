@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+오프라인 리플레이 도구
+세션 녹화(logs/recordings/session_*) 나 PNG 스크린샷 디렉토리를 프레임 공급원으로
+SevenKnightsTowerMacro 를 헤드리스로 실행한다. 클릭은 실제로 보내지 않고 기록만 하며,
+대기 시간은 생략하므로 CPU 가 허용하는 속도로 재생된다.
+
+사용법:
+    # 상태 머신 전체 재생 (run_macro_cycle + 상태별 처리)
+    python tools/testing/replay_session.py logs/recordings/session_20250101_120000
+
+    # 감지만 재생하고 녹화 당시 상태와 비교 (감지 로직 회귀 테스트)
+    python tools/testing/replay_session.py logs/recordings/session_20250101_120000 --detect-only
+
+    # 스크린샷 디렉토리 재생
+    python tools/testing/replay_session.py screenshots/victory --images
+"""
+
+import argparse
+import logging
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from macro_backends import ImageDirectoryFrameSource, RecordingFrameSource, StubInput  # noqa: E402
+from seven_knights_macro_improved import SevenKnightsTowerMacro  # noqa: E402
+
+
+def build_macro(args):
+    """프레임 공급원 + 스텁 입력으로 헤드리스 매크로 생성"""
+    if args.images:
+        source = ImageDirectoryFrameSource(Path(args.path), pattern=args.pattern)
+    else:
+        source = RecordingFrameSource(Path(args.path), keyframes_only=args.keyframes_only)
+
+    if len(source) == 0:
+        print(f"❌ 재생할 프레임이 없습니다: {args.path}")
+        sys.exit(1)
+
+    stub = StubInput(source)
+    macro = SevenKnightsTowerMacro(frame_source=source, input_backend=stub, headless=True)
+
+    # 프레임은 호출할 때마다 하나씩 넘어가야 하므로 캡처 스레드/녹화/대기 없이 실행
+    macro.use_capture_thread = False
+    macro.config["session_recording"] = False
+    macro.sleep_scale = 0.0
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    return macro, source, stub
+
+
+def replay_detection(macro, source) -> int:
+    """프레임마다 감지만 실행하고 녹화 당시 판정과 비교"""
+    total = 0
+    agreed = 0
+    compared = 0
+    mismatches = Counter()
+    started = time.perf_counter()
+
+    while True:
+        frame = source()
+        if frame is None:
+            break
+        total += 1
+        state = macro.detect_game_state(frame)
+
+        recorded = source.current.recorded_state
+        if recorded is not None:
+            compared += 1
+            if recorded == state.value:
+                agreed += 1
+            else:
+                mismatches[(recorded, state.value)] += 1
+
+    elapsed = time.perf_counter() - started
+    print(f"\n📊 감지 재생: {total}프레임, {elapsed:.2f}초 ({total / max(elapsed, 1e-9):.1f} FPS)")
+    if compared:
+        print(f"🎯 녹화 당시 상태와 일치: {agreed}/{compared} ({agreed / compared * 100:.1f}%)")
+        for (recorded, detected), count in mismatches.most_common(10):
+            print(f"   {recorded} → {detected}: {count}회")
+    return 0 if compared == agreed else 1
+
+
+def replay_state_machine(macro, source, stub) -> int:
+    """상태 머신 전체 재생 (프레임이 끝나면 정지)"""
+    macro.running = True
+    source.on_exhausted = lambda: setattr(macro, 'running', False)
+
+    cycles = 0
+    started = time.perf_counter()
+    while macro.running:
+        macro.run_macro_cycle()
+        cycles += 1
+
+    elapsed = time.perf_counter() - started
+    stats = macro.stats
+    print(f"\n📊 상태 머신 재생: {source.position}프레임, {cycles}사이클, {elapsed:.2f}초")
+    print(f"🔄 최종 상태: {macro.current_state.value}, 상태 전환 {stats.successful_transitions}회")
+    print(f"🖱️  클릭 {len(stub.clicks)}회 (입장 {stats.enters}, 시작 {stats.starts}, "
+          f"다음 지역 {stats.next_areas}, 다시하기 {stats.retries})")
+    print(f"⚔️  승리 {stats.victories}, 패배 {stats.defeats}")
+    for click in stub.clicks[:20]:
+        print(f"   ({click['x']}, {click['y']}) @ {click['frame']}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="세션 녹화/스크린샷 오프라인 리플레이")
+    parser.add_argument('path', help="세션 녹화 디렉토리 또는 이미지 디렉토리")
+    parser.add_argument('--images', action='store_true', help="이미지 디렉토리 재생")
+    parser.add_argument('--pattern', default='*.png', help="이미지 파일 패턴 (--images)")
+    parser.add_argument('--keyframes-only', action='store_true', help="원본 해상도 키프레임만 재생")
+    parser.add_argument('--detect-only', action='store_true', help="감지만 실행하고 녹화 상태와 비교")
+    parser.add_argument('--verbose', action='store_true', help="매크로 로그 출력")
+    args = parser.parse_args()
+
+    print("🎞️  Seven Knights 매크로 오프라인 리플레이")
+    print("=" * 60)
+
+    macro, source, stub = build_macro(args)
+    if args.detect_only:
+        sys.exit(replay_detection(macro, source))
+    sys.exit(replay_state_machine(macro, source, stub))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Seven Knights 매크로 게임 창 찾기
+게임이 모니터보다 작은 에뮬레이터 창 안에서 실행될 때, 모니터 프레임에서 실제
+게임 화면 영역을 찾아 그 부분만 캡처/매칭/OCR 하도록 한다.
+
+1. 썸네일의 윤곽선에서 게임 화면 비율(기본 16:9)에 맞는 사각형 후보를 찾고
+   (창 테두리/레터박스 경계), 모니터 전체도 후보에 넣는다.
+2. 후보마다 그 크기에 맞춰 줄인 상태 템플릿을 매칭해 가장 잘 맞는 후보를 고른다
+   (템플릿 크기가 맞지 않는 큰 후보는 점수가 낮게 나옴).
+3. 확인된 후보가 없으면 템플릿을 여러 배율로 찾아(앵커) 게임 화면 배율과 위치를
+   정하고, 그 크기의 사각형 중 좌우/상하 경계가 가장 뚜렷한 위치를 고른다.
+4. 고른 사각형의 네 변을 원본 해상도에서 밝기 경계에 맞춰 보정한다.
+
+GameWindowTracker 는 주기적으로 다시 찾아 창이 움직이거나 크기가 바뀌면 알린다.
+템플릿이 보이지 않는 화면(전투 중 등)에서는 이전 영역을 그대로 두고, 한 번의
+오인식으로 영역이 바뀌지 않도록 같은 새 영역이 두 번 연속 나와야 바꾼다.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Rect = Tuple[int, int, int, int]  # (x, y, width, height)
+EDGE_STEP = 4  # 이웃 픽셀 밝기 차이가 이보다 크면 경계로 봄
+CERTAIN_SCORE = 0.8  # 후보 확인 점수가 이보다 낮으면 앵커 탐색 결과와 비교
+
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    if frame.ndim == 2:
+        return frame
+    code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(frame, code)
+
+
+class GameWindowLocator:
+    """모니터 프레임 안의 게임 화면 영역 찾기 (윤곽선 후보 + 템플릿 확인)"""
+
+    def __init__(self, templates: Dict[str, np.ndarray], game_size: Tuple[int, int] = (1920, 1080),
+                 scales: Sequence[float] = (0.9, 1.0, 1.1), thumb_width: int = 960,
+                 min_score: float = 0.6, min_area: float = 0.04, aspect_tolerance: float = 0.03,
+                 min_width: float = 0.2):
+        self.templates = {key: to_gray(template) for key, template in templates.items()}
+        self.game_size = game_size  # 템플릿을 추출한 게임 화면 해상도
+        self.scales = list(scales)
+        self.thumb_width = thumb_width
+        self.min_score = min_score
+        self.min_area = min_area  # 후보 최소 넓이 (모니터 대비)
+        self.aspect_tolerance = aspect_tolerance
+        self.min_width = min_width  # 앵커 탐색에서 가정하는 가장 작은 게임 화면 폭 (모니터 대비)
+
+    def locate(self, frame: np.ndarray, hint: Optional[Rect] = None) -> Optional[Tuple[Rect, float, str]]:
+        """게임 화면 영역 (프레임 좌표), 템플릿 점수, 템플릿 이름 - 확인하지 못하면 None
+
+        hint (이전 영역) 의 네 변이 그대로 경계이고 템플릿도 확인되면 후보 탐색을 생략한다.
+        """
+        gray = to_gray(frame)
+        ratio = min(1.0, self.thumb_width / gray.shape[1])
+        thumb = cv2.resize(gray, (int(gray.shape[1] * ratio), int(gray.shape[0] * ratio)),
+                           interpolation=cv2.INTER_AREA)
+
+        best = None
+        candidates = self.find_candidates(thumb)
+        if hint is not None:
+            hint = tuple(int(v * ratio) for v in hint)
+            if self.has_borders(thumb, hint):
+                candidates.insert(0, hint)
+            else:
+                hint = None
+        for index, rect in enumerate(candidates):
+            score, key = self.verify(thumb, rect)
+            if index == 0 and hint is not None and score >= self.min_score:
+                best = (rect, score, key)
+                break
+            # 점수가 같으면 더 작은(안쪽) 후보
+            if score >= self.min_score and (best is None or score > best[1] + 0.02):
+                best = (rect, score, key)
+        if best is None or best[1] < CERTAIN_SCORE and not (index == 0 and hint is not None):
+            anchored = self.locate_by_anchor(thumb)
+            if anchored is not None and (best is None or anchored[1] > best[1]):
+                best = anchored
+        if best is None:
+            return None
+
+        x, y, w, h = best[0]
+        rect = (int(x / ratio), int(y / ratio), int(w / ratio), int(h / ratio))
+        return self.refine(gray, rect, radius=int(2 / ratio) + 2), best[1], best[2]
+
+    def find_candidates(self, thumb: np.ndarray) -> List[Rect]:
+        """게임 화면 비율에 맞는 사각형 후보 (작은 것부터, 마지막은 모니터 전체)"""
+        thumb_h, thumb_w = thumb.shape
+        aspect = self.game_size[0] / self.game_size[1]
+        edges = cv2.Canny(thumb, 30, 90)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+        contours, _ = cv2.findContours(edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+        candidates = set()
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h < self.min_area * thumb_w * thumb_h or w >= thumb_w - 2 and h >= thumb_h - 2:
+                continue
+            if abs(w / h - aspect) / aspect > self.aspect_tolerance:
+                continue
+            # 테두리 선 두께(dilate) 만큼 안쪽으로
+            candidates.add((x + 1, y + 1, max(1, w - 2), max(1, h - 2)))
+
+        ordered = sorted(candidates, key=lambda rect: rect[2] * rect[3])
+        ordered.append((0, 0, thumb_w, thumb_h))
+        return ordered
+
+    def match_anchor(self, thumb: np.ndarray, widths: Sequence[float],
+                     keys: Sequence[str]) -> Optional[Tuple[float, float, Rect, str]]:
+        """게임 화면 폭을 가정해 줄인 템플릿 중 가장 잘 맞는 것 (점수, 폭, 템플릿 위치와 크기, 이름)"""
+        thumb_h, thumb_w = thumb.shape
+        anchor = None
+        for width in widths:
+            game_ratio = width / self.game_size[0]
+            for key in keys:
+                template = self.templates[key]
+                new_w, new_h = int(template.shape[1] * game_ratio), int(template.shape[0] * game_ratio)
+                if min(new_w, new_h) < 8 or new_w > thumb_w or new_h > thumb_h:
+                    continue
+                small = cv2.resize(template, (new_w, new_h), interpolation=cv2.INTER_AREA)
+                _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(thumb, small, cv2.TM_CCOEFF_NORMED))
+                if anchor is None or score > anchor[0]:
+                    anchor = (score, width, (location[0], location[1], new_w, new_h), key)
+        return anchor
+
+    def locate_by_anchor(self, thumb: np.ndarray) -> Optional[Tuple[Rect, float, str]]:
+        """템플릿을 여러 배율로 찾아 게임 화면 배율을 정한 뒤 경계가 가장 뚜렷한 사각형 선택"""
+        thumb_h, thumb_w = thumb.shape
+        widths = []
+        width = float(thumb_w)
+        while width >= self.min_width * thumb_w:
+            widths.append(width)
+            width /= 1.08
+        anchor = self.match_anchor(thumb, widths, list(self.templates))
+        if anchor is None or anchor[0] < self.min_score:
+            return None
+        # 찾은 템플릿으로 배율을 2% 단위로 다시 맞춤
+        anchor = self.match_anchor(thumb, [anchor[1] * 1.02 ** step for step in range(-4, 5)], [anchor[3]])
+
+        score, width, (ax, ay, aw, ah), key = anchor
+        aspect = self.game_size[0] / self.game_size[1]
+        signed = thumb.astype(np.int16)
+        # 경계는 게임 화면 높이/폭 전체에 걸친 직선이므로, 템플릿을 포함할 수 있는
+        # 범위의 행/열 중 밝기가 바뀌는 비율로 본다 (짧은 바탕화면 물체의 경계는 약함)
+        span_h = int(width * 1.03 / aspect)
+        column_edges = self.edge_profile(signed[max(0, ay + ah - span_h):ay + span_h], axis=1)
+
+        # 폭 ±3% 안에서 템플릿을 포함하면서 양쪽 경계 중 약한 쪽이 뚜렷한 위치들 중
+        # 가장 안쪽 (에뮬레이터 창 테두리의 바깥선도 같은 모양의 경계이므로)
+        pairs = []
+        for w in range(int(width / 1.03), min(thumb_w, int(width * 1.03)) + 1):
+            low, high = max(0, ax + aw - w), min(ax, thumb_w - w)
+            if low > high:
+                continue
+            strength = np.minimum(column_edges[low:high + 1], column_edges[low + w:high + w + 1])
+            offset = int(np.argmax(strength))
+            pairs.append((float(strength[offset]), low + offset, w))
+        if not pairs:
+            return None
+        strongest = max(pair[0] for pair in pairs)
+        _, x, w = min((pair for pair in pairs if pair[0] >= strongest * 0.8), key=lambda pair: pair[2])
+
+        row_edges = self.edge_profile(signed[:, x:x + w], axis=0)
+        # 높이는 폭과 화면 비율로 정해지므로 반올림 오차(±1%)만 허용
+        best_y = None
+        expected_h = w / aspect
+        for h in range(int(expected_h / 1.01), min(thumb_h, int(expected_h * 1.01) + 1) + 1):
+            low, high = max(0, ay + ah - h), min(ay, thumb_h - h)
+            if low > high:
+                continue
+            strength = np.minimum(row_edges[low:high + 1], row_edges[low + h:high + h + 1])
+            offset = int(np.argmax(strength))
+            if best_y is None or strength[offset] > best_y[0]:
+                best_y = (float(strength[offset]), low + offset, h)
+        if best_y is None:
+            return None
+        _, y, h = best_y
+        return (x, y, w, h), score, key
+
+    @staticmethod
+    def edge_profile(signed: np.ndarray, axis: int) -> np.ndarray:
+        """경계 위치(0..길이)별로 밝기가 EDGE_STEP 넘게 바뀌는 줄의 비율 (프레임 가장자리는 1)"""
+        steps = (np.abs(np.diff(signed, axis=axis)) > EDGE_STEP).mean(axis=1 - axis)
+        return np.concatenate([[1.0], steps, [1.0]])
+
+    def has_borders(self, thumb: np.ndarray, rect: Rect, min_fraction: float = 0.5) -> bool:
+        """사각형의 네 변이 모두 밝기 경계인지 (창이 움직였으면 이전 영역은 통과하지 못함)"""
+        x, y, w, h = rect
+        if w <= 2 or h <= 2 or x < 0 or y < 0 or x + w > thumb.shape[1] or y + h > thumb.shape[0]:
+            return False
+        signed = thumb.astype(np.int16)
+        column_edges = self.edge_profile(signed[y:y + h], axis=1)
+        row_edges = self.edge_profile(signed[:, x:x + w], axis=0)
+        # 썸네일 반올림 오차로 ±1 픽셀까지 허용
+        return all(profile[max(0, position - 1):position + 2].max() >= min_fraction
+                   for profile, position in ((column_edges, x), (column_edges, x + w),
+                                             (row_edges, y), (row_edges, y + h)))
+
+    def verify(self, thumb: np.ndarray, rect: Rect) -> Tuple[float, Optional[str]]:
+        """후보 영역 크기에 맞춘 템플릿 매칭 점수"""
+        x, y, w, h = rect
+        crop = thumb[y:y + h, x:x + w]
+        game_ratio = w / self.game_size[0]
+        best_score, best_key = 0.0, None
+        for key, template in self.templates.items():
+            for scale in self.scales:
+                new_w = int(template.shape[1] * game_ratio * scale)
+                new_h = int(template.shape[0] * game_ratio * scale)
+                if min(new_w, new_h) < 8 or new_w > crop.shape[1] or new_h > crop.shape[0]:
+                    continue
+                small = cv2.resize(template, (new_w, new_h), interpolation=cv2.INTER_AREA)
+                score = float(cv2.matchTemplate(crop, small, cv2.TM_CCOEFF_NORMED).max())
+                if score > best_score:
+                    best_score, best_key = score, key
+        return best_score, best_key
+
+    @staticmethod
+    def refine(gray: np.ndarray, rect: Rect, radius: int) -> Rect:
+        """네 변을 원본 해상도에서 가장 강한 밝기 경계로 이동 (±radius 픽셀)"""
+        frame_h, frame_w = gray.shape
+        x, y, w, h = rect
+        if w >= frame_w - radius and h >= frame_h - radius:
+            return 0, 0, frame_w, frame_h
+        signed = gray.astype(np.int16)
+        column_diff = np.abs(np.diff(signed[max(0, y):y + h], axis=1)).mean(axis=0)  # 열 i | i+1 경계
+        row_diff = np.abs(np.diff(signed[:, max(0, x):x + w], axis=0)).mean(axis=1)
+
+        def snap(diff: np.ndarray, position: int) -> int:
+            low, high = max(0, position - radius - 1), min(len(diff), position + radius)
+            if low >= high:
+                return position
+            return low + int(np.argmax(diff[low:high])) + 1
+
+        left = snap(column_diff, x)
+        right = snap(column_diff, x + w)
+        top = snap(row_diff, y)
+        bottom = snap(row_diff, y + h)
+        if right - left < w // 2 or bottom - top < h // 2:
+            return rect
+        return left, top, right - left, bottom - top
+
+
+class GameWindowTracker(threading.Thread):
+    """주기적으로 게임 화면 영역을 다시 찾아 바뀌면 on_change 호출"""
+
+    def __init__(self, locator: GameWindowLocator, grab_monitor: Callable[[], Optional[np.ndarray]],
+                 on_change: Callable[[Rect], None], interval: float = 30.0, tolerance: int = 4):
+        super().__init__(name="GameWindowTracker", daemon=True)
+        self.locator = locator
+        self.grab_monitor = grab_monitor
+        self.on_change = on_change
+        self.interval = interval
+        self.tolerance = tolerance  # 이 픽셀 이하의 차이는 같은 영역으로 봄
+        self.current: Optional[Rect] = None
+        self.pending: Optional[Rect] = None  # 한 번 본 새 영역 (다음 확인에서도 같으면 적용)
+        self.stop_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"게임 창 확인 오류: {e}")
+
+    def same(self, a: Optional[Rect], b: Optional[Rect]) -> bool:
+        return a is not None and b is not None and max(abs(p - q) for p, q in zip(a, b)) <= self.tolerance
+
+    def check(self) -> Optional[Rect]:
+        """한 번 찾아서 영역이 바뀌었으면 알림 (현재 영역 반환)"""
+        frame = self.grab_monitor()
+        if frame is None:
+            return self.current
+        found = self.locator.locate(frame, hint=self.current)
+        if found is None:
+            return self.current
+        rect = found[0]
+        if self.current is None:
+            # 시작할 때 찾지 못했던 게임 화면을 처음 찾음
+            self.current = rect
+            self.on_change(rect)
+        elif self.same(rect, self.current):
+            self.pending = None
+        elif self.same(rect, self.pending):
+            self.current, self.pending = rect, None
+            self.on_change(rect)
+        else:
+            self.pending = rect
+        return self.current